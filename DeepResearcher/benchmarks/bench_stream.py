@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Replay benchmark for stream_research(), ResearchTracker and save_research_session().
+
+Starts the mock Responses API server, then streams synthetic runs of each
+size through the real client code in a fresh worker process per run (so
+peak RSS is per run) and reports events/sec, peak RSS, save time and the CPU
+overhead of the rich progress display relative to no display.
+
+    python benchmarks/bench_stream.py
+    python benchmarks/bench_stream.py --sizes 1000,10000,100000,1000000 --modes none,plain,rich
+    python benchmarks/bench_stream.py --replay research_sessions/<session>/events.jsonl
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MOCK_SERVER = Path(__file__).resolve().parent / "mock_server.py"
+
+
+def run_worker(args):
+    """Stream one run against the mock server and write its measurements as JSON."""
+    import resource
+    sys.path.insert(0, str(ROOT))
+
+    from openai import OpenAI
+    from rich.console import Console
+
+    from src.catalog import save_research_session
+    from src.journal import EventJournal, JOURNAL_FILENAME
+    from src.progress import make_progress
+    from src.resume import SessionState, STATE_FILENAME
+    from src.streaming import ResearchTracker, stream_research
+
+    client = OpenAI(api_key="mock", base_url=args.base_url, timeout=3600)
+    tool_calls = max(1, min(args.events // 50, 100))
+    request_params = {
+        "model": "o4-mini-deep-research",
+        "input": "benchmark query",
+        "background": True,
+        "tools": [{"type": "web_search_preview"}],
+        "max_tool_calls": 100,
+        "metadata": {"mock_events": str(args.events), "mock_tool_calls": str(tool_calls)},
+    }
+    if args.replay:
+        request_params["metadata"]["mock_replay"] = args.replay
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "bench_session"
+        folder.mkdir()
+        tracker = ResearchTracker(100, request_params["model"])
+        # Render the rich panel for real, just not to the benchmark's terminal
+        console = Console(file=open(os.devnull, "w"), force_terminal=True, width=100)
+        progress = make_progress(args.mode, tracker, console)
+        if args.mode != "rich":
+            progress.stream = open(os.devnull, "w")
+        journal = EventJournal(folder / JOURNAL_FILENAME)
+        state = SessionState.create(request_params, "benchmark", folder / STATE_FILENAME)
+
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        response, journal = stream_research(client, request_params, tracker, journal, state, progress=progress)
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+        save_args = argparse.Namespace(
+            model=request_params["model"], max_tool_calls=100, no_web_search=False,
+            code_interpreter=False, no_background=False,
+        )
+        save_start = time.perf_counter()
+        save_research_session(folder, "benchmark query", response, save_args, "benchmark")
+        save_ms = (time.perf_counter() - save_start) * 1000
+
+    result = {
+        "events": len(journal),
+        "mode": args.mode,
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        "events_per_second": len(journal) / wall if wall else 0.0,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+        "save_ms": save_ms,
+        "tool_calls": tracker.tool_calls,
+        "status": getattr(response, "status", None),
+    }
+    Path(args.result).write_text(json.dumps(result))
+
+
+def start_mock_server():
+    """Start the mock server on a free port; returns (process, base_url)."""
+    process = subprocess.Popen(
+        [sys.executable, str(MOCK_SERVER), "--port", "0"],
+        stdout=subprocess.PIPE, text=True,
+    )
+    line = process.stdout.readline()
+    return process, line.strip().rsplit(" ", 1)[-1]
+
+
+def measure(base_url, events, mode, replay):
+    """Run one worker process and return its measurements."""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_path = f.name
+    try:
+        command = [
+            sys.executable, __file__, "--worker", "--base-url", base_url,
+            "--events", str(events), "--mode", mode, "--result", result_path,
+        ]
+        if replay:
+            command += ["--replay", replay]
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, cwd=ROOT)
+        return json.loads(Path(result_path).read_text())
+    finally:
+        os.unlink(result_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stream handling against the mock Responses API")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated event counts (default: 1000,10000,100000)")
+    parser.add_argument("--modes", default="none,rich", help="Progress modes to compare; 'none' is the baseline (default: none,rich)")
+    parser.add_argument("--replay", help="Replay this events.jsonl journal instead of synthetic events (sizes are ignored)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    # Worker-process options
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--events", type=int, default=1000, help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default="none", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args)
+
+    sizes = [0] if args.replay else [int(size) for size in args.sizes.split(",")]
+    modes = args.modes.split(",")
+    replay = str(Path(args.replay).resolve()) if args.replay else None
+
+    server, base_url = start_mock_server()
+    try:
+        if not args.json:
+            print(f"{'events':>9} {'mode':>6} {'events/s':>10} {'wall s':>8} {'cpu s':>8} {'rss MB':>8} {'save ms':>8} {'ui cpu':>8}")
+        for size in sizes:
+            baseline_cpu = None
+            for mode in modes:
+                result = measure(base_url, size, mode, replay)
+                if mode == "none":
+                    baseline_cpu = result["cpu_seconds"]
+                ui_overhead = None if baseline_cpu is None or mode == "none" else result["cpu_seconds"] - baseline_cpu
+                result["ui_cpu_overhead_seconds"] = ui_overhead
+                if args.json:
+                    print(json.dumps(result))
+                else:
+                    print(
+                        f"{result['events']:>9} {mode:>6} {result['events_per_second']:>10.0f} "
+                        f"{result['wall_seconds']:>8.2f} {result['cpu_seconds']:>8.2f} "
+                        f"{result['peak_rss_mb']:>8.1f} {result['save_ms']:>8.1f} "
+                        f"{'-' if ui_overhead is None else f'{ui_overhead:+.2f}':>8}"
+                    )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI Responses API.
+
+Speaks enough of the Responses protocol for the CLI to run against it
+unchanged: streaming ``POST /v1/responses``, ``GET /v1/responses/{id}``
+(optionally streaming with ``starting_after``) and
+``POST /v1/responses/{id}/cancel``. Event streams are either synthetic
+(created, output_item.added/done per tool type, text deltas, completed) or a
+replay of a recorded ``events.jsonl`` journal. Synthetic reports cite
+``mock.example`` pages inline, with matching ``url_citation`` annotations.
+
+    python benchmarks/mock_server.py --port 8765 --events 5000 --rate 200
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=mock \\
+        python deep_research.py "any query"
+
+Any scenario option can be overridden per request through the request's
+``metadata`` (e.g. ``{"mock_events": "100000", "mock_drop_after": "500"}``),
+which lets one server drive a whole benchmark run. ``--reject N`` answers
+the first N create requests with 429 and a ``Retry-After`` header.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+DEFAULT_SCENARIO = {
+    "events": 1000,          # total events in the stream
+    "rate": 0.0,             # events per second, 0 for as fast as possible
+    "tool_calls": 30,        # tool calls spread through the stream
+    "tool_mix": "web_search_call=0.85,code_interpreter_call=0.15",
+    "drop_after": 0,         # close the connection after this many events (0: never)
+    "final_status": "completed",
+    "replay": None,          # path to an events.jsonl journal to replay instead
+    "seed": 0,
+}
+
+
+def parse_tool_mix(tool_mix):
+    """Parse ``type=weight,...`` into parallel lists of tool types and weights."""
+    types, weights = [], []
+    for part in tool_mix.split(","):
+        name, _, weight = part.partition("=")
+        types.append(name.strip())
+        weights.append(float(weight or 1))
+    return types, weights
+
+
+# Every CITATION_EVERY-th text delta is an inline citation, as deep research writes them
+CITATION_EVERY = 40
+CITATION_PATTERN = re.compile(r"\(\[([^\]]*)\]\((https?://[^)\s]+)\)\)")
+
+
+def citation_annotations(text):
+    """``url_citation`` annotations for the inline citations in ``text``."""
+    return [
+        {
+            "type": "url_citation",
+            "start_index": match.start(),
+            "end_index": match.end(),
+            "url": match.group(2),
+            "title": f"Mock source {match.group(2).split('?')[0].rsplit('/', 1)[-1]}",
+        }
+        for match in CITATION_PATTERN.finditer(text)
+    ]
+
+
+def response_object(response_id, model, status, text="", output=None):
+    """Build a Responses API response object."""
+    output = list(output or [])
+    if text:
+        output.append({
+            "type": "message",
+            "id": f"msg_{response_id}",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": citation_annotations(text)}],
+        })
+    usage = None
+    if status == "completed":
+        # Rough stand-in: each tool call feeds results back into the context
+        input_tokens = 1000 + 5000 * sum(1 for item in output if item["type"].endswith("_call"))
+        output_tokens = len(text) // 4
+        usage = {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": output_tokens // 2},
+            "total_tokens": input_tokens + output_tokens,
+        }
+    return {
+        "id": response_id,
+        "object": "response",
+        "usage": usage,
+        "created_at": int(time.time()),
+        "status": status,
+        "model": model,
+        "output": output,
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "background": True,
+    }
+
+
+def tool_item(tool_type, index, status):
+    item = {"type": tool_type, "id": f"{tool_type.split('_')[0]}_{index}", "status": status}
+    if tool_type == "web_search_call":
+        item["action"] = {"type": "search", "query": f"mock query {index}"}
+    elif tool_type == "code_interpreter_call":
+        item.update({"code": "print(1)", "container_id": "cntr_mock", "outputs": None})
+    elif tool_type == "file_search_call":
+        item.update({"queries": [f"mock query {index}"], "results": None})
+    elif tool_type == "mcp_call":
+        item.update({"name": "lookup", "server_label": "mock", "arguments": "{}"})
+    return item
+
+
+def synthetic_events(response_id, model, scenario):
+    """Generate a deterministic synthetic event stream (without sequence numbers)."""
+    rng = random.Random(scenario["seed"])
+    total = max(int(scenario["events"]), 3)
+    tool_calls = min(int(scenario["tool_calls"]), max((total - 3) // 2, 0))
+    types, weights = parse_tool_mix(scenario["tool_mix"])
+
+    yield {"type": "response.created", "response": response_object(response_id, model, "in_progress")}
+
+    # Spread tool calls (two events each) evenly among text deltas
+    body = total - 2
+    slots = body - 2 * tool_calls
+    every = (slots // (tool_calls + 1)) if tool_calls else slots + 1
+    emitted_tools = 0
+    deltas = 0
+    output = []
+    text_parts = []
+    produced = 0
+    while produced < body:
+        if emitted_tools < tool_calls and deltas >= every * (emitted_tools + 1) and produced + 2 <= body:
+            tool_type = rng.choices(types, weights)[0]
+            item = tool_item(tool_type, emitted_tools, "in_progress")
+            yield {"type": "response.output_item.added", "output_index": emitted_tools, "item": item}
+            done_item = tool_item(tool_type, emitted_tools, "completed")
+            output.append(done_item)
+            yield {"type": "response.output_item.done", "output_index": emitted_tools, "item": done_item}
+            emitted_tools += 1
+            produced += 2
+            continue
+        delta = f"token{deltas} "
+        if deltas % CITATION_EVERY == CITATION_EVERY - 1:
+            source = deltas // CITATION_EVERY % 5
+            delta = f"([mock.example](https://mock.example/source/{source}?utm_source=mock)). "
+        text_parts.append(delta)
+        yield {
+            "type": "response.output_text.delta",
+            "item_id": f"msg_{response_id}",
+            "output_index": tool_calls,
+            "content_index": 0,
+            "delta": delta,
+            "logprobs": [],
+        }
+        deltas += 1
+        produced += 1
+
+    status = scenario["final_status"]
+    final_type = {"completed": "response.completed", "failed": "response.failed"}.get(status, "response.incomplete")
+    yield {"type": final_type, "response": response_object(response_id, model, status, "".join(text_parts), output)}
+
+
+def replay_events(response_id, model, path):
+    """Replay a recorded journal, rewriting its response ids to this response."""
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            event.pop("sequence_number", None)
+            if isinstance(event.get("response"), dict):
+                event["response"]["id"] = response_id
+            yield event
+
+
+class MockState:
+    """Responses created by the server, and their scenarios."""
+
+    def __init__(self, scenario, reject=0):
+        self.scenario = scenario
+        self.responses = {}
+        self.reject = reject
+        self.lock = threading.Lock()
+
+    def take_rejection(self):
+        """True while create requests are still to be rate limited."""
+        with self.lock:
+            if self.reject <= 0:
+                return False
+            self.reject -= 1
+            return True
+
+    def create(self, body):
+        scenario = dict(self.scenario)
+        for key, value in (body.get("metadata") or {}).items():
+            if key.startswith("mock_") and key[5:] in scenario:
+                default = DEFAULT_SCENARIO[key[5:]]
+                scenario[key[5:]] = type(default)(value) if default is not None else value
+        response_id = f"resp_mock_{uuid.uuid4().hex[:12]}"
+        with self.lock:
+            self.responses[response_id] = {
+                "model": body.get("model", "mock-model"),
+                "scenario": scenario,
+                "cancelled": False,
+                "created": time.monotonic(),
+            }
+        return response_id
+
+    def events(self, response_id, starting_after=None):
+        """Yield (sequence_number, event) pairs, skipping those already seen."""
+        record = self.responses[response_id]
+        scenario = record["scenario"]
+        if scenario["replay"]:
+            source = replay_events(response_id, record["model"], scenario["replay"])
+        else:
+            source = synthetic_events(response_id, record["model"], scenario)
+        for sequence_number, event in enumerate(source):
+            if starting_after is not None and sequence_number <= starting_after:
+                continue
+            event["sequence_number"] = sequence_number
+            yield sequence_number, event
+
+    def final_response(self, response_id, wait=False):
+        record = self.responses[response_id]
+        if record["cancelled"]:
+            return response_object(response_id, record["model"], "cancelled")
+        # A paced background response stays in progress for as long as its
+        # stream would take; a foreground create blocks until it is done
+        scenario = record["scenario"]
+        if scenario["rate"] and not wait and time.monotonic() - record["created"] < scenario["events"] / scenario["rate"]:
+            return response_object(response_id, record["model"], "in_progress")
+        final = None
+        for _, event in self.events(response_id):
+            final = event
+        response = final.get("response") if final else None
+        if not isinstance(response, dict) or response.get("status") == "in_progress":
+            return response_object(response_id, record["model"], "completed", "mock output")
+        return response
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, response_id, starting_after=None):
+        scenario = self.state.responses[response_id]["scenario"]
+        rate = float(scenario["rate"])
+        drop_after = int(scenario["drop_after"])
+        interval = 1.0 / rate if rate > 0 else 0.0
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        start = time.perf_counter()
+        buffer = []
+        for sent, (_, event) in enumerate(self.state.events(response_id, starting_after), 1):
+            if self.state.responses[response_id]["cancelled"]:
+                break
+            buffer.append(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n")
+            dropping = drop_after and sent >= drop_after
+            # Batch writes when unthrottled; pace each event otherwise. A dropped
+            # connection still delivers every event before the drop
+            if interval or dropping or len(buffer) >= 256:
+                self.wfile.write("".join(buffer).encode("utf-8"))
+                buffer = []
+            if dropping:
+                self.wfile.flush()
+                return
+            if interval:
+                delay = start + sent * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        if buffer:
+            self.wfile.write("".join(buffer).encode("utf-8"))
+        self.wfile.flush()
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if path.endswith("/responses"):
+            if self.state.take_rejection():
+                error = {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}
+                return self._send_json({"error": error}, 429, {"Retry-After": "1"})
+            response_id = self.state.create(body)
+            if body.get("stream"):
+                return self._stream(response_id)
+            return self._send_json(self.state.final_response(response_id, wait=not body.get("background")))
+
+        if path.endswith("/cancel"):
+            response_id = path.rstrip("/").split("/")[-2]
+            if response_id not in self.state.responses:
+                return self._send_json({"error": {"message": "not found"}}, 404)
+            self.state.responses[response_id]["cancelled"] = True
+            return self._send_json(self.state.final_response(response_id))
+
+        self._send_json({"error": {"message": f"unknown path {path}"}}, 404)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        response_id = url.path.rstrip("/").split("/")[-1]
+        if response_id not in self.state.responses:
+            return self._send_json({"error": {"message": "not found"}}, 404)
+        query = parse_qs(url.query)
+        if query.get("stream", ["false"])[0] == "true":
+            starting_after = query.get("starting_after", [None])[0]
+            return self._stream(response_id, int(starting_after) if starting_after is not None else None)
+        self._send_json(self.state.final_response(response_id))
+
+
+def start_server(scenario=None, host="127.0.0.1", port=0, reject=0):
+    """Start a mock server on a background thread; returns (server, base_url)."""
+    state = MockState(dict(DEFAULT_SCENARIO, **(scenario or {})), reject)
+    handler = type("Handler", (MockHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI Responses API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--events", type=int, default=DEFAULT_SCENARIO["events"], help="Events per synthetic stream")
+    parser.add_argument("--rate", type=float, default=DEFAULT_SCENARIO["rate"], help="Events per second (0: unthrottled)")
+    parser.add_argument("--tool-calls", type=int, default=DEFAULT_SCENARIO["tool_calls"], help="Tool calls per stream")
+    parser.add_argument("--tool-mix", default=DEFAULT_SCENARIO["tool_mix"], help="Tool type weights, e.g. web_search_call=0.8,code_interpreter_call=0.2")
+    parser.add_argument("--drop-after", type=int, default=0, help="Drop the connection after N events")
+    parser.add_argument("--final-status", default="completed", choices=["completed", "failed", "incomplete"])
+    parser.add_argument("--replay", help="Replay a recorded events.jsonl journal instead of synthetic events")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reject", type=int, default=0, help="Answer the first N create requests with 429")
+    args = parser.parse_args()
+
+    scenario = {
+        "events": args.events, "rate": args.rate, "tool_calls": args.tool_calls,
+        "tool_mix": args.tool_mix, "drop_after": args.drop_after,
+        "final_status": args.final_status, "replay": args.replay, "seed": args.seed,
+    }
+    server, base_url = start_server(scenario, args.host, args.port, args.reject)
+    print(f"Mock Responses API listening on {base_url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
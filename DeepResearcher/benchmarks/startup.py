@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the CLI's cheap paths.
+
+Runs each path under ``python -X importtime`` and checks the total import
+time against the budget recorded in startup_budget.json. Paths that never
+talk to the API must also not import any of the heavy modules listed there
+(openai, the rich live/progress stack), which catches regressions even on
+machines much faster or slower than the one the budget was recorded on.
+
+    python benchmarks/startup.py            # check against the budget
+    python benchmarks/startup.py --record   # re-record the budget
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).resolve().parent / "startup_budget.json"
+
+# Headroom applied to measured times when recording a new budget
+RECORD_HEADROOM = 2.0
+
+
+def cheap_paths(sessions_dir):
+    """CLI invocations that must start fast, as (name, argv, env overrides)."""
+    return [
+        ("help", ["--help"], {}),
+        ("arg_error", ["--model", "not-a-model", "query"], {}),
+        ("missing_api_key", ["query"], {"OPENAI_API_KEY": ""}),
+        ("list", ["list", "--output-dir", sessions_dir], {}),
+        ("search", ["search", "voice", "--output-dir", sessions_dir], {}),
+        ("status", ["status", "--output-dir", sessions_dir], {}),
+        ("stats", ["stats", "--output-dir", sessions_dir], {}),
+    ]
+
+
+def measure(argv, env_overrides):
+    """Run one CLI invocation; return (total import ms, set of imported modules)."""
+    env = dict(os.environ, **env_overrides)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(ROOT / "deep_research.py"), *argv],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        # Top-level imports (no indentation) sum to the total import time
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check CLI startup import time against the recorded budget")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per path; the fastest is used (default: 5)")
+    parser.add_argument("--record", action="store_true", help="Write a new budget from this machine's timings")
+    args = parser.parse_args()
+
+    budget = json.loads(BUDGET_FILE.read_text())
+    forbidden = budget["forbidden_modules"]
+    failures = []
+    measured = {}
+
+    with tempfile.TemporaryDirectory() as sessions_dir:
+        for name, argv, env in cheap_paths(sessions_dir):
+            runs = [measure(argv, env) for _ in range(args.runs)]
+            import_ms = min(ms for ms, _ in runs)
+            modules = runs[0][1]
+            measured[name] = import_ms
+
+            heavy = sorted(m for m in modules if any(m == f or m.startswith(f + ".") for f in forbidden))
+            limit = budget["import_ms"].get(name)
+            status = "ok"
+            if heavy:
+                status = "FAIL"
+                failures.append(f"{name}: imports {', '.join(heavy[:5])}")
+            if limit is not None and import_ms > limit and not args.record:
+                status = "FAIL"
+                failures.append(f"{name}: {import_ms:.1f} ms exceeds budget of {limit} ms")
+            print(f"{name:16} {import_ms:8.1f} ms   budget {limit if limit is not None else '-':>6} ms   {status}")
+
+    if args.record:
+        budget["import_ms"] = {name: round(ms * RECORD_HEADROOM) for name, ms in measured.items()}
+        BUDGET_FILE.write_text(json.dumps(budget, indent=2) + "\n")
+        print(f"Recorded budget to {BUDGET_FILE}")
+
+    if failures:
+        print("\nStartup regressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
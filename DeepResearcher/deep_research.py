@@ -4,26 +4,39 @@ Deep Research CLI Tool
 Uses OpenAI's deep research models to conduct comprehensive research on user queries.
 """
 
+# Only cheap imports at module level: openai and the rich UI stack are
+# imported inside the commands that need them, so --help, argument errors
+# and offline commands start fast (see benchmarks/startup.py)
 import argparse
+import json
 import os
 import sys
-from openai import OpenAI
-from rich.console import Console
+import time
+from pathlib import Path
 
-from src.utils import generate_folder_name, create_research_folder
-from src.catalog import save_research_session
-from src.streaming import ResearchTracker, stream_research
+from src.budget import parse_duration
+from src.cache import DEFAULT_SIMILARITY_THRESHOLD
+from src.context import DEFAULT_CONTEXT_BUDGET
+from src.decompose import DEFAULT_MAX_SUBQUERIES
+from src.progress import PROGRESS_MODES, default_progress_mode
+from src.sources import DEFAULT_SEED_SOURCES
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Conduct deep research using OpenAI's deep research models"
-    )
+DEFAULT_OUTPUT_DIR = "./research_sessions"
+
+
+def add_output_dir_option(parser, help="Directory holding research sessions"):
+    """Add the sessions directory option, with the default shared by every command."""
     parser.add_argument(
-        "query",
-        nargs="?",
-        help="Research query to investigate"
+        "--output-dir",
+        type=str,
+        default=DEFAULT_OUTPUT_DIR,
+        help=f"{help} (default: {DEFAULT_OUTPUT_DIR})"
     )
+
+
+def add_research_options(parser):
+    """Add the model, tool and output options shared by research commands."""
     parser.add_argument(
         "--model",
         default="o4-mini-deep-research",
@@ -51,6 +64,1201 @@ def main():
         action="store_true",
         help="Enable code interpreter for data analysis"
     )
+    add_output_dir_option(parser, "Directory to save research sessions")
+    parser.add_argument(
+        "--progress",
+        choices=PROGRESS_MODES,
+        help="Progress display: rich live panel, or one plain/json line per state change for "
+             "CI/cron/nohup runs (default: rich on a terminal, plain otherwise)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run new research, even if a matching session already exists"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        metavar="DAYS",
+        help="Only reuse sessions completed within the last DAYS days (default: no limit)"
+    )
+    parser.add_argument(
+        "--similarity-threshold",
+        type=float,
+        default=DEFAULT_SIMILARITY_THRESHOLD,
+        help=f"Similarity above which past queries are reported as near-duplicates (default: {DEFAULT_SIMILARITY_THRESHOLD})"
+    )
+    parser.add_argument(
+        "--llm-folder-name",
+        action="store_true",
+        help="Name session folders with gpt-5-mini instead of the local keyword slug"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        metavar="PATH",
+        help="Also export run metrics to PATH: Prometheus text if it ends in .prom, otherwise appended JSON lines"
+    )
+    parser.add_argument(
+        "--context-budget",
+        type=int,
+        default=DEFAULT_CONTEXT_BUDGET,
+        metavar="TOKENS",
+        help="Token budget for documents pulled into query files with {{include ...}}; "
+             f"least relevant passages are cut beyond it, 0 for no limit (default: {DEFAULT_CONTEXT_BUDGET})"
+    )
+    parser.add_argument(
+        "--reuse-sources",
+        type=int,
+        nargs="?",
+        const=DEFAULT_SEED_SOURCES,
+        metavar="N",
+        help="Add up to N sources cited by past sessions that match the query (with what they were cited for) "
+             f"to the prompt, so searches go to new ground (default N: {DEFAULT_SEED_SOURCES})"
+    )
+
+
+def fail(message):
+    """Print a plain-text error and exit, without loading the rich UI."""
+    print(f"Error: {message}", file=sys.stderr)
+    sys.exit(1)
+
+
+def build_tools(args):
+    """Build the tools list for a research request from parsed arguments."""
+    tools = []
+    if not args.no_web_search:
+        tools.append({"type": "web_search_preview"})
+    if args.code_interpreter:
+        tools.append({"type": "code_interpreter", "container": {"type": "auto"}})
+    return tools
+
+
+def build_request_params(args, query, tools):
+    """Build request parameters - always use background and streaming for better UX."""
+    return {
+        "model": args.model,
+        "input": query,
+        "background": True,  # Always use background mode with streaming
+        "tools": tools,
+        "max_tool_calls": args.max_tool_calls,
+    }
+
+
+def seed_known_sources(console, query, args):
+    """Request input for a query: under --reuse-sources, followed by relevant sources from past sessions.
+
+    Returns the input and the URLs of the sources added.
+    """
+    if not args.reuse_sources:
+        return query, []
+    from src.sources import seed_query
+
+    try:
+        text, sources = seed_query(args.output_dir, query, args.reuse_sources)
+    except Exception as e:
+        console.print(f"[yellow]Warning: Could not look up known sources: {e}[/yellow]")
+        return query, []
+    if sources:
+        console.print(f"[green]✓[/green] Added {len(sources)} sources from past sessions to the prompt")
+    return text, [source["url"] for source in sources]
+
+
+def read_query_file(path, args):
+    """Read a query file with its {{include ...}} directives packed; returns a PackedQuery."""
+    from src.context import read_query_file as read_packed
+
+    return read_packed(path, args.output_dir, args.context_budget)
+
+
+def batch_main(argv):
+    """Run several research queries concurrently."""
+    parser = argparse.ArgumentParser(
+        prog="deep_research.py batch",
+        description="Run a directory or manifest of query files concurrently"
+    )
+    parser.add_argument(
+        "sources",
+        nargs="+",
+        help="Query .md files, directories of .md files, or manifest files listing query paths"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=3,
+        help="Maximum number of research requests in flight (default: 3)"
+    )
+    add_research_options(parser)
+    args = parser.parse_args(argv)
+    # Batch sessions are always saved and run in background mode
+    args.no_background = False
+    args.no_save = False
+
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        fail("OPENAI_API_KEY environment variable not set")
+
+    if args.concurrency < 1:
+        fail("--concurrency must be at least 1")
+
+    tools = build_tools(args)
+    if not tools:
+        fail("At least one tool must be enabled")
+
+    import asyncio
+    from rich.console import Console
+
+    from src.batch import BatchJob, collect_query_files, render_batch_summary, run_batch
+    from src.cache import find_cached_session
+
+    try:
+        query_files = collect_query_files(args.sources)
+    except (OSError, ValueError) as e:
+        fail(e)
+
+    console = Console()
+
+    conn = None
+    if not args.no_cache and Path(args.output_dir).is_dir():
+        conn = open_session_catalog(args.output_dir, console)
+    tool_types = [tool["type"] for tool in tools]
+
+    jobs = []
+    for path in query_files:
+        try:
+            packed = read_query_file(path, args)
+        except (OSError, ValueError) as e:
+            fail(f"{path}: {e}")
+        query = packed.text
+        if not query:
+            console.print(f"[yellow]Skipping empty query file: {path}[/yellow]")
+            continue
+        hit = find_cached_session(conn, query, args.model, tool_types, args.cache_ttl) if conn else None
+        if hit:
+            console.print(f"[green]✓[/green] Reusing completed session for {path.name}: {hit['folder']}")
+            continue
+        request_input, seeded = seed_known_sources(console, query, args)
+        job = BatchJob(path, query, build_request_params(args, request_input, tools))
+        if packed.documents:
+            job.extra["context"] = packed.summary()
+        if seeded:
+            job.extra["seeded_sources"] = seeded
+        jobs.append(job)
+
+    if not jobs:
+        if conn:
+            console.print("[green]Nothing to run[/green]")
+            return
+        console.print("[red]Error: No queries found[/red]")
+        sys.exit(1)
+
+    console.print(
+        f"\n[bold cyan]Starting {len(jobs)} research queries with {args.model} "
+        f"(concurrency: {args.concurrency})[/bold cyan]\n"
+    )
+
+    try:
+        asyncio.run(run_batch(jobs, args, api_key, console))
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Batch interrupted by user[/yellow]")
+        sys.exit(1)
+
+    console.print(render_batch_summary(jobs))
+    if args.metrics_file:
+        from src.metrics import export_metrics
+        export_metrics(args.metrics_file, [
+            (job.metrics.to_dict(), {"session": job.folder.name, "model": args.model})
+            for job in jobs if job.folder
+        ])
+    if any(job.tracker.status != "completed" for job in jobs):
+        sys.exit(1)
+
+
+def print_partial_output(console, research_folder):
+    """Point at the report text streamed to disk before a run ended early."""
+    from src.output import output_path
+
+    if research_folder and output_path(research_folder).exists() and output_path(research_folder).stat().st_size:
+        console.print(f"[yellow]Partial report saved to:[/yellow] {output_path(research_folder)}")
+
+
+def duration_arg(value):
+    """argparse type for --deadline."""
+    try:
+        return parse_duration(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def add_budget_options(parser):
+    """Add the wall-clock and cost limits for a single research run."""
+    parser.add_argument(
+        "--deadline",
+        type=duration_arg,
+        metavar="DURATION",
+        help="Cancel the research when it runs longer than this (e.g. 90s, 30m, 1.5h; "
+             "bare numbers are minutes) and save the partial report"
+    )
+    parser.add_argument(
+        "--max-cost",
+        type=float,
+        metavar="USD",
+        help="Cancel the research when its estimated cost reaches this many dollars and save the partial report"
+    )
+
+
+def make_budget(tracker, limits, query):
+    """Create a budget controller from stored limits, or None if no limit is set."""
+    if not limits or (limits.get("deadline") is None and limits.get("max_cost") is None):
+        return None
+    from src.budget import BudgetController
+    return BudgetController(tracker, limits.get("deadline"), limits.get("max_cost"), len(query))
+
+
+def save_partial_research(console, response, research_folder, query, args, query_source, budget, tool_usage=None):
+    """Save a run stopped by its budget, with the report text streamed so far."""
+    from src.catalog import save_research_session
+    from src.output import output_path
+
+    path = output_path(research_folder)
+    partial_text = path.read_text() if path.exists() else ""
+    input_file, output_file, metadata_file = save_research_session(
+        research_folder, query, response, args, query_source,
+        output_text=partial_text, extra={"partial": True, "budget": budget.summary()}, tool_usage=tool_usage
+    )
+    console.print(f"[green]Partial output saved to:[/green] {output_file} ({len(partial_text):,} chars)")
+    console.print(f"[green]Metadata saved to:[/green]       {metadata_file}")
+
+
+def report_research(console, response, research_folder, query, args, query_source, state=None, budget=None,
+                    extra=None, tool_usage=None):
+    """Print the research results and save the session, exiting on failure.
+
+    ``extra`` is added to the saved session's metadata. ``tool_usage`` is
+    the tracker's count from the stream (see ``ResearchTracker.tool_usage``);
+    without it the response output is counted, once.
+    """
+    from src.catalog import save_research_session
+    from src.events import response_tool_usage
+    from src.resume import PENDING_STATUSES
+
+    if tool_usage is None and response and getattr(response, "output", None):
+        tool_usage = response_tool_usage(response)
+
+    # Output results
+    if response and response.status == "completed":
+        console.print("\n[bold green]" + "=" * 80 + "[/bold green]")
+        console.print("[bold green]RESEARCH RESULTS[/bold green]")
+        console.print("[bold green]" + "=" * 80 + "[/bold green]\n")
+        console.print(response.output_text)
+        console.print()
+
+        # Show tool usage summary
+        if tool_usage:
+            console.print("[bold cyan]" + "=" * 80 + "[/bold cyan]")
+            console.print("[bold cyan]TOOL USAGE SUMMARY[/bold cyan]")
+            console.print("[bold cyan]" + "=" * 80 + "[/bold cyan]")
+            if tool_usage["web_searches"]:
+                console.print(f"[green]Web searches:[/green] {tool_usage['web_searches']}")
+            if tool_usage["code_interpreter_calls"]:
+                console.print(f"[green]Code interpreter calls:[/green] {tool_usage['code_interpreter_calls']}")
+
+        # Save research session
+        if research_folder:
+            console.print()
+            console.print("[bold cyan]" + "=" * 80 + "[/bold cyan]")
+            console.print("[bold cyan]SAVING RESEARCH SESSION[/bold cyan]")
+            console.print("[bold cyan]" + "=" * 80 + "[/bold cyan]")
+            extra = dict(extra or {})
+            if budget:
+                extra["budget"] = budget.summary()
+            input_file, output_file, metadata_file = save_research_session(
+                research_folder, query, response, args, query_source, extra=extra, tool_usage=tool_usage
+            )
+            console.print(f"[green]Input saved to:[/green]    {input_file}")
+            console.print(f"[green]Output saved to:[/green]   {output_file}")
+            console.print(f"[green]Metadata saved to:[/green] {metadata_file}")
+        if state:
+            state.mark("completed")
+    elif response and response.status == "cancelled":
+        if state:
+            state.mark("cancelled")
+        if budget and budget.exceeded:
+            console.print(f"\n[yellow]Research stopped: {budget.exceeded}[/yellow]")
+            if research_folder:
+                save_partial_research(
+                    console, response, research_folder, query, args, query_source, budget, tool_usage
+                )
+        else:
+            console.print(f"\n[yellow]Research was cancelled.[/yellow]")
+            print_partial_output(console, research_folder)
+        sys.exit(0)
+    elif response and response.status in PENDING_STATUSES and state:
+        console.print(f"\n[yellow]Research is still {response.status}. Resume with: deep_research.py --resume {research_folder}[/yellow]")
+        sys.exit(1)
+    else:
+        status = response.status if response else "unknown"
+        if state and response:
+            state.mark(status)
+        console.print(f"[red]Error: Research failed with status: {status}[/red]")
+        print_partial_output(console, research_folder)
+        sys.exit(1)
+
+
+def decompose_research(console, client, api_key, query, query_source, args, tools):
+    """Research a broad query as parallel sub-queries merged into one session.
+
+    Returns False, having run nothing, if the query could not be split.
+    """
+    import asyncio
+
+    from src.batch import BatchJob, render_batch_summary, run_batch
+    from src.decompose import SPLIT_MODEL, SUBQUERY_MODEL, SYNTHESIS_MODEL, split_query, synthesize
+    from src.output import output_path
+    from src.store import SessionStore
+    from src.utils import resolve_folder_name
+
+    with console.status(f"[cyan]Splitting the query into sub-questions with {SPLIT_MODEL}...[/cyan]"):
+        sub_questions = split_query(client, query, args.max_subqueries)
+    if len(sub_questions) < 2:
+        console.print("[yellow]The query could not be split usefully; running it as one research request[/yellow]")
+        return False
+
+    research_folder = SessionStore(args.output_dir).allocate(
+        resolve_folder_name(client, query, args.output_dir, args.llm_folder_name)
+    )
+    console.print(f"[green]✓[/green] Research will be saved to: [bold]{research_folder}[/bold]")
+    console.print(f"\n[bold cyan]Researching {len(sub_questions)} sub-questions in parallel with {SUBQUERY_MODEL}[/bold cyan]")
+    for index, question in enumerate(sub_questions, 1):
+        console.print(f"[dim]{index}. {question[:150]}{'...' if len(question) > 150 else ''}[/dim]")
+    console.print()
+
+    # Sub-questions are saved as ordinary sessions, so they are cataloged and cached too
+    sub_args = argparse.Namespace(**vars(args))
+    sub_args.model = SUBQUERY_MODEL
+    sub_args.concurrency = len(sub_questions)
+    jobs = [
+        BatchJob(
+            None, question, build_request_params(sub_args, question, tools),
+            query_source=f"decompose:{research_folder.name}", name=f"{index}. {question}"
+        )
+        for index, question in enumerate(sub_questions, 1)
+    ]
+    asyncio.run(run_batch(jobs, sub_args, api_key, console))
+    console.print(render_batch_summary(jobs))
+
+    completed = [job for job in jobs if job.tracker.status == "completed"]
+    if not completed:
+        console.print("[red]Error: No sub-question finished; nothing to merge[/red]")
+        sys.exit(1)
+
+    parts = [(job.query, output_path(job.folder).read_text()) for job in completed]
+    with console.status(f"[cyan]Merging {len(parts)} sub-reports with {SYNTHESIS_MODEL}...[/cyan]"):
+        response = synthesize(client, query, parts)
+
+    provenance = {
+        "split_model": SPLIT_MODEL,
+        "subquery_model": SUBQUERY_MODEL,
+        "synthesis_model": SYNTHESIS_MODEL,
+        "sub_sessions": [
+            {
+                "question": job.query,
+                "folder": str(job.folder) if job.folder else None,
+                "status": job.tracker.status,
+                "tool_calls": job.tracker.tool_calls,
+                "elapsed_seconds": job.tracker.get_elapsed_seconds(),
+                "error": job.error,
+            }
+            for job in jobs
+        ],
+    }
+    # The merged report is the synthesis model's answer, not a deep research
+    # run, so it must not be cached as one for the sub-query model
+    parent_args = argparse.Namespace(**vars(args))
+    parent_args.model = SYNTHESIS_MODEL
+    report_research(
+        console, response, research_folder, query, parent_args, query_source, extra={"decomposition": provenance}
+    )
+    return True
+
+
+def print_cached_result(console, row, output_text):
+    """Print a reused session's results instead of running new research."""
+    console.print("\n[bold green]" + "=" * 80 + "[/bold green]")
+    console.print("[bold green]RESEARCH RESULTS (CACHED)[/bold green]")
+    console.print("[bold green]" + "=" * 80 + "[/bold green]\n")
+    console.print(output_text or "")
+    console.print()
+    console.print(f"[green]Reused session:[/green] {row['folder']}")
+
+
+def check_result_cache(console, query, args, tools):
+    """Look for completed sessions matching this request before paying for it.
+
+    An exact match (same normalized query, model and tools) is reused right
+    away. Near-duplicates are reported and, on a terminal, offered for reuse.
+    Returns True if a previous session was reused.
+    """
+    if args.no_cache or not Path(args.output_dir).is_dir():
+        return False
+
+    import sqlite3
+    from rich.prompt import Prompt
+
+    from src.cache import find_cached_session, find_similar_sessions, get_session_output
+
+    try:
+        conn = open_session_catalog(args.output_dir, console)
+        tool_types = [tool["type"] for tool in tools]
+        hit = find_cached_session(conn, query, args.model, tool_types, args.cache_ttl)
+        if hit:
+            console.print(
+                f"[green]✓[/green] Identical research completed {hit['timestamp'][:16].replace('T', ' ')} "
+                f"[dim](use --no-cache to run it again)[/dim]"
+            )
+            print_cached_result(console, hit, hit["output_text"])
+            return True
+        similar = find_similar_sessions(conn, query, args.similarity_threshold, ttl_days=args.cache_ttl)
+    except sqlite3.Error as e:
+        console.print(f"[yellow]Warning: session catalog unavailable ({e}); skipping cache check[/yellow]")
+        return False
+
+    if not similar:
+        return False
+
+    console.print("[yellow]Similar research already exists:[/yellow]")
+    for number, (row, score) in enumerate(similar, 1):
+        console.print(
+            f"  {number}. [bold]{row['name']}[/bold] [dim]({score:.0%} similar, "
+            f"{(row['timestamp'] or '')[:10]}, {row['model'] or 'unknown model'})[/dim]"
+        )
+
+    if not sys.stdin.isatty():
+        return False
+    try:
+        choice = Prompt.ask(
+            "Reuse one of these instead? Enter its number, or press Enter to run new research",
+            choices=[""] + [str(n) for n in range(1, len(similar) + 1)],
+            default="",
+            show_choices=False,
+        )
+    except EOFError:
+        return False
+    if not choice:
+        return False
+
+    row, _ = similar[int(choice) - 1]
+    print_cached_result(console, row, get_session_output(conn, row["folder"]))
+    return True
+
+
+def args_from_request(request):
+    """Rebuild the option namespace used for saving from stored request params."""
+    tool_types = {tool["type"] for tool in request.get("tools", [])}
+    return argparse.Namespace(
+        model=request["model"],
+        max_tool_calls=request["max_tool_calls"],
+        no_web_search="web_search_preview" not in tool_types,
+        code_interpreter="code_interpreter" in tool_types,
+        no_background=not request.get("background", True),
+    )
+
+
+def resume_main(client, console, folder, progress_mode):
+    """Reattach to an interrupted research session and finish saving it."""
+    from src.journal import EventJournal, JOURNAL_FILENAME
+    from src.eta import load_predictor
+    from src.metrics import RunMetrics
+    from src.output import OutputWriter, output_path
+    from src.progress import make_progress
+    from src.resume import PENDING_STATUSES, SessionState, poll_response, restore_tracker
+    from src.streaming import ResearchTracker, resume_research
+
+    research_folder = Path(folder)
+    try:
+        state = SessionState.load(research_folder)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error: Cannot load session state from {research_folder}: {e}[/red]")
+        sys.exit(1)
+
+    if not state.response_id:
+        console.print("[red]Error: No response_id was recorded; the research request never started[/red]")
+        sys.exit(1)
+    if state.data.get("status") == "completed":
+        console.print(f"[green]✓[/green] Session already completed and saved in [bold]{research_folder}[/bold]")
+        return
+
+    request = state.request
+    args = args_from_request(request)
+    tracker = ResearchTracker(args.max_tool_calls, args.model)
+    output = OutputWriter(output_path(research_folder))
+    starting_after = restore_tracker(tracker, research_folder, state, output)
+    # Attached after the replay, whose tool calls all arrive at once
+    tracker.predictor = load_predictor(research_folder.parent, request)
+    # Limits count from the original start, which restore_tracker brought back
+    budget = make_budget(tracker, state.data.get("budget"), request["input"])
+    metrics = RunMetrics()
+
+    console.print(f"\n[bold cyan]Resuming research {state.response_id} with {args.model}[/bold cyan]")
+    console.print(f"[dim]Restored {tracker.tool_calls} tool calls; continuing after event {starting_after}[/dim]\n")
+
+    try:
+        journal = EventJournal(research_folder / JOURNAL_FILENAME)
+        try:
+            progress = make_progress(progress_mode, tracker, console)
+            response, _ = resume_research(
+                client, tracker, journal, state, starting_after, progress, output, budget, metrics
+            )
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            console.print(f"[yellow]Could not reattach to the stream ({e}); polling instead[/yellow]")
+            response = None
+
+        if response is None or response.status in PENDING_STATUSES:
+            response = poll_response(client, state.response_id, console)
+
+        # The request input may carry seeded sources; save the session under the query itself
+        # (states written before the query was recorded only have the input)
+        query = state.data.get("query") or request["input"]
+        report_research(
+            console, response, research_folder, query, args, state.data["query_source"], state, budget,
+            extra={"metrics": metrics.to_dict()}, tool_usage=tracker.tool_usage()
+        )
+
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Research interrupted by user[/yellow]")
+        sys.exit(1)
+    except Exception as e:
+        console.print(f"[red]Error: {e}[/red]")
+        console.print(f"[yellow]Resume with: deep_research.py --resume {research_folder}[/yellow]")
+        sys.exit(1)
+
+
+def open_session_catalog(output_dir, console=None):
+    """Open the catalog, backfilling existing sessions when it is new or was reset.
+
+    Progress goes to ``console`` if given, otherwise as plain text to stderr.
+    """
+    from src.catalog import backfill_catalog, open_catalog
+
+    conn, needs_backfill = open_catalog(output_dir)
+    if needs_backfill:
+        if console:
+            with console.status("[cyan]Indexing existing research sessions...[/cyan]"):
+                indexed = backfill_catalog(conn, output_dir)
+            console.print(f"[green]✓[/green] Indexed {indexed} existing sessions")
+        else:
+            indexed = backfill_catalog(conn, output_dir)
+            print(f"Indexed {indexed} existing sessions", file=sys.stderr)
+    return conn
+
+
+def rich_console():
+    """Return a rich Console when writing to a terminal, or None for plain-text output."""
+    if not sys.stdout.isatty():
+        return None
+    from rich.console import Console
+    return Console()
+
+
+def add_catalog_options(parser):
+    """Add options shared by the catalog commands."""
+    add_output_dir_option(parser)
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        help="Maximum number of sessions to show (default: 20)"
+    )
+
+
+def search_main(argv):
+    """Full-text search over saved research sessions."""
+    parser = argparse.ArgumentParser(
+        prog="deep_research.py search",
+        description="Search saved research sessions by query, output and metadata text"
+    )
+    parser.add_argument("text", nargs="+", help="Words to search for")
+    add_catalog_options(parser)
+    args = parser.parse_args(argv)
+
+    from src.catalog import MATCH_END, MATCH_START, search_sessions
+
+    console = rich_console()
+    conn = open_session_catalog(args.output_dir, console)
+    rows = search_sessions(conn, " ".join(args.text), args.limit)
+    if not rows:
+        print("No matching sessions", file=sys.stderr)
+        return
+
+    for row in rows:
+        snippet = " ".join(row["snippet"].split())
+        header = f"{(row['timestamp'] or '')[:16]}  {row['model'] or ''}"
+        if console:
+            from rich.markup import escape
+            snippet = escape(snippet).replace(MATCH_START, "[bold yellow]").replace(MATCH_END, "[/bold yellow]")
+            console.print(f"[bold cyan]{row['name']}[/bold cyan] [dim]{header}[/dim]")
+            console.print(f"  {snippet}")
+            console.print(f"  [dim]{row['folder']}[/dim]\n")
+        else:
+            print(f"{row['name']}  {header}")
+            print(f"  {snippet.replace(MATCH_START, '').replace(MATCH_END, '')}")
+            print(f"  {row['folder']}\n")
+
+
+def list_main(argv):
+    """List saved research sessions, newest first."""
+    parser = argparse.ArgumentParser(
+        prog="deep_research.py list",
+        description="List saved research sessions, newest first"
+    )
+    parser.add_argument("--model", help="Only show sessions run with this model")
+    add_catalog_options(parser)
+    args = parser.parse_args(argv)
+
+    from src.catalog import list_sessions
+
+    console = rich_console()
+    conn = open_session_catalog(args.output_dir, console)
+    rows = list_sessions(conn, args.limit, args.model)
+    if not rows:
+        print("No sessions cataloged", file=sys.stderr)
+        return
+
+    columns = ["Session", "Date", "Model", "Searches", "Output"]
+    table_rows = [
+        [
+            row["name"],
+            (row["timestamp"] or "")[:16].replace("T", " "),
+            row["model"] or "-",
+            "-" if row["web_searches"] is None else str(row["web_searches"]),
+            f"{row['output_chars'] / 1000:.1f} KB",
+        ]
+        for row in rows
+    ]
+
+    if not console:
+        print("\t".join(columns))
+        for table_row in table_rows:
+            print("\t".join(table_row))
+        return
+
+    from rich.table import Table
+    table = Table(title="Research Sessions")
+    table.add_column("Session", style="cyan")
+    table.add_column("Date")
+    table.add_column("Model")
+    table.add_column("Searches", justify="right")
+    table.add_column("Output", justify="right")
+    for table_row in table_rows:
+        table.add_row(*table_row)
+    console.print(table)
+
+
+def index_main(argv):
+    """Bring the session catalog up to date with the sessions on disk."""
+    parser = argparse.ArgumentParser(
+        prog="deep_research.py index",
+        description="Index new or changed research sessions into the catalog"
+    )
+    add_output_dir_option(parser)
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Drop the index and re-read every session"
+    )
+    args = parser.parse_args(argv)
+
+    from src.catalog import backfill_catalog, open_catalog
+
+    conn, _ = open_catalog(args.output_dir)
+    indexed = backfill_catalog(conn, args.output_dir, rebuild=args.rebuild)
+    print(f"Indexed {indexed} sessions")
+
+
+def pack_main(argv):
+    """Pack session folders into a single archive."""
+    parser = argparse.ArgumentParser(
+        prog="deep_research.py pack",
+        description="Write research sessions into one compressed archive with an index for random access"
+    )
+    parser.add_argument("sessions", nargs="*", help="Session folders or names to pack (default: all)")
+    add_output_dir_option(parser)
+    parser.add_argument("--archive", help="Archive to write or update (default: OUTPUT_DIR/sessions.drpack)")
+    parser.add_argument(
+        "--remove",
+        action="store_true",
+        help="Delete each session folder once the archive has been written and verified"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Replace archived sessions even when a folder of the same name holds a different session"
+    )
+    args = parser.parse_args(argv)
+
+    import shutil
+
+    from src.archive import DEFAULT_ARCHIVE_NAME, SessionArchive, pack_sessions
+    from src.catalog import backfill_catalog, open_catalog
+    from src.store import SessionStore
+
+    output_dir = Path(args.output_dir)
+    archive_path = Path(args.archive) if args.archive else output_dir / DEFAULT_ARCHIVE_NAME
+    if args.sessions:
+        folders = [Path(s) if Path(s).is_dir() else output_dir / s for s in args.sessions]
+        missing = [str(folder) for folder in folders if not folder.is_dir()]
+        if missing:
+            fail(f"Session folders not found: {', '.join(missing)}")
+    else:
+        folders = sorted(p for p in output_dir.iterdir() if p.is_dir()) if output_dir.is_dir() else []
+    # Only folders with a saved query or report are sessions
+    folders = [f for f in folders if any(f.glob("*_input.md")) or any(f.glob("*_output.md"))]
+    if not folders:
+        fail("No research sessions to pack")
+
+    names = [folder.name for folder in folders]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        fail(f"Several sessions are named {', '.join(duplicates)}")
+
+    try:
+        packed = pack_sessions(archive_path, folders, replace=args.force)
+    except ValueError as e:
+        fail(f"{e} (pass --force to replace them)")
+    size = archive_path.stat().st_size
+    print(f"Packed {packed} sessions into {archive_path} ({size / 1000:,.0f} KB)")
+
+    in_output_dir = archive_path.parent.resolve() == output_dir.resolve()
+    if in_output_dir:
+        # Before any folder is removed, so new sessions can never take an archived name
+        SessionStore(output_dir).record_archived(names)
+
+    if args.remove:
+        with SessionArchive(archive_path) as archive:
+            for folder in folders:
+                # Read every member back (checking its CRC) before deleting the originals
+                for name in archive.files(folder.name):
+                    archive.read(folder.name, name)
+                shutil.rmtree(folder)
+        print(f"Removed {len(folders)} session folders")
+
+    if in_output_dir:
+        conn, _ = open_catalog(output_dir)
+        backfill_catalog(conn, output_dir)
+
+
+def unpack_main(argv):
+    """Extract sessions from an archive back into session folders."""
+    parser = argparse.ArgumentParser(
+        prog="deep_research.py unpack",
+        description="Extract research sessions from an archive into session folders"
+    )
+    parser.add_argument("sessions", nargs="*", help="Session names to extract (default: all)")
+    add_output_dir_option(parser, "Directory to extract session folders into")
+    parser.add_argument("--archive", help="Archive to read (default: OUTPUT_DIR/sessions.drpack)")
+    parser.add_argument("--force", action="store_true", help="Overwrite session folders that already exist")
+    parser.add_argument("--list", action="store_true", help="List the archived sessions instead of extracting")
+    args = parser.parse_args(argv)
+
+    from src.archive import DEFAULT_ARCHIVE_NAME, SessionArchive, unpack_sessions
+    from src.catalog import backfill_catalog, open_catalog
+
+    output_dir = Path(args.output_dir)
+    archive_path = Path(args.archive) if args.archive else output_dir / DEFAULT_ARCHIVE_NAME
+    if not archive_path.is_file():
+        fail(f"Archive not found: {archive_path}")
+
+    try:
+        if args.list:
+            with SessionArchive(archive_path) as archive:
+                for session in archive.sessions():
+                    files = archive.index[session]["files"]
+                    size = sum(entry[2] for entry in files.values())
+                    print(f"{session}\t{len(files)} files\t{size / 1000:.1f} KB")
+            return
+        extracted = unpack_sessions(archive_path, output_dir, args.sessions or None, args.force)
+    except ValueError as e:
+        fail(str(e))
+
+    print(f"Extracted {len(extracted)} sessions into {output_dir}")
+    conn, _ = open_catalog(output_dir)
+    backfill_catalog(conn, output_dir)
+
+
+def stats_main(argv):
+    """Aggregate recorded run metrics across saved sessions, per model."""
+    parser = argparse.ArgumentParser(
+        prog="deep_research.py stats",
+        description="Show where time and spend go per model, from the metrics recorded with each session"
+    )
+    parser.add_argument("--model", help="Only include sessions run with this model")
+    parser.add_argument("--json", action="store_true", help="Print the aggregates as JSON")
+    add_output_dir_option(parser)
+    args = parser.parse_args(argv)
+
+    from src.catalog import session_metrics
+    from src.metrics import aggregate_metrics
+    from src.utils import format_duration
+
+    console = rich_console()
+    conn = open_session_catalog(args.output_dir, console)
+    summary = aggregate_metrics(session_metrics(conn, args.model))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    if not summary:
+        print("No sessions with recorded metrics", file=sys.stderr)
+        return
+
+    def seconds(value):
+        return "-" if value is None else format_duration(value) if value >= 60 else f"{value:.1f}s"
+
+    def number(value, spec=",.0f"):
+        return "-" if value is None else format(value, spec)
+
+    columns = [
+        "Model", "Sessions", "Time p50", "Time p90", "First event", "Events/s", "Tool calls",
+        "Call latency", "Tokens in", "Tokens out", "Cost", "Naming", "UI",
+    ]
+    table_rows = [
+        [
+            model,
+            str(row["sessions"]),
+            seconds(row["duration_p50"]),
+            seconds(row["duration_p90"]),
+            seconds(row["first_event_p50"]),
+            number(row["events_per_second"], ",.1f"),
+            number(row["tool_calls_p50"]),
+            seconds(row["tool_call_latency_mean"]),
+            number(row["input_tokens_mean"]),
+            number(row["output_tokens_mean"]),
+            "-" if row["cost_total"] is None else f"${row['cost_total']:.2f}",
+            seconds(row["folder_naming_mean"]),
+            "-" if row["ui_share"] is None else f"{row['ui_share'] * 100:.2f}%",
+        ]
+        for model, row in summary.items()
+    ]
+
+    if not console:
+        print("\t".join(columns))
+        for table_row in table_rows:
+            print("\t".join(table_row))
+        return
+
+    from rich.table import Table
+    table = Table(title="Research Run Metrics (p50/p90 over sessions, token and naming figures are means)")
+    for column in columns:
+        table.add_column(column, style="cyan" if column == "Model" else None, justify="left" if column == "Model" else "right")
+    for table_row in table_rows:
+        table.add_row(*table_row)
+    console.print(table)
+
+
+def submit_main(argv):
+    """Start background research requests and exit without waiting for them."""
+    parser = argparse.ArgumentParser(
+        prog="deep_research.py submit",
+        description="Start background research and return immediately; "
+                    "save results later with 'worker' or 'collect'"
+    )
+    parser.add_argument("query", nargs="?", help="Research query to investigate")
+    parser.add_argument(
+        "--input-file",
+        nargs="+",
+        default=[],
+        help="Query .md files, directories of .md files, or manifest files listing query paths"
+    )
+    add_research_options(parser)
+    args = parser.parse_args(argv)
+    args.no_background = False
+
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        fail("OPENAI_API_KEY environment variable not set")
+
+    tools = build_tools(args)
+    if not tools:
+        fail("At least one tool must be enabled")
+
+    from src.batch import collect_query_files
+
+    queries = []
+    if args.query:
+        queries.append((args.query.strip(), "cli"))
+    try:
+        for path in collect_query_files(args.input_file):
+            queries.append((read_query_file(path, args).text, f"file:{path}"))
+    except (OSError, ValueError) as e:
+        fail(e)
+    queries = [(query, source) for query, source in queries if query]
+    if not queries:
+        fail("No query provided. Use a query argument or --input-file")
+
+    from openai import OpenAI
+    from rich.console import Console
+
+    from src.cache import find_cached_session
+    from src.jobs import SUBMITTING_STATUS, add_job, open_jobs, update_job
+    from src.ratelimit import limit_client
+    from src.resume import PENDING_STATUSES, SessionState, STATE_FILENAME
+    from src.store import SessionStore
+    from src.utils import resolve_folder_name
+
+    console = Console()
+    client = limit_client(
+        OpenAI(api_key=api_key, timeout=3600), api_key,
+        notify=lambda message: console.print(f"[yellow]{message}[/yellow]")
+    )
+    catalog = None
+    if not args.no_cache and Path(args.output_dir).is_dir():
+        catalog = open_session_catalog(args.output_dir, console)
+    tool_types = [tool["type"] for tool in tools]
+    conn = open_jobs(args.output_dir)
+    store = SessionStore(args.output_dir)
+
+    failed = 0
+    for query, query_source in queries:
+        label = query_source[5:] if query_source.startswith("file:") else query[:60]
+        hit = find_cached_session(catalog, query, args.model, tool_types, args.cache_ttl) if catalog else None
+        if hit:
+            console.print(f"[green]✓[/green] Reusing completed session for {label}: {hit['folder']}")
+            continue
+
+        request_params = build_request_params(args, seed_known_sources(console, query, args)[0], tools)
+        # The folder and job row exist before the paid response does, so a
+        # response can never be left running with nothing to collect it
+        folder = store.allocate(resolve_folder_name(client, query, args.output_dir, args.llm_folder_name))
+        state = SessionState.create(request_params, query_source, folder / STATE_FILENAME, query)
+        job_id = add_job(conn, query, query_source, request_params, None, folder, SUBMITTING_STATUS)
+        try:
+            response = client.responses.create(**request_params)
+        except Exception as e:
+            state.mark("failed")
+            update_job(conn, job_id, status="failed", error=f"Error submitting: {e}", finished_at=time.time())
+            console.print(f"[red]Error submitting {label}: {e}[/red]")
+            failed += 1
+            continue
+
+        # A response that already finished is still left for the worker to save
+        status = response.status if response.status in PENDING_STATUSES else "submitted"
+        # Record the response_id in the session folder too, so --resume works on submitted jobs
+        state.record_response_id(response.id)
+        state.mark(status)
+        update_job(conn, job_id, response_id=response.id, status=status)
+        console.print(f"[green]✓[/green] Job {job_id} submitted ({status}): [bold]{folder}[/bold]")
+
+    if failed:
+        sys.exit(1)
+
+
+def finish_job(console, conn, job, response):
+    """Save a finished job's session and record its final status."""
+    from src.catalog import save_research_session
+    from src.events import count_tool_calls
+    from src.jobs import update_job
+    from src.resume import SessionState
+
+    folder = Path(job["folder"])
+    if response.status == "completed":
+        try:
+            save_research_session(
+                folder, job["query"], response, args_from_request(json.loads(job["request"])), job["query_source"]
+            )
+        except Exception as e:
+            # Left pending so the next poll retries the save
+            update_job(conn, job["id"], error=f"Error saving session: {e}")
+            console.print(f"[red]Job {job['id']}: error saving session: {e}[/red]")
+            return
+        console.print(f"[green]✓[/green] Job {job['id']} completed: [bold]{folder}[/bold]")
+    else:
+        console.print(f"[yellow]Job {job['id']} ended with status: {response.status}[/yellow]")
+
+    tool_calls = sum(count_tool_calls(getattr(response, "output", None)).values())
+    update_job(
+        conn, job["id"], status=response.status, tool_calls=tool_calls, error=None, finished_at=time.time()
+    )
+    try:
+        SessionState.load(folder).mark(response.status)
+    except (OSError, ValueError):
+        pass
+
+
+def worker_main(argv, once=False):
+    """Poll every outstanding job and save each one as it finishes."""
+    command = "collect" if once else "worker"
+    parser = argparse.ArgumentParser(
+        prog=f"deep_research.py {command}",
+        description="Check outstanding jobs once and save the finished ones" if once else
+                    "Poll outstanding jobs until all have finished, saving each one as it completes"
+    )
+    add_output_dir_option(parser, "Directory holding research sessions and the job table")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=10.0,
+        help="Seconds between polls while jobs are changing (default: 10)"
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=60.0,
+        help="Longest wait between polls when nothing changes (default: 60)"
+    )
+    args = parser.parse_args(argv)
+
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        fail("OPENAI_API_KEY environment variable not set")
+
+    from openai import OpenAI
+    from rich.console import Console
+
+    from src.jobs import open_jobs, pending_jobs, record_poll
+    from src.resume import PENDING_STATUSES
+    from src.events import TOOL_CALL_TYPES
+
+    console = Console()
+    client = OpenAI(api_key=api_key, timeout=3600)
+    conn = open_jobs(args.output_dir)
+
+    # One shared polling loop for all jobs: back off while nothing changes,
+    # drop back to the base interval as soon as any job moves
+    interval = args.interval
+    try:
+        while True:
+            jobs = pending_jobs(conn)
+            if not jobs:
+                console.print("[green]No outstanding jobs[/green]")
+                return
+            changed = False
+            for job in jobs:
+                try:
+                    response = client.responses.retrieve(job["response_id"])
+                except Exception as e:
+                    console.print(f"[yellow]Job {job['id']}: poll failed ({e})[/yellow]")
+                    continue
+                if response.status in PENDING_STATUSES:
+                    changed = record_poll(conn, job, response, TOOL_CALL_TYPES) or changed
+                else:
+                    finish_job(console, conn, job, response)
+                    changed = True
+            if once:
+                remaining = len(pending_jobs(conn))
+                if remaining:
+                    console.print(f"[cyan]{remaining} jobs still running[/cyan]")
+                return
+            interval = args.interval if changed else min(interval * 1.5, args.max_interval)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Worker stopped; jobs keep running and can be collected later[/yellow]")
+        sys.exit(1)
+
+
+def collect_main(argv):
+    """Check outstanding jobs once and save the finished ones."""
+    worker_main(argv, once=True)
+
+
+def status_main(argv):
+    """Show submitted jobs from the job table, without calling the API."""
+    parser = argparse.ArgumentParser(
+        prog="deep_research.py status",
+        description="List submitted jobs and their last known progress (no API calls)"
+    )
+    parser.add_argument("--status", help="Only show jobs with this status")
+    add_catalog_options(parser)
+    args = parser.parse_args(argv)
+
+    from src.eta import load_predictor
+    from src.jobs import PENDING_JOB_STATUSES, list_jobs, open_jobs
+    from src.utils import format_duration
+
+    conn = open_jobs(args.output_dir)
+    rows = list_jobs(conn, args.limit, args.status)
+    if not rows:
+        print("No jobs submitted", file=sys.stderr)
+        return
+
+    now = time.time()
+
+    def eta(row):
+        # Predicted from past sessions of the same model and tools, as of the last poll
+        if row["status"] not in PENDING_JOB_STATUSES:
+            return "-"
+        predictor = load_predictor(args.output_dir, json.loads(row["request"]))
+        prediction = predictor and predictor.predict(now - row["submitted_at"], row["tool_calls"])
+        if not prediction:
+            return "?"
+        low, expected, high = prediction["remaining"]
+        return f"{format_duration(expected)} ({format_duration(low)}-{format_duration(high)})"
+
+    columns = ["Job", "Status", "Age", "Tool calls", "ETA", "Last poll", "Session"]
+    table_rows = [
+        [
+            str(row["id"]),
+            row["status"] + (" (error)" if row["error"] else ""),
+            format_duration((row["finished_at"] or now) - row["submitted_at"]),
+            str(row["tool_calls"]),
+            eta(row),
+            f"{format_duration(now - row['polled_at'])} ago" if row["polled_at"] else "-",
+            Path(row["folder"]).name,
+        ]
+        for row in rows
+    ]
+
+    console = rich_console()
+    if not console:
+        print("\t".join(columns))
+        for table_row in table_rows:
+            print("\t".join(table_row))
+        return
+
+    from rich.table import Table
+    table = Table(title="Research Jobs")
+    table.add_column("Job", justify="right")
+    table.add_column("Status")
+    table.add_column("Age", justify="right")
+    table.add_column("Tool calls", justify="right")
+    table.add_column("ETA", justify="right")
+    table.add_column("Last poll", justify="right")
+    table.add_column("Session", style="cyan")
+    for table_row in table_rows:
+        table.add_row(*table_row)
+    console.print(table)
+
+
+COMMANDS = {
+    "batch": batch_main,
+    "search": search_main,
+    "list": list_main,
+    "index": index_main,
+    "stats": stats_main,
+    "pack": pack_main,
+    "unpack": unpack_main,
+    "submit": submit_main,
+    "worker": worker_main,
+    "collect": collect_main,
+    "status": status_main,
+}
+
+
+def main():
+    # Subcommands are dispatched before the default research parser so a
+    # plain query can still be passed as the first positional argument
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        return COMMANDS[sys.argv[1]](sys.argv[2:])
+
+    parser = argparse.ArgumentParser(
+        description="Conduct deep research using OpenAI's deep research models",
+        epilog=f"Commands: {', '.join(COMMANDS)} (run '<command> --help' for details)"
+    )
+    parser.add_argument(
+        "query",
+        nargs="?",
+        help="Research query to investigate"
+    )
+    add_research_options(parser)
     parser.add_argument(
         "--interactive",
         action="store_true",
@@ -66,55 +1274,91 @@ def main():
         action="store_true",
         help="Read query from manual_input.md"
     )
-    parser.add_argument(
-        "--output-dir",
-        type=str,
-        default="./research_sessions",
-        help="Directory to save research sessions (default: ./research_sessions)"
-    )
     parser.add_argument(
         "--no-save",
         action="store_true",
         help="Don't save research session to disk"
     )
+    parser.add_argument(
+        "--resume",
+        metavar="FOLDER",
+        help="Reattach to an interrupted research session saved in FOLDER"
+    )
+    add_budget_options(parser)
+    parser.add_argument(
+        "--decompose",
+        action="store_true",
+        help="Split a broad query into independent sub-questions, research them in parallel "
+             "and merge the sub-reports into one session"
+    )
+    parser.add_argument(
+        "--max-subqueries",
+        type=int,
+        default=DEFAULT_MAX_SUBQUERIES,
+        metavar="N",
+        help=f"Maximum number of sub-questions for --decompose (default: {DEFAULT_MAX_SUBQUERIES})"
+    )
+    parser.add_argument(
+        "--preview",
+        action="store_true",
+        help="Also ask a fast model for a preliminary answer, shown and saved as *_preview.md "
+             "within seconds while the deep research runs"
+    )
 
     args = parser.parse_args()
 
-    console = Console()
-
     # Get API key from environment
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
-        console.print("[red]Error: OPENAI_API_KEY environment variable not set[/red]")
-        sys.exit(1)
+        fail("OPENAI_API_KEY environment variable not set")
+
+    if args.resume:
+        from openai import OpenAI
+        from rich.console import Console
+        client = OpenAI(api_key=api_key, timeout=3600)
+        return resume_main(client, Console(), args.resume, args.progress or default_progress_mode())
+
+    # Build tools list
+    tools = build_tools(args)
+    if not tools:
+        fail("At least one tool must be enabled")
+
+    if args.decompose:
+        if args.no_save:
+            fail("--decompose saves each sub-question as its own session and cannot be used with --no-save")
+        if args.deadline is not None or args.max_cost is not None:
+            fail("--deadline and --max-cost are not supported with --decompose")
+        if args.max_subqueries < 2:
+            fail("--max-subqueries must be at least 2")
 
     # Get query from various sources
     query = None
     query_source = "cli"
+    loaded_from = None
+
+    packed = None
 
     if args.manual:
         # Read from manual_input.md
         try:
-            with open("manual_input.md", "r") as f:
-                query = f.read().strip()
+            packed = read_query_file("manual_input.md", args)
+            query = packed.text
             query_source = "file:manual_input.md"
-            console.print(f"[green]✓[/green] Loaded query from manual_input.md")
+            loaded_from = "manual_input.md"
         except Exception as e:
-            console.print(f"[red]Error reading manual_input.md: {e}[/red]")
-            sys.exit(1)
+            fail(f"Cannot read manual_input.md: {e}")
     elif args.input_file:
         # Read from markdown file
         try:
-            with open(args.input_file, "r") as f:
-                query = f.read().strip()
+            packed = read_query_file(args.input_file, args)
+            query = packed.text
             query_source = f"file:{args.input_file}"
-            console.print(f"[green]✓[/green] Loaded query from {args.input_file}")
+            loaded_from = args.input_file
         except Exception as e:
-            console.print(f"[red]Error reading input file: {e}[/red]")
-            sys.exit(1)
+            fail(f"Cannot read input file: {e}")
     elif args.interactive:
         # Interactive mode
-        console.print("[cyan]Enter your research query (press Ctrl+D when done):[/cyan]")
+        print("Enter your research query (press Ctrl+D when done):", file=sys.stderr)
         query = sys.stdin.read().strip()
         query_source = "interactive"
     elif args.query:
@@ -123,98 +1367,156 @@ def main():
         query_source = "cli"
     else:
         # No query provided
-        console.print("[red]Error: No query provided. Use a query argument, --input-file, or --interactive[/red]")
-        sys.exit(1)
+        fail("No query provided. Use a query argument, --input-file, or --interactive")
 
     if not query:
-        console.print("[red]Error: Query is empty[/red]")
-        sys.exit(1)
+        fail("Query is empty")
 
-    # Initialize client
-    client = OpenAI(api_key=api_key, timeout=3600)
+    # Everything below talks to the API; load the client and UI stack now
+    from concurrent.futures import ThreadPoolExecutor
+    from openai import OpenAI
+    from rich.console import Console
+
+    from src.eta import load_predictor
+    from src.journal import EventJournal, JOURNAL_FILENAME
+    from src.metrics import RunMetrics, export_metrics
+    from src.output import OutputWriter, output_path
+    from src.progress import make_progress
+    from src.ratelimit import limit_client
+    from src.resume import SessionState, STATE_FILENAME
+    from src.store import SessionStore
+    from src.streaming import ResearchTracker, stream_research
+    from src.utils import resolve_folder_name
 
-    # Generate folder structure if saving
+    console = Console()
+    if loaded_from:
+        console.print(f"[green]✓[/green] Loaded query from {loaded_from}")
+    if packed and packed.documents:
+        summary = packed.summary()
+        duplicates = sum(doc["duplicate_passages"] for doc in summary["documents"])
+        console.print(
+            f"[green]✓[/green] Included {len(packed.documents)} documents: "
+            f"{summary['source_tokens']:,} → {packed.tokens:,} query tokens"
+            + (f", {duplicates} duplicate passages removed" if duplicates else "")
+        )
+
+    # Initialize client; requests wait for limits shared with other runs on this machine
+    client = limit_client(
+        OpenAI(api_key=api_key, timeout=3600), api_key,
+        notify=lambda message: console.print(f"[yellow]{message}[/yellow]")
+    )
+
+    metrics = RunMetrics()
+    with metrics.phase("cache_check"):
+        if check_result_cache(console, query, args, tools):
+            return
+
+    if args.decompose:
+        try:
+            if decompose_research(console, client, api_key, query, query_source, args, tools):
+                return
+        except KeyboardInterrupt:
+            console.print("\n[yellow]Research interrupted by user[/yellow]")
+            sys.exit(1)
+        except Exception as e:
+            console.print(f"[red]Error: {e}[/red]")
+            sys.exit(1)
+
+    request_input, seeded = seed_known_sources(console, query, args)
+    request_params = build_request_params(args, request_input, tools)
+
+    # Resolve the folder name in the background so the research request goes
+    # out right away; the folder is created when the first event arrives
     research_folder = None
+    journal = None
+    state = None
+    output = None
     if not args.no_save:
-        console.print("[cyan]Generating folder name...[/cyan]")
-        folder_name = generate_folder_name(client, query)
-        research_folder = create_research_folder(args.output_dir, folder_name)
-        console.print(f"[green]✓[/green] Research will be saved to: [bold]{research_folder}[/bold]")
+        def name_folder():
+            with metrics.phase("folder_naming"):
+                return resolve_folder_name(client, query, args.output_dir, args.llm_folder_name)
 
-    # Build tools list
-    tools = []
-    if not args.no_web_search:
-        tools.append({"type": "web_search_preview"})
-    if args.code_interpreter:
-        tools.append({"type": "code_interpreter", "container": {"type": "auto"}})
+        naming = ThreadPoolExecutor(max_workers=1).submit(name_folder)
+        journal = EventJournal()
+        state = SessionState.create(request_params, query_source, query=query)
+        state.data["budget"] = {"deadline": args.deadline, "max_cost": args.max_cost}
+        output = OutputWriter()
 
-    if not tools:
-        console.print("[red]Error: At least one tool must be enabled[/red]")
-        sys.exit(1)
+    preview = None
+    if args.preview:
+        from src.preview import PREVIEW_MODEL, Preview
 
-    # Build request parameters - always use background and streaming for better UX
-    request_params = {
-        "model": args.model,
-        "input": query,
-        "background": True,  # Always use background mode with streaming
-        "tools": tools,
-        "max_tool_calls": args.max_tool_calls,
-    }
+        def show_preview(preview):
+            if preview.error:
+                console.print(f"[yellow]No preliminary answer from {PREVIEW_MODEL}: {preview.error}[/yellow]")
+                return
+            console.print("\n[bold yellow]" + "=" * 80 + "[/bold yellow]")
+            console.print(f"[bold yellow]PRELIMINARY ANSWER ({PREVIEW_MODEL}, provisional - deep research still running)[/bold yellow]")
+            console.print("[bold yellow]" + "=" * 80 + "[/bold yellow]\n")
+            console.print(preview.text)
+            console.print()
+            if preview.path:
+                console.print(f"[dim]Saved to {preview.path}[/dim]\n")
+
+        preview = Preview(client, query, args.model, not args.no_web_search, on_ready=show_preview)
+
+    def create_session_folder():
+        nonlocal research_folder
+        if research_folder or args.no_save:
+            return
+        research_folder = SessionStore(args.output_dir).allocate(naming.result())
+        journal.attach(research_folder / JOURNAL_FILENAME)
+        state.attach(research_folder / STATE_FILENAME)
+        output.attach(output_path(research_folder))
+        if preview:
+            preview.attach(research_folder)
+        console.print(f"[green]✓[/green] Research will be saved to: [bold]{research_folder}[/bold]")
+        console.print(f"[dim]Report streams to {output_path(research_folder)} (follow with tail -f)[/dim]")
 
     console.print(f"\n[bold cyan]Starting research with {args.model}[/bold cyan]")
     console.print(f"[dim]Query: {query[:100]}{'...' if len(query) > 100 else ''}[/dim]\n")
 
     # Create research request with streaming
     try:
-        tracker = ResearchTracker(args.max_tool_calls, args.model)
-        response, _ = stream_research(client, request_params, tracker)
-
-        # Output results
-        if response and response.status == "completed":
-            console.print("\n[bold green]" + "=" * 80 + "[/bold green]")
-            console.print("[bold green]RESEARCH RESULTS[/bold green]")
-            console.print("[bold green]" + "=" * 80 + "[/bold green]\n")
-            console.print(response.output_text)
-            console.print()
-
-            # Show tool usage summary
-            if hasattr(response, 'output') and response.output:
-                web_searches = sum(1 for item in response.output if getattr(item, 'type', None) == 'web_search_call')
-                code_calls = sum(1 for item in response.output if getattr(item, 'type', None) == 'code_interpreter_call')
+        tracker = ResearchTracker(args.max_tool_calls, args.model, load_predictor(args.output_dir, request_params))
+        progress = make_progress(args.progress or default_progress_mode(), tracker, console)
+        budget = make_budget(tracker, {"deadline": args.deadline, "max_cost": args.max_cost}, request_input)
+        if preview:
+            preview.start()
+        response, _ = stream_research(
+            client, request_params, tracker, journal, state,
+            on_start=create_session_folder, progress=progress, output=output, budget=budget, metrics=metrics
+        )
+        # A run that died before any event or response id has nothing to save
+        if not args.no_save and (response is not None or state.response_id or journal.count):
+            create_session_folder()
 
-                console.print("[bold cyan]" + "=" * 80 + "[/bold cyan]")
-                console.print("[bold cyan]TOOL USAGE SUMMARY[/bold cyan]")
-                console.print("[bold cyan]" + "=" * 80 + "[/bold cyan]")
-                if web_searches:
-                    console.print(f"[green]Web searches:[/green] {web_searches}")
-                if code_calls:
-                    console.print(f"[green]Code interpreter calls:[/green] {code_calls}")
-
-            # Save research session
-            if research_folder:
-                console.print()
-                console.print("[bold cyan]" + "=" * 80 + "[/bold cyan]")
-                console.print("[bold cyan]SAVING RESEARCH SESSION[/bold cyan]")
-                console.print("[bold cyan]" + "=" * 80 + "[/bold cyan]")
-                input_file, output_file, metadata_file = save_research_session(
-                    research_folder, query, response, args, query_source
-                )
-                console.print(f"[green]Input saved to:[/green]    {input_file}")
-                console.print(f"[green]Output saved to:[/green]   {output_file}")
-                console.print(f"[green]Metadata saved to:[/green] {metadata_file}")
-        elif response and response.status == "cancelled":
-            console.print(f"\n[yellow]Research was cancelled. Partial results may not be available.[/yellow]")
-            sys.exit(0)
-        else:
-            status = response.status if response else "unknown"
-            console.print(f"[red]Error: Research failed with status: {status}[/red]")
-            sys.exit(1)
+        extra = {"metrics": metrics.to_dict()}
+        if packed and packed.documents:
+            extra["context"] = packed.summary()
+        if seeded:
+            extra["seeded_sources"] = seeded
+        if preview:
+            extra["preview"] = preview.finish()
+        try:
+            report_research(
+                console, response, research_folder, query, args, query_source, state, budget, extra=extra,
+                tool_usage=tracker.tool_usage()
+            )
+        finally:
+            # report_research exits for cancelled, budget-stopped and failed runs,
+            # whose metrics are exported too
+            if args.metrics_file:
+                session = research_folder.name if research_folder else getattr(response, "id", None)
+                export_metrics(args.metrics_file, [(metrics.to_dict(), {"session": session, "model": args.model})])
 
     except KeyboardInterrupt:
         console.print("\n[yellow]Research interrupted by user[/yellow]")
         sys.exit(1)
     except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
+        if state and state.response_id:
+            console.print(f"[yellow]Resume with: deep_research.py --resume {research_folder}[/yellow]")
         sys.exit(1)
 
 
@@ -0,0 +1,268 @@
+"""Single-file archives of research sessions with a footer index for random access.
+
+Layout: an 8-byte magic, then every file of every session compressed on its
+own with zlib, then the zlib-compressed JSON index, then a fixed-size
+trailer holding the index offset and length. Readers map the file and
+decompress only the index and the members they ask for.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path, PurePosixPath, PureWindowsPath
+
+
+ARCHIVE_SUFFIX = ".drpack"
+DEFAULT_ARCHIVE_NAME = f"sessions{ARCHIVE_SUFFIX}"
+
+MAGIC = b"DRPACK1\n"
+TRAILER_MAGIC = b"DRPKEND\n"
+# Index offset, index length, trailer magic
+TRAILER = struct.Struct("<QQ8s")
+
+COMPRESSION_LEVEL = 6
+
+
+def archive_key(archive_path, name):
+    """Catalog key of an archived session, standing in for its folder path."""
+    return f"{Path(archive_path).resolve()}::{name}"
+
+
+class SessionArchive:
+    """Read-only, memory-mapped view of a session archive.
+
+    The index maps session name to ``{"mtime": ..., "files": {name: [offset,
+    size, raw_size, crc32, mtime]}}``.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < len(MAGIC) + TRAILER.size:
+                raise ValueError(f"{self.path} is not a session archive")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            index_offset, index_size, trailer_magic = TRAILER.unpack(self._map[-TRAILER.size:])
+            if self._map[:len(MAGIC)] != MAGIC or trailer_magic != TRAILER_MAGIC:
+                raise ValueError(f"{self.path} is not a session archive")
+            self.index = json.loads(zlib.decompress(self._map[index_offset:index_offset + index_size]))
+        except Exception:
+            self.close()
+            raise
+
+    def sessions(self):
+        """Names of the archived sessions, sorted."""
+        return sorted(self.index)
+
+    def files(self, session):
+        """File names stored for a session."""
+        return sorted(self.index[session]["files"])
+
+    def mtime(self, session):
+        """Latest modification time of the session's files when it was packed."""
+        return self.index[session]["mtime"]
+
+    def raw(self, session, name):
+        """The compressed bytes of a member, as stored."""
+        offset, size = self.index[session]["files"][name][:2]
+        return self._map[offset:offset + size]
+
+    def read(self, session, name):
+        """Decompress one member, checking its CRC."""
+        entry = self.index[session]["files"][name]
+        data = zlib.decompress(self.raw(session, name))
+        if zlib.crc32(data) != entry[3]:
+            raise ValueError(f"{self.path}: {session}/{name} is corrupt")
+        return data
+
+    def read_text(self, session, name):
+        return self.read(session, name).decode("utf-8")
+
+    def find(self, session, suffix):
+        """The member ending in ``suffix`` (e.g. ``_output.md``), preferring ``<session><suffix>``."""
+        files = self.index[session]["files"]
+        if f"{session}{suffix}" in files:
+            return f"{session}{suffix}"
+        return next((name for name in sorted(files) if name.endswith(suffix)), None)
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def archived_sessions(directory):
+    """Names of the sessions in the archives directly under ``directory``; unreadable archives are skipped."""
+    names = set()
+    directory = Path(directory)
+    for archive_path in sorted(directory.glob(f"*{ARCHIVE_SUFFIX}")) if directory.is_dir() else []:
+        try:
+            with SessionArchive(archive_path) as archive:
+                names.update(archive.index)
+        except (OSError, ValueError):
+            continue
+    return names
+
+
+def _session_files(folder):
+    return sorted(p for p in Path(folder).rglob("*") if p.is_file())
+
+
+def _identity(metadata_text, checksums):
+    """A session's response_id, or a hash of its files for sessions saved without one."""
+    try:
+        response_id = json.loads(metadata_text).get("response_id") if metadata_text else None
+    except (ValueError, AttributeError):
+        response_id = None
+    if response_id:
+        return response_id
+    digest = hashlib.sha256(json.dumps(sorted(checksums.items())).encode("utf-8"))
+    return f"sha256:{digest.hexdigest()}"
+
+
+def folder_identity(folder):
+    """Identity of a session folder, comparable with ``archived_identity``."""
+    folder = Path(folder)
+    metadata = folder / "metadata.json"
+    checksums = {
+        file.relative_to(folder).as_posix(): zlib.crc32(file.read_bytes()) for file in _session_files(folder)
+    }
+    return _identity(metadata.read_text() if metadata.is_file() else None, checksums)
+
+
+def archived_identity(archive, session):
+    """Identity of an archived session, comparable with ``folder_identity``."""
+    files = archive.index[session]["files"]
+    metadata = archive.read_text(session, "metadata.json") if "metadata.json" in files else None
+    return _identity(metadata, {name: entry[3] for name, entry in files.items()})
+
+
+def pack_sessions(path, folders, replace=False):
+    """Write session folders into the archive at ``path``.
+
+    A folder replaces the archived session of the same name only if it is
+    the same session (same response_id or, for sessions saved without one,
+    the same files), so a later run that reused a packed session's name
+    cannot overwrite it; ``replace`` allows it anyway. Raises ValueError
+    naming the conflicting sessions. Sessions already in the archive are
+    carried over without being recompressed. The new archive is written
+    next to the old one and renamed over it. Returns the number of sessions
+    written from ``folders``.
+    """
+    path = Path(path)
+    folders = [Path(folder) for folder in folders]
+    replaced = {folder.name for folder in folders}
+    existing = SessionArchive(path) if path.exists() else None
+    if existing and not replace:
+        conflicts = [
+            folder.name for folder in folders
+            if folder.name in existing.index and folder_identity(folder) != archived_identity(existing, folder.name)
+        ]
+        if conflicts:
+            existing.close()
+            raise ValueError(
+                f"{path} already holds different sessions named {', '.join(conflicts)}"
+            )
+    temp_path = path.with_name(f".{path.name}.tmp")
+    index = {}
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(MAGIC)
+            if existing:
+                for session in existing.sessions():
+                    if session in replaced:
+                        continue
+                    files = {}
+                    for name in existing.files(session):
+                        entry = existing.index[session]["files"][name]
+                        files[name] = [f.tell(), *entry[1:]]
+                        f.write(existing.raw(session, name))
+                    index[session] = {"mtime": existing.mtime(session), "files": files}
+
+            for folder in folders:
+                files = {}
+                for file in _session_files(folder):
+                    data = file.read_bytes()
+                    compressed = zlib.compress(data, COMPRESSION_LEVEL)
+                    mtime = file.stat().st_mtime
+                    files[file.relative_to(folder).as_posix()] = [
+                        f.tell(), len(compressed), len(data), zlib.crc32(data), mtime
+                    ]
+                    f.write(compressed)
+                index[folder.name] = {
+                    "mtime": max((entry[4] for entry in files.values()), default=0.0),
+                    "files": files,
+                }
+
+            index_data = zlib.compress(json.dumps(index, separators=(",", ":")).encode("utf-8"), COMPRESSION_LEVEL)
+            index_offset = f.tell()
+            f.write(index_data)
+            f.write(TRAILER.pack(index_offset, len(index_data), TRAILER_MAGIC))
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        if existing:
+            existing.close()
+    os.replace(temp_path, path)
+    return len(folders)
+
+
+def _check_member_name(name, single=False):
+    """Reject archive names that could write outside their folder."""
+    for pure in (PurePosixPath(name), PureWindowsPath(name)):
+        if not name or pure.is_absolute() or pure.drive or ".." in pure.parts:
+            raise ValueError(f"Unsafe name in archive: {name!r}")
+    if single and len(PureWindowsPath(name).parts) != 1:
+        raise ValueError(f"Unsafe session name in archive: {name!r}")
+
+
+def unpack_sessions(path, dest_dir, sessions=None, overwrite=False):
+    """Extract sessions (all by default) into ``dest_dir``, keeping file times.
+
+    Existing session folders are skipped unless ``overwrite``. Session and
+    member names that are absolute or contain ``..`` are rejected with
+    ValueError before anything is written. Returns the names of the
+    extracted sessions.
+    """
+    dest_dir = Path(dest_dir)
+    extracted = []
+    with SessionArchive(path) as archive:
+        names = archive.sessions() if sessions is None else sessions
+        missing = [name for name in names if name not in archive.index]
+        if missing:
+            raise ValueError(f"Not in {path}: {', '.join(missing)}")
+        for session in names:
+            _check_member_name(session, single=True)
+            for name in archive.files(session):
+                _check_member_name(name)
+        for session in names:
+            folder = dest_dir / session
+            if folder.exists() and not overwrite:
+                continue
+            root = folder.resolve()
+            for name in archive.files(session):
+                target = folder / name
+                if root not in target.resolve().parents:
+                    raise ValueError(f"Unsafe name in archive: {session}/{name}")
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(archive.read(session, name))
+                mtime = archive.index[session]["files"][name][4]
+                os.utime(target, (mtime, mtime))
+            extracted.append(session)
+    return extracted
@@ -0,0 +1,278 @@
+"""Concurrent batch research runner with a combined live dashboard."""
+
+import asyncio
+from pathlib import Path
+
+from openai import AsyncOpenAI, OpenAI
+from rich.live import Live
+from rich.panel import Panel
+from rich.table import Table
+
+from src.catalog import save_research_session
+from src.eta import load_predictor
+from src.journal import EventJournal, JOURNAL_FILENAME
+from src.metrics import RunMetrics
+from src.output import OutputWriter, output_path
+from src.progress import default_progress_mode, make_progress
+from src.ratelimit import limit_client
+from src.resume import PENDING_STATUSES, SessionState, STATE_FILENAME
+from src.streaming import ResearchTracker, stream_research_async
+from src.store import SessionStore
+from src.utils import resolve_folder_name
+
+
+class BatchJob:
+    """A single query in a batch run and its outcome."""
+
+    def __init__(self, path, query, request_params, query_source=None, name=None):
+        self.path = Path(path) if path else None
+        self.query = query
+        self.request_params = request_params
+        self.query_source = query_source or f"file:{path}"
+        self.name = name
+        self.tracker = ResearchTracker(request_params["max_tool_calls"], request_params["model"])
+        self.metrics = RunMetrics()
+        self.extra = {}
+        self.folder = None
+        self.error = None
+        self.progress = None
+
+    @property
+    def label(self):
+        return self.name or self.path.stem
+
+
+def collect_query_files(sources):
+    """Expand directories and manifests into an ordered list of query files.
+
+    A directory contributes every ``*.md`` file it contains. A ``.md`` file is
+    a query itself; any other file is a manifest with one query path per line
+    (relative to the manifest, ``#`` starts a comment).
+    """
+    files = []
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.md")))
+        elif path.suffix == ".md":
+            files.append(path)
+        elif path.is_file():
+            for line in path.read_text().splitlines():
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    files.append(path.parent / line)
+        else:
+            raise ValueError(f"Query source not found: {source}")
+
+    missing = [str(f) for f in files if not f.is_file()]
+    if missing:
+        raise ValueError(f"Query files not found: {', '.join(missing)}")
+
+    # Drop duplicates while keeping manifest order
+    seen = set()
+    unique = []
+    for f in files:
+        key = f.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(f)
+    return unique
+
+
+STATUS_STYLES = {
+    "queued": "dim",
+    "running": "cyan",
+    "saving": "cyan",
+    "completed": "green",
+    "cancelled": "yellow",
+    "failed": "red",
+}
+
+
+def create_batch_display(jobs):
+    """Create one dashboard panel from every job's tracker."""
+    table = Table(expand=True, box=None, padding=(0, 1))
+    table.add_column("Query", style="white", overflow="ellipsis", no_wrap=True)
+    table.add_column("Status")
+    table.add_column("Elapsed", justify="right")
+    table.add_column("Calls", justify="right")
+    table.add_column("Progress", justify="right")
+    table.add_column("ETC", justify="right")
+
+    for job in jobs:
+        tracker = job.tracker
+        style = STATUS_STYLES.get(tracker.status, "white")
+        if tracker.status == "queued":
+            table.add_row(job.label, f"[{style}]queued[/{style}]", "-", "-", "-", "-")
+            continue
+        remaining_time, _ = tracker.get_eta() if tracker.status == "running" else ("-", None)
+        table.add_row(
+            job.label,
+            f"[{style}]{tracker.status}[/{style}]",
+            tracker.get_elapsed_time(),
+            f"{tracker.tool_calls}/{tracker.max_tool_calls}",
+            f"{tracker.get_progress_percent():.1f}%",
+            remaining_time,
+        )
+
+    done = sum(1 for job in jobs if job.tracker.status in ("completed", "cancelled", "failed"))
+    return Panel(
+        table,
+        title=f"[bold green]Batch Research Progress ({done}/{len(jobs)} done)[/bold green]",
+        border_style="green"
+    )
+
+
+def render_batch_summary(jobs):
+    """Create the end-of-run summary table."""
+    table = Table(title="Batch Summary")
+    table.add_column("Query")
+    table.add_column("Status")
+    table.add_column("Tool Calls", justify="right")
+    table.add_column("Saved To / Error")
+
+    for job in jobs:
+        style = STATUS_STYLES.get(job.tracker.status, "white")
+        detail = str(job.folder) if job.tracker.status == "completed" else (job.error or "")
+        table.add_row(
+            job.label,
+            f"[{style}]{job.tracker.status}[/{style}]",
+            str(job.tracker.tool_calls),
+            detail,
+        )
+    return table
+
+
+async def _stop_research(research):
+    """Cancel a research task that is still running; its response is cancelled too."""
+    if research is None or research.done():
+        return
+    research.cancel()
+    await asyncio.gather(research, return_exceptions=True)
+
+
+async def _run_job(job, client, naming_client, semaphore, args):
+    """Run one job once a concurrency slot is free, then save it."""
+    async with semaphore:
+        loop = asyncio.get_running_loop()
+        research = None
+        try:
+            # Folder naming may be a blocking call; overlap it with the research request
+            # and attach the event journal and report file once the folder exists
+            def name_folder():
+                with job.metrics.phase("folder_naming"):
+                    return resolve_folder_name(naming_client, job.query, args.output_dir, args.llm_folder_name)
+
+            folder_name_future = loop.run_in_executor(None, name_folder)
+            journal = EventJournal()
+            state = SessionState.create(job.request_params, job.query_source, query=job.query)
+            output = OutputWriter()
+            research = asyncio.ensure_future(
+                stream_research_async(
+                    client, job.request_params, job.tracker, journal, state, job.progress, output, job.metrics
+                )
+            )
+            folder_name = await folder_name_future
+            job.folder = SessionStore(args.output_dir).allocate(folder_name)
+            journal.attach(job.folder / JOURNAL_FILENAME)
+            state.attach(job.folder / STATE_FILENAME)
+            output.attach(output_path(job.folder))
+            response = await research
+        except asyncio.CancelledError:
+            await _stop_research(research)
+            job.tracker.finish("cancelled")
+            raise
+        except Exception as e:
+            # Naming or folder allocation failed: stop the response instead of leaving it running
+            await _stop_research(research)
+            job.tracker.finish("failed")
+            job.error = str(e)
+            return
+
+        if not response or response.status != "completed":
+            status = getattr(response, "status", None) or "unknown"
+            job.tracker.finish("cancelled" if status == "cancelled" else "failed")
+            job.error = f"Research ended with status: {status}"
+            if response and status not in PENDING_STATUSES:
+                state.mark(status)
+            return
+
+        job.tracker.set_status("saving")
+        extra = {"metrics": job.metrics.to_dict(), **job.extra}
+        try:
+            save_research_session(
+                job.folder, job.query, response, args, job.query_source, extra=extra,
+                tool_usage=job.tracker.tool_usage()
+            )
+            state.mark("completed")
+        except Exception as e:
+            job.tracker.finish("failed")
+            job.error = f"Error saving session: {e}"
+            return
+        job.tracker.finish("completed")
+
+
+def expected_duration(job):
+    """Predicted run time of a job that has not started, or None."""
+    predictor = job.tracker.predictor
+    prediction = predictor.predict(0.0, 0) if predictor else None
+    return prediction["remaining"][1] if prediction else None
+
+
+def schedule_order(jobs):
+    """Order in which jobs take concurrency slots: longest predicted first.
+
+    Starting the long runs first keeps one slow query from running alone at
+    the end of the batch. Jobs with no prediction may be long too, so they
+    go first, in their original order.
+    """
+    return sorted(jobs, key=lambda job: -(expected_duration(job) or float("inf")))
+
+
+async def run_batch(jobs, args, api_key, console):
+    """Run all jobs with at most ``args.concurrency`` requests in flight."""
+    for job in jobs:
+        job.tracker.predictor = load_predictor(args.output_dir, job.request_params)
+
+    client = limit_client(AsyncOpenAI(api_key=api_key, timeout=3600), api_key)
+    naming_client = limit_client(OpenAI(api_key=api_key), api_key)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    mode = args.progress or default_progress_mode()
+
+    live = None
+    if mode == "rich":
+        live = Live(create_batch_display(jobs), console=console, auto_refresh=False)
+        live.start(refresh=True)
+    else:
+        for job in jobs:
+            job.progress = make_progress(mode, job.tracker, console, label=job.label)
+
+    # The semaphore hands out slots in the order the tasks start waiting
+    tasks = [
+        asyncio.ensure_future(_run_job(job, client, naming_client, semaphore, args))
+        for job in schedule_order(jobs)
+    ]
+    rendered = None
+    try:
+        while not all(task.done() for task in tasks):
+            await asyncio.wait(tasks, timeout=1.0)
+            if live:
+                # Re-render only when a tracker or the running clocks changed
+                key = tuple((job.tracker.version, job.tracker.get_elapsed_seconds()) for job in jobs)
+                if key != rendered:
+                    live.update(create_batch_display(jobs), refresh=True)
+                    rendered = key
+            else:
+                for job in jobs:
+                    job.progress.notify()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if live:
+            live.update(create_batch_display(jobs), refresh=True)
+            live.stop()
+        else:
+            for job in jobs:
+                job.progress.notify()
@@ -0,0 +1,164 @@
+"""Wall-clock and cost limits for a research run."""
+
+import re
+import threading
+import time
+
+from src.events import FINAL_EVENT_TYPES, ITEM_ADDED_EVENT_TYPE, OUTPUT_DELTA_TYPE
+from src.utils import format_duration
+
+
+# USD per million (input, output) tokens
+MODEL_PRICES = {
+    "o3-deep-research": (10.0, 40.0),
+    "o4-mini-deep-research": (2.0, 8.0),
+}
+
+# USD per tool call
+TOOL_CALL_PRICES = {
+    "web_search_call": 0.01,
+    "code_interpreter_call": 0.03,
+}
+
+# Streams carry no token usage until the final response, so the running
+# estimate counts output text at ~4 characters per token and assumes each
+# tool call feeds this many tokens of results back into the model
+CHARS_PER_TOKEN = 4
+INPUT_TOKENS_PER_TOOL_CALL = 5000
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    """Parse ``90s``, ``30m``, ``1.5h`` or a bare number of minutes into seconds."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*", value.lower())
+    if not match:
+        raise ValueError(f"invalid duration: {value!r} (use e.g. 90s, 30m or 1.5h)")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2) or "m"]
+
+
+def usage_cost(model, usage):
+    """Actual cost of a finished response from its token usage, or None."""
+    if model not in MODEL_PRICES or usage is None:
+        return None
+    input_price, output_price = MODEL_PRICES[model]
+    input_tokens = getattr(usage, "input_tokens", 0) or 0
+    output_tokens = getattr(usage, "output_tokens", 0) or 0
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class BudgetController:
+    """Watch a run against a deadline and a cost cap, cancelling it at the hard limit.
+
+    Subscribed to a stream's events, it keeps a running cost estimate;
+    ``check()`` warns (once per limit, as a tracker action) when the
+    tool-call rate projects a finish over budget and returns the reason once
+    a limit is reached. Because deep research can go quiet for minutes, the
+    deadline is also enforced by a timer thread started with ``watch()``.
+    """
+
+    def __init__(self, tracker, deadline=None, max_cost=None, input_chars=0):
+        self.tracker = tracker
+        self.deadline = deadline
+        self.max_cost = max_cost
+        self.input_tokens = input_chars / CHARS_PER_TOKEN
+        self.output_chars = 0
+        self.tool_cost = 0.0
+        self.actual_cost = None
+        self.exceeded = None
+        self._warned = set()
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, dispatcher):
+        """Update the running cost estimate from the stream events routed by ``dispatcher``."""
+        dispatcher.on(OUTPUT_DELTA_TYPE, self._on_delta)
+        dispatcher.on(ITEM_ADDED_EVENT_TYPE, self._on_item_added)
+        dispatcher.on(FINAL_EVENT_TYPES, self._on_final)
+
+    def _on_delta(self, event):
+        self.output_chars += len(event.delta or "")
+
+    def _on_item_added(self, event):
+        item_type = getattr(event.item, "type", None)
+        if item_type in TOOL_CALL_PRICES:
+            self.tool_cost += TOOL_CALL_PRICES[item_type]
+
+    def _on_final(self, event):
+        response = getattr(event, "response", None)
+        if response is not None and getattr(response, "usage", None):
+            self.actual_cost = usage_cost(self.tracker.model, response.usage)
+
+    def estimated_cost(self):
+        """Running cost estimate in USD (the actual cost once usage is known)."""
+        input_price, output_price = MODEL_PRICES.get(self.tracker.model, (0.0, 0.0))
+        input_tokens = self.input_tokens + self.tracker.tool_calls * INPUT_TOKENS_PER_TOOL_CALL
+        output_tokens = self.output_chars / CHARS_PER_TOKEN
+        token_cost = (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+        estimate = token_cost + self.tool_cost
+        return max(estimate, self.actual_cost) if self.actual_cost is not None else estimate
+
+    def check(self):
+        """Warn about projected overruns; return the reason if a hard limit is reached."""
+        if self.exceeded:
+            return self.exceeded
+        elapsed = time.time() - self.tracker.start_time
+        cost = self.estimated_cost()
+
+        if self.deadline is not None and elapsed >= self.deadline:
+            return self._exceed(f"deadline of {format_duration(self.deadline)} reached")
+        if self.max_cost is not None and cost >= self.max_cost:
+            return self._exceed(f"estimated cost ${cost:.2f} reached the ${self.max_cost:.2f} limit")
+
+        remaining = self.tracker.get_remaining_seconds()
+        if remaining is None:
+            return None
+        if self.deadline is not None and elapsed + remaining > self.deadline:
+            self._warn("deadline", f"Projected finish in {format_duration(elapsed + remaining)} "
+                                   f"exceeds the {format_duration(self.deadline)} deadline")
+        if self.max_cost is not None and self.tracker.tool_calls:
+            projected = cost * self.tracker.get_expected_tool_calls() / self.tracker.tool_calls
+            if projected > self.max_cost:
+                self._warn("cost", f"Projected cost ${projected:.2f} exceeds the ${self.max_cost:.2f} limit")
+        return None
+
+    def _warn(self, kind, message):
+        if kind not in self._warned:
+            self._warned.add(kind)
+            self.tracker.add_action("budget", message)
+
+    def _exceed(self, reason):
+        with self._lock:
+            if not self.exceeded:
+                self.exceeded = reason
+                self.tracker.add_action("budget", f"Stopping: {reason}")
+        return self.exceeded
+
+    def watch(self, on_deadline):
+        """Call ``on_deadline(reason)`` from a timer thread when the deadline passes."""
+        if self.deadline is None or self._timer:
+            return
+        delay = max(self.deadline - (time.time() - self.tracker.start_time), 0)
+
+        def fire():
+            if not self.exceeded:
+                on_deadline(self._exceed(f"deadline of {format_duration(self.deadline)} reached"))
+
+        self._timer = threading.Timer(delay, fire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def stop(self):
+        """Cancel the deadline timer."""
+        if self._timer:
+            self._timer.cancel()
+
+    def summary(self):
+        """Budget settings and outcome for the session metadata."""
+        return {
+            "deadline_seconds": self.deadline,
+            "max_cost_usd": self.max_cost,
+            "estimated_cost_usd": round(self.estimated_cost(), 4),
+            "actual_cost_usd": None if self.actual_cost is None else round(self.actual_cost, 4),
+            "stopped": self.exceeded,
+        }
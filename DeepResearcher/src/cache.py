@@ -0,0 +1,89 @@
+"""Reuse of completed research sessions for duplicate and near-duplicate queries."""
+
+import math
+from collections import Counter
+from datetime import datetime, timedelta
+
+from src.catalog import cache_key
+from src.utils import query_terms
+
+
+# Cosine similarity above which a past query is reported as a near-duplicate
+DEFAULT_SIMILARITY_THRESHOLD = 0.35
+
+
+def _cutoff(ttl_days):
+    """Oldest session timestamp still considered fresh, or None for no limit."""
+    if ttl_days is None:
+        return None
+    return (datetime.now() - timedelta(days=ttl_days)).isoformat()
+
+
+def find_cached_session(conn, query, model, tool_types, ttl_days=None):
+    """Return the newest completed session for the exact same request, if any."""
+    sql = """SELECT s.*, f.output AS output_text
+        FROM sessions s JOIN sessions_fts f ON f.folder = s.folder
+        WHERE s.cache_key = ? AND s.status = 'completed'"""
+    params = [cache_key(query, model, tool_types)]
+    cutoff = _cutoff(ttl_days)
+    if cutoff:
+        sql += " AND s.timestamp >= ?"
+        params.append(cutoff)
+    sql += " ORDER BY s.timestamp DESC LIMIT 1"
+    return conn.execute(sql, params).fetchone()
+
+
+def _tfidf(counts, idf):
+    vector = {term: (1 + math.log(count)) * idf[term] for term, count in counts.items()}
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return vector, norm
+
+
+def find_similar_sessions(conn, query, threshold=DEFAULT_SIMILARITY_THRESHOLD, limit=3, ttl_days=None):
+    """Score past session queries against ``query`` with local TF-IDF cosine similarity.
+
+    Everything is computed from the catalog with no network calls. Returns
+    ``(row, score)`` pairs at or above ``threshold``, best first.
+    """
+    sql = """SELECT s.*, f.query AS query_text
+        FROM sessions s JOIN sessions_fts f ON f.folder = s.folder
+        WHERE s.status = 'completed'"""
+    params = []
+    cutoff = _cutoff(ttl_days)
+    if cutoff:
+        sql += " AND s.timestamp >= ?"
+        params.append(cutoff)
+    rows = conn.execute(sql, params).fetchall()
+    if not rows:
+        return []
+
+    documents = [Counter(query_terms(row["query_text"], min_len=2)) for row in rows]
+    target = Counter(query_terms(query, min_len=2))
+    if not target:
+        return []
+
+    document_frequency = Counter()
+    for counts in documents + [target]:
+        document_frequency.update(counts.keys())
+    total = len(documents) + 1
+    idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+    target_vector, target_norm = _tfidf(target, idf)
+    matches = []
+    for row, counts in zip(rows, documents):
+        if not counts:
+            continue
+        vector, norm = _tfidf(counts, idf)
+        dot = sum(weight * vector.get(term, 0.0) for term, weight in target_vector.items())
+        score = dot / (target_norm * norm)
+        if score >= threshold:
+            matches.append((row, score))
+
+    matches.sort(key=lambda match: match[1], reverse=True)
+    return matches[:limit]
+
+
+def get_session_output(conn, folder):
+    """Return a cataloged session's output text."""
+    row = conn.execute("SELECT output FROM sessions_fts WHERE folder = ?", (folder,)).fetchone()
+    return row["output"] if row else None
@@ -1,25 +1,87 @@
 """Research session cataloging functions."""
 
+import hashlib
 import json
+import re
+import sqlite3
 from datetime import datetime
+from pathlib import Path
 
+from src.archive import ARCHIVE_SUFFIX, SessionArchive, archive_key
+from src.eta import encode_timeline, tools_key
+from src.events import response_tool_usage
+from src.resume import STATE_FILENAME
+from src.sources import extract_sources, index_sources
+from src.store import SessionStore
 
-def save_research_session(folder_path, query, response, args, query_source="cli"):
-    """Save the research session data to files."""
+
+CATALOG_FILENAME = "catalog.db"
+
+# Bump when the schema changes; the catalog is rebuilt from the session
+# folders on disk rather than migrated
+SCHEMA_VERSION = 5
+
+# Markers around matched terms in search snippets
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    folder TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    timestamp TEXT,
+    model TEXT,
+    status TEXT,
+    response_id TEXT,
+    query_source TEXT,
+    web_searches INTEGER,
+    code_calls INTEGER,
+    input_chars INTEGER,
+    output_chars INTEGER,
+    files_mtime REAL,
+    has_metadata INTEGER NOT NULL DEFAULT 0,
+    cache_key TEXT,
+    metrics TEXT,
+    tools TEXT,
+    duration REAL,
+    timeline TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_timestamp ON sessions(timestamp);
+CREATE INDEX IF NOT EXISTS sessions_model ON sessions(model, timestamp);
+CREATE INDEX IF NOT EXISTS sessions_cache_key ON sessions(cache_key);
+CREATE VIRTUAL TABLE IF NOT EXISTS sessions_fts USING fts5(
+    folder UNINDEXED, query, output, metadata
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS sources_fts USING fts5(
+    url, folder UNINDEXED, title, finding
+);
+"""
+
+
+def save_research_session(folder_path, query, response, args, query_source="cli", output_text=None, extra=None,
+                          tool_usage=None):
+    """Save the research session data to files.
+
+    ``output_text`` overrides the response's text (for partial results) and
+    ``extra`` is merged into the metadata. ``tool_usage`` is the tool-call
+    summary counted while streaming; without it the response output is counted.
+    """
     timestamp = datetime.now().isoformat()
 
     # Get folder name for file prefixes
     folder_name = folder_path.name
 
+    store = SessionStore(folder_path.parent)
+
     # Save input query (minimal - just the query text)
-    input_file = folder_path / f"{folder_name}_input.md"
-    with open(input_file, "w") as f:
-        f.write(query)
+    input_file = store.write_text(folder_path, f"{folder_name}_input.md", query)
 
-    # Save output results (minimal - just the results)
-    output_file = folder_path / f"{folder_name}_output.md"
-    with open(output_file, "w") as f:
-        f.write(response.output_text)
+    # Save output results (minimal - just the results), replacing the partial
+    # report streamed in during the run
+    output_file = store.write_text(
+        folder_path, f"{folder_name}_output.md", response.output_text if output_text is None else output_text,
+        fsync=True
+    )
 
     # Save metadata and tool usage
     metadata = {
@@ -36,16 +98,292 @@ def save_research_session(folder_path, query, response, args, query_source="cli"
     }
 
     # Add tool usage statistics
-    if hasattr(response, 'output') and response.output:
-        web_searches = sum(1 for item in response.output if getattr(item, 'type', None) == 'web_search_call')
-        code_calls = sum(1 for item in response.output if getattr(item, 'type', None) == 'code_interpreter_call')
-        metadata["tool_usage"] = {
-            "web_searches": web_searches,
-            "code_interpreter_calls": code_calls,
-        }
-
-    metadata_file = folder_path / "metadata.json"
-    with open(metadata_file, "w") as f:
-        json.dump(metadata, f, indent=2)
+    if tool_usage is None and getattr(response, "output", None):
+        tool_usage = response_tool_usage(response)
+    if tool_usage is not None:
+        metadata["tool_usage"] = tool_usage
+
+    # Cited sources feed the cross-session source index used by --reuse-sources
+    sources = extract_sources(
+        response.output_text if output_text is None else output_text, getattr(response, "output", None)
+    )
+    if sources:
+        metadata["sources"] = sources
+
+    if extra:
+        metadata.update(extra)
+
+    metadata_file = store.write_json(folder_path, "metadata.json", metadata)
+
+    # Keep the catalog index current; a catalog problem must not lose the session
+    try:
+        conn, needs_backfill = open_catalog(folder_path.parent)
+        if needs_backfill:
+            backfill_catalog(conn, folder_path.parent)
+        else:
+            index_session(conn, folder_path)
+        conn.close()
+    except sqlite3.Error:
+        pass
 
     return input_file, output_file, metadata_file
+
+
+def normalize_query(query):
+    """Normalize query text for cache lookups: case and whitespace insensitive."""
+    return " ".join(query.lower().split())
+
+
+def cache_key(query, model, tool_types):
+    """Key identifying a research request by normalized query, model and enabled tools."""
+    payload = json.dumps([normalize_query(query), model, sorted(tool_types)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def metadata_cache_key(query, metadata):
+    """Cache key for a saved session, or None if its metadata can't identify the request."""
+    if not metadata.get("model"):
+        return None
+    tool_types = []
+    if metadata.get("web_search_enabled"):
+        tool_types.append("web_search_preview")
+    if metadata.get("code_interpreter_enabled"):
+        tool_types.append("code_interpreter")
+    return cache_key(query, metadata["model"], tool_types)
+
+
+def open_catalog(base_dir):
+    """Open (creating if needed) the session catalog for a sessions directory.
+
+    Returns the connection and whether the catalog is new (or was reset by a
+    schema change) and so needs a backfill.
+    """
+    path = Path(base_dir) / CATALOG_FILENAME
+    needs_backfill = not path.exists()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        conn.executescript(
+            "DROP TABLE IF EXISTS sessions; DROP TABLE IF EXISTS sessions_fts; DROP TABLE IF EXISTS sources_fts;"
+        )
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        needs_backfill = True
+    conn.executescript(SCHEMA)
+    return conn, needs_backfill
+
+
+def _session_files(folder_path):
+    """Find the input, output, metadata and state files of a session folder."""
+    name = folder_path.name
+    input_file = folder_path / f"{name}_input.md"
+    output_file = folder_path / f"{name}_output.md"
+    # Folders renamed by hand may no longer match their file prefixes
+    if not input_file.exists():
+        input_file = next(iter(sorted(folder_path.glob("*_input.md"))), input_file)
+    if not output_file.exists():
+        output_file = next(iter(sorted(folder_path.glob("*_output.md"))), output_file)
+    return input_file, output_file, folder_path / "metadata.json", folder_path / STATE_FILENAME
+
+
+def _files_mtime(paths):
+    return max((p.stat().st_mtime for p in paths if p.exists()), default=0.0)
+
+
+def _parse_metadata(text):
+    try:
+        metadata = json.loads(text)
+    except ValueError:
+        return {}
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def _state_status(text):
+    """Status recorded in a session.json, for sessions that never wrote metadata.json."""
+    return _parse_metadata(text).get("status")
+
+
+def index_session(conn, folder_path):
+    """Add or refresh one session folder in the catalog."""
+    folder_path = Path(folder_path)
+    input_file, output_file, metadata_file, state_file = _session_files(folder_path)
+    if not input_file.exists() and not output_file.exists():
+        return False
+
+    query = input_file.read_text() if input_file.exists() else ""
+    output = output_file.read_text() if output_file.exists() else ""
+    metadata = _parse_metadata(metadata_file.read_text()) if metadata_file.exists() else {}
+    state_status = _state_status(state_file.read_text()) if state_file.exists() else None
+    files_mtime = _files_mtime([input_file, output_file, metadata_file, state_file])
+    _index_record(
+        conn, str(folder_path.resolve()), folder_path.name, query, output, metadata, files_mtime, state_status
+    )
+    return True
+
+
+def index_archived_session(conn, archive, session):
+    """Add or refresh one session stored in a ``SessionArchive``, read straight from the archive."""
+    input_name = archive.find(session, "_input.md")
+    output_name = archive.find(session, "_output.md")
+    if not input_name and not output_name:
+        return False
+
+    query = archive.read_text(session, input_name) if input_name else ""
+    output = archive.read_text(session, output_name) if output_name else ""
+    has_metadata = "metadata.json" in archive.index[session]["files"]
+    metadata = _parse_metadata(archive.read_text(session, "metadata.json")) if has_metadata else {}
+    has_state = STATE_FILENAME in archive.index[session]["files"]
+    state_status = _state_status(archive.read_text(session, STATE_FILENAME)) if has_state else None
+    _index_record(
+        conn, archive_key(archive.path, session), session, query, output, metadata, archive.mtime(session),
+        state_status,
+    )
+    return True
+
+
+def _index_record(conn, folder, name, query, output, metadata, files_mtime, state_status=None):
+    # A report without metadata.json may be a run that is still streaming or
+    # died part way, so it is only as finished as its session.json says
+    # Sessions saved before metadata.json existed get their file time instead
+    timestamp = metadata.get("timestamp") or datetime.fromtimestamp(files_mtime).isoformat()
+    tool_usage = metadata.get("tool_usage", {})
+    metadata_text = " ".join(
+        str(v) for k, v in metadata.items() if k not in ("query", "tool_usage", "metrics", "sources")
+    )
+    # Sessions saved before sources were recorded still have their inline citations
+    sources = metadata.get("sources") or extract_sources(output)
+    metrics = metadata.get("metrics") or {}
+    # Tool-call timelines of complete live runs feed the ETA predictor; they
+    # are kept delta-encoded in their own column rather than in the metrics
+    offsets = metrics.pop("tool_call_offsets", None)
+    duration = metrics.get("phases", {}).get("stream")
+    has_timeline = (
+        offsets is not None and duration is not None
+        and metadata.get("status") == "completed" and not metrics.get("resumed")
+    )
+
+    with conn:
+        conn.execute(
+            """INSERT OR REPLACE INTO sessions (
+                folder, name, timestamp, model, status, response_id, query_source,
+                web_searches, code_calls, input_chars, output_chars, files_mtime, has_metadata,
+                cache_key, metrics, tools, duration, timeline
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                folder, name, timestamp, metadata.get("model"),
+                metadata.get("status", state_status),
+                metadata.get("response_id"), metadata.get("query_source"),
+                tool_usage.get("web_searches"), tool_usage.get("code_interpreter_calls"),
+                len(query), len(output), files_mtime, int(bool(metadata)),
+                metadata_cache_key(query, metadata),
+                json.dumps(metrics, separators=(",", ":")) if metrics else None,
+                tools_key(metadata.get("web_search_enabled"), metadata.get("code_interpreter_enabled")),
+                duration if has_timeline else None,
+                encode_timeline(offsets) if has_timeline else None,
+            ),
+        )
+        conn.execute("DELETE FROM sessions_fts WHERE folder = ?", (folder,))
+        conn.execute(
+            "INSERT INTO sessions_fts (folder, query, output, metadata) VALUES (?, ?, ?, ?)",
+            (folder, query, output, f"{name} {metadata_text}"),
+        )
+        index_sources(conn, folder, sources)
+
+
+def backfill_catalog(conn, base_dir, rebuild=False):
+    """Index every session folder under base_dir that is new or changed on disk.
+
+    Handles legacy sessions that only have input/output markdown files.
+    Sessions in ``*.drpack`` archives under base_dir are read from the
+    archive, unless an unpacked folder of the same name exists. Sessions that
+    no longer exist are dropped. Returns the number of sessions (re)indexed.
+    """
+    base_path = Path(base_dir)
+    if rebuild:
+        with conn:
+            conn.execute("DELETE FROM sessions")
+            conn.execute("DELETE FROM sessions_fts")
+            conn.execute("DELETE FROM sources_fts")
+
+    known = {
+        row["folder"]: row["files_mtime"]
+        for row in conn.execute("SELECT folder, files_mtime FROM sessions")
+    }
+    seen = set()
+    indexed = 0
+    folders = sorted(p for p in base_path.iterdir() if p.is_dir()) if base_path.exists() else []
+    for folder_path in folders:
+        folder = str(folder_path.resolve())
+        seen.add(folder)
+        if folder in known and known[folder] >= _files_mtime(_session_files(folder_path)):
+            continue
+        if index_session(conn, folder_path):
+            indexed += 1
+
+    folder_names = {folder_path.name for folder_path in folders}
+    for archive_path in sorted(base_path.glob(f"*{ARCHIVE_SUFFIX}")) if base_path.exists() else []:
+        try:
+            archive = SessionArchive(archive_path)
+        except (OSError, ValueError):
+            continue
+        with archive:
+            for session in archive.sessions():
+                if session in folder_names:
+                    continue
+                key = archive_key(archive_path, session)
+                seen.add(key)
+                if key in known and known[key] >= archive.mtime(session):
+                    continue
+                if index_archived_session(conn, archive, session):
+                    indexed += 1
+
+    stale = [folder for folder in known if folder not in seen]
+    if stale:
+        with conn:
+            conn.executemany("DELETE FROM sessions WHERE folder = ?", [(f,) for f in stale])
+            conn.executemany("DELETE FROM sessions_fts WHERE folder = ?", [(f,) for f in stale])
+            conn.executemany("DELETE FROM sources_fts WHERE folder = ?", [(f,) for f in stale])
+    return indexed
+
+
+def _fts_query(text):
+    """Turn free text into an FTS5 query matching all of its words."""
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"' for word in words)
+
+
+def search_sessions(conn, text, limit=20):
+    """Full-text search over session queries, outputs and metadata, best match first."""
+    fts_query = _fts_query(text)
+    if not fts_query:
+        return []
+    return conn.execute(
+        """SELECT s.*, snippet(sessions_fts, -1, ?, ?, '…', 16) AS snippet
+        FROM sessions_fts JOIN sessions s ON s.folder = sessions_fts.folder
+        WHERE sessions_fts MATCH ?
+        ORDER BY bm25(sessions_fts, 0.0, 4.0, 1.0, 2.0)
+        LIMIT ?""",
+        (MATCH_START, MATCH_END, fts_query, limit),
+    ).fetchall()
+
+
+def session_metrics(conn, model=None):
+    """Sessions that recorded run metrics, with the metrics decoded."""
+    sql = "SELECT folder, name, model, status, web_searches, code_calls, metrics FROM sessions WHERE metrics IS NOT NULL"
+    params = []
+    if model:
+        sql += " AND model = ?"
+        params.append(model)
+    return [dict(row, metrics=json.loads(row["metrics"])) for row in conn.execute(sql, params)]
+
+
+def list_sessions(conn, limit=50, model=None):
+    """List cataloged sessions, newest first."""
+    sql = "SELECT * FROM sessions"
+    params = []
+    if model:
+        sql += " WHERE model = ?"
+        params.append(model)
+    sql += " ORDER BY timestamp DESC LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
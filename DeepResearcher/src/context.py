@@ -0,0 +1,282 @@
+"""Assembly of query files that include local documents and earlier session reports.
+
+A query file may contain directive lines of the form::
+
+    {{include notes/benchmarks.md}}
+    {{include papers/*.md max_tokens=4000}}
+    {{include session:seed_vc_architecture_limitations}}
+
+Paths are relative to the query file and may be globs; ``session:NAME``
+pulls in the report of a saved session, from its folder or from a session
+archive in the sessions directory. Included text is split into passages
+(blank-line separated paragraphs), passages already seen earlier in the
+query are dropped, and if the documents still exceed the token budget the
+passages sharing the fewest words with the query's own text are cut. The
+same files and budget always produce the same query.
+"""
+
+import glob
+import hashlib
+import math
+import re
+from pathlib import Path
+
+from src.archive import ARCHIVE_SUFFIX, SessionArchive
+from src.output import output_path
+from src.utils import query_terms
+
+
+# Tokens of included documents allowed per query; 0 disables trimming
+DEFAULT_CONTEXT_BUDGET = 30000
+
+INCLUDE_PATTERN = re.compile(r"^[ \t]*\{\{\s*include\s+(\S+)((?:\s+\w+=\S+)*)\s*\}\}[ \t]*$", re.MULTILINE)
+SESSION_PREFIX = "session:"
+
+# Passages shorter than this many words (headings, rules, short list items)
+# are never treated as duplicates
+MIN_DEDUPE_WORDS = 8
+
+# Roughly how o200k-style tokenizers split English text: one token per short
+# word, longer words and digit runs in several pieces, punctuation on its own
+_TOKEN_PIECES = re.compile(r"[^\W\d_]+|\d+|[^\w\s]|_+")
+
+GAP_MARKER = "[…]"
+
+
+def count_tokens(text):
+    """Estimate the number of tokens in ``text`` without a tokenizer download."""
+    tokens = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        if piece[0].isdigit():
+            tokens += (len(piece) + 2) // 3
+        elif piece[0].isalpha():
+            tokens += 1 + len(piece) // 8
+        else:
+            tokens += 1
+    return tokens
+
+
+def _passages(text):
+    return [p.strip("\n") for p in re.split(r"\n[ \t]*\n", text.strip()) if p.strip()]
+
+
+def _fingerprint(passage):
+    words = re.findall(r"\w+", passage.lower())
+    if len(words) < MIN_DEDUPE_WORDS:
+        return None
+    return hashlib.sha1(" ".join(words).encode("utf-8")).hexdigest()
+
+
+class Document:
+    """One included document and what was kept of it."""
+
+    def __init__(self, source, text):
+        self.source = source
+        self.text = text
+        self.tokens = count_tokens(text)
+        self.passages = []
+        self.duplicates = 0
+        self.kept = []
+        self.truncated = False
+        self.max_tokens = None
+
+    @property
+    def available(self):
+        """Tokens left after dropping duplicate passages."""
+        return sum(tokens for _, tokens in self.passages)
+
+    @property
+    def cap(self):
+        """Tokens this document may use at most, before the shared budget."""
+        if self.max_tokens is None:
+            return self.available
+        return min(self.available, self.max_tokens)
+
+    @property
+    def kept_tokens(self):
+        return sum(self.passages[i][1] for i in self.kept)
+
+    def trim(self, allowance, wanted):
+        """Keep the passages most related to the query that fit in ``allowance`` tokens."""
+        if self.available <= allowance:
+            self.kept = list(range(len(self.passages)))
+            return
+        scored = []
+        for i, (passage, tokens) in enumerate(self.passages):
+            overlap = len(set(query_terms(passage)) & wanted)
+            # Headings and the opening passage keep the document readable
+            if i == 0 or passage.lstrip().startswith("#"):
+                overlap += 2
+            scored.append((-overlap / math.sqrt(tokens + 1), i))
+        kept = []
+        used = 0
+        for _, i in sorted(scored):
+            tokens = self.passages[i][1]
+            if used + tokens <= allowance:
+                kept.append(i)
+                used += tokens
+        if not kept and self.passages and allowance > 0:
+            # Even the opening passage is over the allowance: keep its start
+            passage, tokens = self.passages[0]
+            words = passage.split(" ")
+            keep = len(words) * allowance // tokens
+            while keep > 0 and count_tokens(" ".join(words[:keep])) > allowance:
+                keep -= 1
+            if keep:
+                passage = " ".join(words[:keep])
+                self.passages[0] = (passage, count_tokens(passage))
+                self.truncated = True
+                kept = [0]
+        self.kept = sorted(kept)
+
+    def render(self):
+        parts = []
+        previous = -1
+        for i in self.kept:
+            if i != previous + 1:
+                parts.append(GAP_MARKER)
+            parts.append(self.passages[i][0])
+            previous = i
+        # A cut opening passage is marked like dropped ones
+        if self.passages and (previous != len(self.passages) - 1 or self.truncated):
+            parts.append(GAP_MARKER)
+        body = "\n\n".join(parts)
+        return f'<document source="{self.source}">\n{body}\n</document>'
+
+    def summary(self):
+        return {
+            "source": self.source,
+            "sha256": hashlib.sha256(self.text.encode("utf-8")).hexdigest(),
+            "tokens": self.tokens,
+            "kept_tokens": self.kept_tokens,
+            "duplicate_passages": self.duplicates,
+            "dropped_passages": len(self.passages) - len(self.kept),
+            "truncated_passages": int(self.truncated),
+        }
+
+
+class PackedQuery:
+    """A query with its includes resolved, deduplicated and fitted to the budget."""
+
+    def __init__(self, text, documents, budget):
+        self.text = text
+        self.documents = documents
+        self.budget = budget
+        self.tokens = count_tokens(text)
+
+    def summary(self):
+        """Packing record for session metadata."""
+        return {
+            "budget": self.budget,
+            "tokens": self.tokens,
+            "source_tokens": sum(doc.tokens for doc in self.documents),
+            "documents": [doc.summary() for doc in self.documents],
+        }
+
+
+def read_session_report(sessions_dir, name):
+    """The report of a saved session, from its folder or a session archive."""
+    folder = Path(sessions_dir) / name
+    if folder.is_dir():
+        report = output_path(folder)
+        if not report.exists():
+            report = next(iter(sorted(folder.glob("*_output.md"))), report)
+        return report.read_text()
+    for archive_path in sorted(Path(sessions_dir).glob(f"*{ARCHIVE_SUFFIX}")):
+        with SessionArchive(archive_path) as archive:
+            if name in archive.index:
+                member = archive.find(name, "_output.md")
+                if member:
+                    return archive.read_text(name, member)
+    raise FileNotFoundError(f"no saved report for session {name} in {sessions_dir}")
+
+
+def _resolve(source, base_dir, sessions_dir):
+    """``(label, text)`` pairs for one include source."""
+    if source.startswith(SESSION_PREFIX):
+        name = source[len(SESSION_PREFIX):]
+        return [(source, read_session_report(sessions_dir, name))]
+    pattern = Path(base_dir) / source
+    if glob.has_magic(source):
+        paths = sorted(Path(p) for p in glob.glob(str(pattern), recursive=True) if Path(p).is_file())
+        if not paths:
+            raise FileNotFoundError(f"no files match {source}")
+    else:
+        paths = [pattern]
+    resolved = []
+    for path in paths:
+        try:
+            label = path.relative_to(base_dir).as_posix()
+        except ValueError:
+            label = str(path)
+        resolved.append((label, path.read_text()))
+    return resolved
+
+
+def _allocate(documents, budget):
+    """Split the budget across documents: small ones are kept whole, large ones share the rest equally."""
+    allowances = {}
+    remaining = budget
+    pending = sorted(documents, key=lambda doc: doc.cap)
+    for count, doc in enumerate(pending):
+        share = remaining / (len(pending) - count)
+        allowances[id(doc)] = min(doc.cap, int(share))
+        remaining -= allowances[id(doc)]
+    return allowances
+
+
+def pack_query(text, base_dir=".", sessions_dir="research_sessions", budget=DEFAULT_CONTEXT_BUDGET):
+    """Resolve the ``{{include}}`` directives in a query; returns a PackedQuery.
+
+    Raises ValueError for an include that cannot be read or a bad option.
+    """
+    base_dir = Path(base_dir).resolve()
+    literal = INCLUDE_PATTERN.sub("", text)
+    wanted = set(query_terms(literal))
+    seen = {_fingerprint(p) for p in _passages(literal)} - {None}
+
+    segments = []
+    documents = []
+    position = 0
+    for match in INCLUDE_PATTERN.finditer(text):
+        segments.append(text[position:match.start()])
+        position = match.end()
+        source, options = match.group(1), match.group(2).split()
+        max_tokens = None
+        for option in options:
+            key, _, value = option.partition("=")
+            if key != "max_tokens" or not value.isdigit():
+                raise ValueError(f"Unknown include option {option!r} (expected max_tokens=N)")
+            max_tokens = int(value)
+        try:
+            resolved = _resolve(source, base_dir, sessions_dir)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot include {source}: {e}") from e
+        for label, content in resolved:
+            doc = Document(label, content)
+            doc.max_tokens = max_tokens
+            for passage in _passages(content):
+                fingerprint = _fingerprint(passage)
+                if fingerprint in seen:
+                    doc.duplicates += 1
+                    continue
+                if fingerprint:
+                    seen.add(fingerprint)
+                doc.passages.append((passage, count_tokens(passage)))
+            documents.append(doc)
+            segments.append(doc)
+    segments.append(text[position:])
+
+    allowances = _allocate(documents, budget) if budget else {}
+    for doc in documents:
+        doc.trim(allowances.get(id(doc), doc.cap), wanted)
+
+    parts = [segment.render() if isinstance(segment, Document) else segment for segment in segments]
+    packed = re.sub(r"\n{3,}", "\n\n", "".join(parts)).strip()
+    return PackedQuery(packed, documents, budget)
+
+
+def read_query_file(path, sessions_dir, budget=DEFAULT_CONTEXT_BUDGET):
+    """Read a query file and pack its includes; returns a PackedQuery."""
+    path = Path(path)
+    return pack_query(path.read_text(), path.parent, sessions_dir, budget)
@@ -0,0 +1,73 @@
+"""Map-reduce research: split a broad query into sub-questions and merge the sub-reports."""
+
+import json
+import re
+
+
+# A cheap model splits the query, sub-questions run in parallel on the fast
+# deep research model, and a general model writes the merged report
+SPLIT_MODEL = "gpt-5-mini"
+SUBQUERY_MODEL = "o4-mini-deep-research"
+SYNTHESIS_MODEL = "gpt-5"
+
+DEFAULT_MAX_SUBQUERIES = 4
+
+SPLIT_PROMPT = """Split the research request below into at most {max_parts} independent sub-questions that can be researched in parallel by separate analysts who cannot see each other's work.
+
+- Each sub-question must be self-contained: restate the context, constraints and output requirements from the request that apply to it.
+- Together they must cover the whole request, with as little overlap as possible.
+- If the request is narrow and cannot be split usefully, return a single sub-question.
+
+Return only a JSON array of strings.
+
+Research request:
+{query}"""
+
+SYNTHESIS_PROMPT = """You are merging the reports of several researchers who each investigated one part of the research request below. Write a single, well-structured report that answers the full request.
+
+- Integrate the findings; do not just concatenate the reports. Resolve overlaps and point out disagreements between them.
+- Keep every inline citation from the reports with the claims it supports.
+- Follow the output format the request asks for, if any.
+
+Research request:
+{query}
+
+{reports}"""
+
+
+def parse_subqueries(text, max_parts):
+    """Read sub-questions from a JSON array, or from list items if the model ignored the format."""
+    match = re.search(r"\[.*\]", text, re.DOTALL)
+    if match:
+        try:
+            parts = json.loads(match.group(0))
+            return [str(part).strip() for part in parts if str(part).strip()][:max_parts]
+        except ValueError:
+            pass
+    items = re.findall(r"^\s*(?:[-*]|\d+[.)])\s+(.+)$", text, re.MULTILINE)
+    return [item.strip() for item in items if item.strip()][:max_parts]
+
+
+def split_query(client, query, max_parts=DEFAULT_MAX_SUBQUERIES):
+    """Ask the split model for independent sub-questions; returns [] if that fails."""
+    try:
+        response = client.responses.create(
+            model=SPLIT_MODEL,
+            reasoning={"effort": "low"},
+            input=SPLIT_PROMPT.format(max_parts=max_parts, query=query),
+        )
+    except Exception:
+        return []
+    return parse_subqueries(response.output_text, max_parts)
+
+
+def synthesize(client, query, parts):
+    """Merge ``(sub_question, report)`` pairs into one report with the synthesis model."""
+    reports = "\n\n".join(
+        f"=== Report {index}: {question} ===\n{report}"
+        for index, (question, report) in enumerate(parts, 1)
+    )
+    return client.responses.create(
+        model=SYNTHESIS_MODEL,
+        input=SYNTHESIS_PROMPT.format(query=query, reports=reports),
+    )
@@ -0,0 +1,191 @@
+"""Completion prediction from the tool-call timelines of past sessions."""
+
+import math
+import sqlite3
+from pathlib import Path
+
+
+# Fewer comparable past runs than this and the tracker falls back to
+# extrapolating the tool-call rate
+MIN_HISTORY = 3
+MAX_HISTORY = 200
+
+# Quantiles reported as (low, expected, high)
+BAND = (0.1, 0.5, 0.9)
+
+# A run is assumed to go at most this much faster or slower than the past
+# run it is compared with
+MAX_PACE = 2.0
+
+# Weight of a past run whose enabled tools differ from this one's
+OTHER_TOOLS_WEIGHT = 0.3
+
+
+def tools_key(web_search, code_interpreter):
+    """Short description of the enabled tools, used to match past runs."""
+    tools = [name for name, enabled in (("web", web_search), ("code", code_interpreter)) if enabled]
+    return "+".join(tools) or "none"
+
+
+def request_tools_key(request_params):
+    """``tools_key`` of a request's tools."""
+    tool_types = {tool["type"] for tool in request_params.get("tools", [])}
+    return tools_key("web_search_preview" in tool_types, "code_interpreter" in tool_types)
+
+
+def encode_timeline(offsets):
+    """Pack tool-call times (seconds from the start) as comma-separated deltas in tenths of a second."""
+    deltas = []
+    previous = 0
+    for offset in offsets:
+        tenths = int(round(offset * 10))
+        deltas.append(str(max(tenths - previous, 0)))
+        previous = max(tenths, previous)
+    return ",".join(deltas)
+
+
+def decode_timeline(text):
+    """Inverse of ``encode_timeline``."""
+    offsets = []
+    total = 0
+    for delta in text.split(",") if text else []:
+        total += int(delta)
+        offsets.append(total / 10)
+    return offsets
+
+
+class PastRun:
+    """A finished session's tool-call times, total duration and relevance weight."""
+
+    def __init__(self, offsets, duration, weight=1.0):
+        self.offsets = offsets
+        self.duration = max(duration, offsets[-1] if offsets else 0.0)
+        self.weight = weight
+
+    def capped(self, max_tool_calls):
+        """This run as if it had stopped at ``max_tool_calls`` calls, keeping its writing tail."""
+        if len(self.offsets) <= max_tool_calls:
+            return self
+        tail = self.duration - self.offsets[-1]
+        offsets = self.offsets[:max_tool_calls]
+        return PastRun(offsets, (offsets[-1] if offsets else 0.0) + tail, self.weight)
+
+
+def load_history(conn, model, tools, input_chars, limit=MAX_HISTORY):
+    """Recent completed runs of ``model`` from the catalog, weighted by similarity.
+
+    Runs with the same tools count fully, others at ``OTHER_TOOLS_WEIGHT``;
+    the weight also falls off with the ratio of query lengths.
+    """
+    rows = conn.execute(
+        """SELECT input_chars, tools, duration, timeline FROM sessions
+        WHERE model = ? AND timeline IS NOT NULL AND duration IS NOT NULL
+        ORDER BY timestamp DESC LIMIT ?""",
+        (model, limit),
+    ).fetchall()
+    history = []
+    for row in rows:
+        weight = 1.0 if row["tools"] == tools else OTHER_TOOLS_WEIGHT
+        length_ratio = math.log((input_chars + 100) / ((row["input_chars"] or 0) + 100))
+        weight *= math.exp(-abs(length_ratio))
+        history.append(PastRun(decode_timeline(row["timeline"]), row["duration"], weight))
+    return history
+
+
+def _weighted_quantiles(samples, quantiles):
+    """Quantiles of ``(value, weight)`` pairs."""
+    samples = sorted(samples)
+    total = sum(weight for _, weight in samples)
+    results = []
+    for quantile in quantiles:
+        target = quantile * total
+        cumulative = 0.0
+        for value, weight in samples:
+            cumulative += weight
+            if cumulative >= target:
+                results.append(value)
+                break
+        else:
+            results.append(samples[-1][0])
+    return tuple(results)
+
+
+class EtaPredictor:
+    """Predict the final tool-call count and time left from comparable past runs.
+
+    Each past run that made at least as many tool calls as this one has so
+    far is stretched or squeezed to this run's pace at its latest call, and
+    runs that would already have finished by now are dropped. The weighted
+    spread of the remaining ones gives the band. ``observe_call()`` is fed
+    the time of every tool call, and the per-run projections are only
+    recomputed when the call count changes.
+    """
+
+    def __init__(self, history, max_tool_calls):
+        self.history = [run.capped(max_tool_calls) for run in history]
+        self.max_tool_calls = max_tool_calls
+        self.offsets = []
+        self._calls = None
+        self._projections = []
+
+    def observe_call(self, elapsed):
+        """Record that a tool call started ``elapsed`` seconds into the run."""
+        self.offsets.append(elapsed)
+
+    def _project(self, tool_calls):
+        # Time of this run's latest call; unknown for calls restored from a journal
+        own = self.offsets[tool_calls - 1] if 0 < tool_calls <= len(self.offsets) else None
+        projections = []
+        for run in self.history:
+            if len(run.offsets) < tool_calls:
+                continue
+            past = run.offsets[tool_calls - 1] if tool_calls else 0.0
+            if own is None or past <= 0:
+                pace = 1.0
+                reached = past
+            else:
+                pace = min(max(own / past, 1 / MAX_PACE), MAX_PACE)
+                reached = own
+            end = reached + (run.duration - past) * pace
+            projections.append((end, len(run.offsets), run.weight))
+        self._calls = tool_calls
+        self._projections = projections
+
+    def predict(self, elapsed, tool_calls):
+        """``{"remaining": (low, expected, high), "tool_calls": (...), "samples": n}``, or None.
+
+        Returns None when too few comparable runs are known.
+        """
+        if tool_calls != self._calls:
+            self._project(tool_calls)
+        projections = [p for p in self._projections if p[0] > elapsed]
+        if len(projections) < MIN_HISTORY:
+            # Running longer than nearly every past run: count on the slowest few
+            projections = sorted(self._projections, reverse=True)[:MIN_HISTORY]
+            if len(projections) < MIN_HISTORY:
+                return None
+        remaining = _weighted_quantiles([(max(end - elapsed, 0.0), weight) for end, _, weight in projections], BAND)
+        calls = _weighted_quantiles([(max(count, tool_calls), weight) for _, count, weight in projections], BAND)
+        return {"remaining": remaining, "tool_calls": calls, "samples": len(projections)}
+
+
+def load_predictor(base_dir, request_params):
+    """Predictor for a request from the catalog in ``base_dir``, or None without enough history."""
+    # The catalog uses this module's timeline encoding, so import it here
+    from src.catalog import CATALOG_FILENAME, backfill_catalog, open_catalog
+
+    if not (Path(base_dir) / CATALOG_FILENAME).exists():
+        return None
+    try:
+        conn, needs_backfill = open_catalog(base_dir)
+        if needs_backfill:
+            backfill_catalog(conn, base_dir)
+        history = load_history(
+            conn, request_params["model"], request_tools_key(request_params), len(request_params["input"])
+        )
+        conn.close()
+    except sqlite3.Error:
+        return None
+    if len(history) < MIN_HISTORY:
+        return None
+    return EtaPredictor(history, request_params["max_tool_calls"])
@@ -0,0 +1,78 @@
+"""Routing of response stream events to the consumers registered for their type."""
+
+
+CREATED_EVENT_TYPE = "response.created"
+ITEM_ADDED_EVENT_TYPE = "response.output_item.added"
+ITEM_DONE_EVENT_TYPE = "response.output_item.done"
+OUTPUT_DELTA_TYPE = "response.output_text.delta"
+
+# Events carrying the finished response; 'response.done' is kept for older streams
+FINAL_EVENT_TYPES = ("response.completed", "response.failed", "response.incomplete", "response.done")
+
+TOOL_CALL_TYPES = ("web_search_call", "code_interpreter_call", "mcp_tool_call", "file_search_call")
+
+
+class EventDispatcher:
+    """Call the handlers registered for each event's type.
+
+    ``on(types, handler)`` registers a handler for one or more event types
+    and ``on_any(handler)`` one that sees every event, ahead of the typed
+    ones. Handlers are called with the event, in registration order. The
+    handler list for a type is resolved the first time the type is seen, so
+    each event costs one type lookup and one dict lookup however many
+    consumers are attached.
+    """
+
+    def __init__(self):
+        self._any = []
+        self._typed = {}
+        self._routes = {}
+
+    def on(self, event_types, handler):
+        if isinstance(event_types, str):
+            event_types = (event_types,)
+        for event_type in event_types:
+            self._typed.setdefault(event_type, []).append(handler)
+        self._routes.clear()
+
+    def on_any(self, handler):
+        self._any.append(handler)
+        self._routes.clear()
+
+    def dispatch(self, event):
+        """Hand ``event`` to its handlers; returns its type."""
+        event_type = getattr(event, "type", None)
+        handlers = self._routes.get(event_type)
+        if handlers is None:
+            handlers = self._routes[event_type] = tuple(self._any + self._typed.get(event_type, []))
+        for handler in handlers:
+            handler(event)
+        return event_type
+
+
+def count_tool_calls(output):
+    """Tool calls among a response's output items, by type, in one pass."""
+    counts = dict.fromkeys(TOOL_CALL_TYPES, 0)
+    for item in output or []:
+        item_type = getattr(item, "type", None)
+        if item_type in counts:
+            counts[item_type] += 1
+    return counts
+
+
+def summarize_tool_usage(counts):
+    """The ``tool_usage`` metadata entry for tool-call counts by type."""
+    usage = {
+        "web_searches": counts.get("web_search_call", 0),
+        "code_interpreter_calls": counts.get("code_interpreter_call", 0),
+    }
+    if counts.get("mcp_tool_call"):
+        usage["mcp_calls"] = counts["mcp_tool_call"]
+    if counts.get("file_search_call"):
+        usage["file_searches"] = counts["file_search_call"]
+    return usage
+
+
+def response_tool_usage(response):
+    """``summarize_tool_usage`` of a finished response's output items."""
+    return summarize_tool_usage(count_tool_calls(getattr(response, "output", None)))
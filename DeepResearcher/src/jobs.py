@@ -0,0 +1,104 @@
+"""Persistent queue of detached background research jobs."""
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+
+JOBS_FILENAME = "jobs.db"
+
+# Job statuses that still need polling: submitted locally, or queued/in_progress on the API
+PENDING_JOB_STATUSES = ("submitted", "queued", "in_progress")
+
+# A job recorded before its response is created; it has no response to poll yet
+SUBMITTING_STATUS = "submitting"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    query TEXT NOT NULL,
+    query_source TEXT,
+    model TEXT,
+    response_id TEXT,
+    folder TEXT,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    tool_calls INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    submitted_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    polled_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status);
+"""
+
+
+def open_jobs(base_dir):
+    """Open (creating if needed) the job table for a sessions directory."""
+    path = Path(base_dir) / JOBS_FILENAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Submitters and a worker may write at the same time
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def add_job(conn, query, query_source, request_params, response_id, folder, status):
+    """Record a submitted background response; returns the job id."""
+    now = time.time()
+    with conn:
+        cursor = conn.execute(
+            """INSERT INTO jobs (
+                query, query_source, model, response_id, folder, status, request,
+                submitted_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                query, query_source, request_params["model"], response_id, str(folder),
+                status, json.dumps(request_params), now, now,
+            ),
+        )
+    return cursor.lastrowid
+
+
+def pending_jobs(conn):
+    """Jobs whose responses have not finished yet, oldest first."""
+    placeholders = ", ".join("?" * len(PENDING_JOB_STATUSES))
+    return conn.execute(
+        f"SELECT * FROM jobs WHERE status IN ({placeholders}) ORDER BY id", PENDING_JOB_STATUSES
+    ).fetchall()
+
+
+def list_jobs(conn, limit=None, status=None):
+    """Jobs newest first, optionally filtered by status."""
+    sql = "SELECT * FROM jobs"
+    params = []
+    if status:
+        sql += " WHERE status = ?"
+        params.append(status)
+    sql += " ORDER BY id DESC"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def update_job(conn, job_id, **fields):
+    """Update a job's columns and its updated_at time."""
+    fields["updated_at"] = time.time()
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    with conn:
+        conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", [*fields.values(), job_id])
+
+
+def record_poll(conn, job, response, tool_types):
+    """Store a polled response's status and tool-call count; returns True if either changed."""
+    tool_calls = sum(1 for item in (getattr(response, "output", None) or []) if getattr(item, "type", None) in tool_types)
+    if response.status != job["status"] or tool_calls != job["tool_calls"]:
+        update_job(conn, job["id"], status=response.status, tool_calls=tool_calls, polled_at=time.time())
+        return True
+    with conn:
+        conn.execute("UPDATE jobs SET polled_at = ? WHERE id = ?", (time.time(), job["id"]))
+    return False
@@ -0,0 +1,102 @@
+"""Append-only on-disk journal of research stream events."""
+
+import json
+from collections import deque
+from pathlib import Path
+
+
+JOURNAL_FILENAME = "events.jsonl"
+
+
+def event_to_dict(event):
+    """Convert a stream event into a JSON-serialisable dict."""
+    if isinstance(event, dict):
+        return event
+    if hasattr(event, "to_dict"):
+        return event.to_dict()
+    if hasattr(event, "model_dump"):
+        return event.model_dump()
+    return dict(vars(event))
+
+
+def iter_journal(path):
+    """Lazily yield event dicts from a journal file, one line at a time."""
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class EventJournal:
+    """Write stream events to a JSONL file as they arrive.
+
+    Only the last ``ring_size`` events are kept in memory (``recent``), so
+    memory stays flat regardless of how long the stream runs. Iterating the
+    journal re-reads events lazily from disk.
+
+    A journal may be created before its session folder exists; events are
+    held in memory until ``attach()`` gives it a path, then flushed to disk.
+    With ``hold=False`` nothing is held and an unattached journal keeps only
+    the ring buffer (used when the session is not being saved).
+    """
+
+    def __init__(self, path=None, ring_size=50, hold=True):
+        self.path = None
+        self.recent = deque(maxlen=ring_size)
+        self.count = 0
+        self.hold = hold
+        self._file = None
+        self._pending = []
+        self._closed = False
+        if path:
+            self.attach(path)
+
+    def attach(self, path):
+        """Start writing to ``path``, flushing any events held so far."""
+        self.path = Path(path)
+        self._file = open(self.path, "a", buffering=1)
+        for record in self._pending:
+            self._write(record)
+        self._pending = []
+        # The stream may have finished before the folder was ready
+        if self._closed:
+            self.close()
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, default=str) + "\n")
+
+    def append(self, event):
+        """Record an event."""
+        self.recent.append(event)
+        self.count += 1
+        if self._file:
+            self._write(event_to_dict(event))
+        elif self.hold:
+            self._pending.append(event_to_dict(event))
+
+    def close(self):
+        """Close the underlying file."""
+        self._closed = True
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Iterate over every recorded event as a dict, reading from disk."""
+        if self.path is None:
+            if self.hold:
+                return iter(self._pending)
+            return (event_to_dict(event) for event in self.recent)
+        if self._file:
+            self._file.flush()
+        return iter_journal(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
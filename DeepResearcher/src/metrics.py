@@ -0,0 +1,290 @@
+"""Per-session timings and stream event metrics, with Prometheus and JSON lines export."""
+
+import bisect
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.events import FINAL_EVENT_TYPES, ITEM_ADDED_EVENT_TYPE, ITEM_DONE_EVENT_TYPE, TOOL_CALL_TYPES
+from src.utils import write_text_atomic
+
+
+# Upper bounds (seconds) of the histogram buckets; a final bucket catches the rest
+HISTOGRAM_BUCKETS = (0.001, 0.01, 0.1, 0.5, 1, 5, 15, 60, 300)
+
+
+class Histogram:
+    """Count, sum, max and bucketed counts of observed durations."""
+
+    def __init__(self, counts=None, total=0.0, maximum=0.0):
+        self.counts = list(counts) if counts else [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.sum = total
+        self.max = maximum
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(HISTOGRAM_BUCKETS, value)] += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def to_dict(self):
+        return {"count": self.count, "sum": round(self.sum, 4), "max": round(self.max, 4), "counts": self.counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("counts"), data.get("sum", 0.0), data.get("max", 0.0))
+
+
+class RunMetrics:
+    """Timers and histograms for one research run.
+
+    ``phase()`` times a named block (folder naming, cache check, final
+    retrieve, ...). Subscribed to a stream's events, it records time to
+    first event and the gap before each event by event type (``observe()``),
+    each tool call's start time and latency from ``output_item.added`` to
+    ``output_item.done``, and the final response's token usage.
+    ``ui_seconds`` accumulates time spent notifying and rendering the
+    progress display.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.events = {}
+        self.tool_latency = {}
+        self.tool_call_offsets = []
+        self.usage = None
+        self.ui_seconds = 0.0
+        self.resumed = False
+        self._start = None
+        self._first_event = None
+        self._last_event = None
+        self._end = None
+        self._open_tools = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block, adding to the phase's total."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def start(self):
+        """Mark the moment the research request was sent."""
+        self._start = self._last_event = time.perf_counter()
+
+    def observe(self, event):
+        """Record an incoming stream event."""
+        now = time.perf_counter()
+        if self._start is None:
+            self.start()
+        if self._first_event is None:
+            self._first_event = now
+            self.phases["time_to_first_event"] = now - self._start
+        event_type = getattr(event, "type", None) or "unknown"
+        histogram = self.events.get(event_type)
+        if histogram is None:
+            histogram = self.events[event_type] = Histogram()
+        histogram.observe(now - self._last_event)
+        self._last_event = now
+
+    def subscribe(self, dispatcher):
+        """Record the stream events routed by ``dispatcher``."""
+        dispatcher.on_any(self.observe)
+        dispatcher.on(ITEM_ADDED_EVENT_TYPE, self._on_item_added)
+        dispatcher.on(ITEM_DONE_EVENT_TYPE, self._on_item_done)
+        dispatcher.on(FINAL_EVENT_TYPES, self._on_final)
+
+    def _on_item_added(self, event):
+        # Runs right after observe(), whose timestamp it shares
+        if getattr(event.item, "type", None) in TOOL_CALL_TYPES:
+            self._open_tools[getattr(event.item, "id", None)] = self._last_event
+            self.tool_call_offsets.append(round(self._last_event - self._start, 1))
+
+    def _on_item_done(self, event):
+        item_type = getattr(event.item, "type", None)
+        item_id = getattr(event.item, "id", None)
+        if item_type in TOOL_CALL_TYPES and item_id in self._open_tools:
+            latency = self.tool_latency.get(item_type)
+            if latency is None:
+                latency = self.tool_latency[item_type] = Histogram()
+            latency.observe(self._last_event - self._open_tools.pop(item_id))
+
+    def _on_final(self, event):
+        self.record_usage(getattr(event, "response", None))
+
+    def record_usage(self, response):
+        """Keep a finished response's token usage."""
+        usage = getattr(response, "usage", None)
+        if not usage:
+            return
+        details = getattr(usage, "output_tokens_details", None)
+        self.usage = {
+            "input_tokens": getattr(usage, "input_tokens", None),
+            "output_tokens": getattr(usage, "output_tokens", None),
+            "reasoning_tokens": getattr(details, "reasoning_tokens", None) if details else None,
+        }
+
+    def finish(self):
+        """Mark the end of the stream."""
+        self._end = time.perf_counter()
+        if self._start is not None:
+            self.phases["stream"] = self._end - self._start
+
+    def to_dict(self):
+        """Compact summary for ``metadata.json``."""
+        total = sum(h.count for h in self.events.values())
+        streaming = (self._last_event - self._first_event) if self._first_event is not None else 0.0
+        return {
+            "phases": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            "events": {
+                "total": total,
+                "per_second": round(total / streaming, 2) if streaming > 0 else None,
+                "gap_seconds": {name: h.to_dict() for name, h in sorted(self.events.items())},
+            },
+            "tool_call_latency_seconds": {name: h.to_dict() for name, h in sorted(self.tool_latency.items())},
+            "tool_call_offsets": self.tool_call_offsets,
+            "usage": self.usage,
+            "ui_seconds": round(self.ui_seconds, 4),
+            "resumed": self.resumed,
+        }
+
+
+def _labels(labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+def _prometheus_histogram(lines, name, labels, data):
+    cumulative = 0
+    for bound, count in zip(list(HISTOGRAM_BUCKETS) + ["+Inf"], data["counts"]):
+        cumulative += count
+        lines.append(f"{name}_bucket{{{_labels(dict(labels, le=bound))}}} {cumulative}")
+    lines.append(f"{name}_sum{{{_labels(labels)}}} {data['sum']}")
+    lines.append(f"{name}_count{{{_labels(labels)}}} {data['count']}")
+
+
+def prometheus_text(entries):
+    """Render ``(metrics, labels)`` pairs in the Prometheus text exposition format."""
+    families = {
+        "deep_research_phase_seconds": ("gauge", []),
+        "deep_research_events_per_second": ("gauge", []),
+        "deep_research_event_gap_seconds": ("histogram", []),
+        "deep_research_tool_call_latency_seconds": ("histogram", []),
+        "deep_research_tokens": ("gauge", []),
+        "deep_research_ui_seconds": ("gauge", []),
+    }
+
+    def gauge(name, labels, value):
+        families[name][1].append(f"{name}{{{_labels(labels)}}} {value}")
+
+    for metrics, labels in entries:
+        for phase, seconds in metrics["phases"].items():
+            gauge("deep_research_phase_seconds", dict(labels, phase=phase), seconds)
+        gauge("deep_research_events_per_second", labels, metrics["events"]["per_second"] or 0)
+        for event_type, data in metrics["events"]["gap_seconds"].items():
+            _prometheus_histogram(
+                families["deep_research_event_gap_seconds"][1], "deep_research_event_gap_seconds",
+                dict(labels, type=event_type), data
+            )
+        for tool, data in metrics["tool_call_latency_seconds"].items():
+            _prometheus_histogram(
+                families["deep_research_tool_call_latency_seconds"][1], "deep_research_tool_call_latency_seconds",
+                dict(labels, tool=tool), data
+            )
+        for kind, tokens in (metrics["usage"] or {}).items():
+            if tokens is not None:
+                gauge("deep_research_tokens", dict(labels, kind=kind), tokens)
+        gauge("deep_research_ui_seconds", labels, metrics["ui_seconds"])
+
+    lines = []
+    for name, (metric_type, samples) in families.items():
+        if samples:
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+def export_metrics(path, entries):
+    """Write ``(metrics, labels)`` pairs to ``path``.
+
+    ``.prom`` files are replaced with Prometheus text (atomically, so a
+    textfile collector never reads half a file); anything else gets one JSON
+    line appended per entry.
+    """
+    path = Path(path)
+    if path.suffix == ".prom":
+        write_text_atomic(path, prometheus_text(entries))
+    else:
+        with open(path, "a") as f:
+            for metrics, labels in entries:
+                f.write(json.dumps(dict(labels, metrics=metrics)) + "\n")
+
+
+def _percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else None
+
+
+def aggregate_metrics(sessions):
+    """Summarise recorded session metrics per model.
+
+    ``sessions`` are catalog rows with decoded ``metrics`` (see
+    ``catalog.session_metrics``). Returns ``{model: summary}``.
+    """
+    from types import SimpleNamespace
+
+    from src.budget import usage_cost
+
+    by_model = {}
+    for session in sessions:
+        by_model.setdefault(session["model"] or "unknown", []).append(session)
+
+    summary = {}
+    for model, group in sorted(by_model.items()):
+        runs = [session["metrics"] for session in group]
+        durations = [run["phases"]["stream"] for run in runs if "stream" in run["phases"]]
+        first_event = [run["phases"]["time_to_first_event"] for run in runs if "time_to_first_event" in run["phases"]]
+        naming = [run["phases"]["folder_naming"] for run in runs if "folder_naming" in run["phases"]]
+        rates = [run["events"]["per_second"] for run in runs if run["events"].get("per_second")]
+        tool_calls = [(session["web_searches"] or 0) + (session["code_calls"] or 0) for session in group]
+
+        latency_sum = latency_count = 0
+        for run in runs:
+            for data in run["tool_call_latency_seconds"].values():
+                latency_sum += data["sum"]
+                latency_count += data["count"]
+
+        usages = [run["usage"] for run in runs if run.get("usage")]
+        costs = [usage_cost(model, SimpleNamespace(**usage)) for usage in usages]
+        costs = [cost for cost in costs if cost is not None]
+
+        ui_share = [run["ui_seconds"] / run["phases"]["stream"] for run in runs if run["phases"].get("stream")]
+        summary[model] = {
+            "sessions": len(group),
+            "duration_p50": _percentile(durations, 0.5) if durations else None,
+            "duration_p90": _percentile(durations, 0.9) if durations else None,
+            "first_event_p50": _percentile(first_event, 0.5) if first_event else None,
+            "events_per_second": _mean(rates),
+            "tool_calls_p50": _percentile(tool_calls, 0.5) if tool_calls else None,
+            "tool_call_latency_mean": latency_sum / latency_count if latency_count else None,
+            "input_tokens_mean": _mean([usage["input_tokens"] or 0 for usage in usages]),
+            "output_tokens_mean": _mean([usage["output_tokens"] or 0 for usage in usages]),
+            "cost_total": sum(costs) if costs else None,
+            "cost_mean": _mean(costs),
+            "folder_naming_mean": _mean(naming),
+            "ui_share": _mean(ui_share),
+        }
+    return summary
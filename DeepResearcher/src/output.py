@@ -0,0 +1,101 @@
+"""Incremental, crash-safe writing of the report text as it streams in."""
+
+import os
+import time
+from pathlib import Path
+
+from src.events import OUTPUT_DELTA_TYPE
+
+
+# Buffered text is written out once it reaches FLUSH_BYTES or is FLUSH_INTERVAL
+# seconds old, and fsynced at most every FSYNC_INTERVAL seconds
+FLUSH_BYTES = 8192
+FLUSH_INTERVAL = 1.0
+FSYNC_INTERVAL = 5.0
+
+
+def output_path(folder):
+    """Path of a session folder's report file."""
+    folder = Path(folder)
+    return folder / f"{folder.name}_output.md"
+
+
+class OutputWriter:
+    """Append report text deltas to the session's output file as they arrive.
+
+    Writes are batched and the file is fsynced periodically, so a crash loses
+    at most the last few seconds of text and ``tail -f`` shows the report as
+    it is written. Like the event journal, a writer can be created before the
+    session folder exists; text is held until ``attach()`` gives it a path.
+    Once the run completes, ``save_research_session()`` atomically replaces the
+    file with the final ``output_text``.
+    """
+
+    def __init__(self, path=None):
+        self.path = None
+        self.chars = 0
+        self._file = None
+        self._buffer = []
+        self._buffered = 0
+        self._closed = False
+        self._last_flush = time.monotonic()
+        self._last_fsync = self._last_flush
+        if path:
+            self.attach(path)
+
+    def attach(self, path):
+        """Start writing to ``path`` (truncating it), flushing any text held so far."""
+        self.path = Path(path)
+        self._file = open(self.path, "w")
+        self.flush()
+        # The stream may have finished before the folder was ready
+        if self._closed:
+            self.close()
+
+    def subscribe(self, dispatcher):
+        """Write the report text deltas routed by ``dispatcher``."""
+        dispatcher.on(OUTPUT_DELTA_TYPE, self._on_delta)
+
+    def _on_delta(self, event):
+        self.write(event.delta or "")
+
+    def write(self, text):
+        """Buffer report text, writing it out when the batch is large or old enough."""
+        if not text:
+            return
+        self._buffer.append(text)
+        self._buffered += len(text)
+        self.chars += len(text)
+        if self._file and (
+            self._buffered >= FLUSH_BYTES or time.monotonic() - self._last_flush >= FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def flush(self, fsync=False):
+        """Write buffered text to the file, fsyncing if due (or if ``fsync``)."""
+        if not self._file:
+            return
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+            self._file.flush()
+        now = time.monotonic()
+        self._last_flush = now
+        if fsync or now - self._last_fsync >= FSYNC_INTERVAL:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def close(self):
+        """Flush and fsync everything written so far, then close the file."""
+        self._closed = True
+        if self._file:
+            self.flush(fsync=True)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,114 @@
+"""Fast provisional answer from a general model while deep research runs."""
+
+import threading
+import time
+from datetime import datetime
+
+from src.store import SessionStore
+
+
+PREVIEW_MODEL = "gpt-5-mini"
+
+PREVIEW_PROMPT = """Give a concise preliminary answer to the research request below. A full deep research report is being produced in parallel; this answer only has to be good enough to act on until it arrives.
+
+- Lead with the direct answer, then the key supporting points, citing sources where you have them.
+- Say where you are unsure or where the full report is likely to add to or change the answer.
+
+Research request:
+{query}"""
+
+
+def preview_path(folder):
+    """Path of a session's preliminary answer."""
+    return folder / f"{folder.name}_preview.md"
+
+
+class Preview:
+    """A preliminary answer requested alongside the deep research.
+
+    ``start()`` sends the request from a background thread and calls
+    ``on_ready(preview)`` once the answer (or ``error``) is in. Like the
+    event journal, the answer can arrive before the session folder exists:
+    it is written to ``*_preview.md``, together with a ``metadata.json``
+    marked provisional, as soon as both are available. ``finish()`` stops
+    further metadata writes before the final session is saved.
+    """
+
+    def __init__(self, client, query, research_model, web_search=True, on_ready=None):
+        self.client = client
+        self.query = query
+        self.research_model = research_model
+        self.web_search = web_search
+        self.on_ready = on_ready
+        self.text = None
+        self.error = None
+        self.seconds = None
+        self.folder = None
+        self.path = None
+        self._finished = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            response = self.client.responses.create(
+                model=PREVIEW_MODEL,
+                reasoning={"effort": "low"},
+                input=PREVIEW_PROMPT.format(query=self.query),
+                tools=[{"type": "web_search_preview"}] if self.web_search else [],
+            )
+            text = response.output_text
+            if not text:
+                raise RuntimeError(f"empty answer (status: {response.status})")
+        except Exception as e:
+            with self._lock:
+                self.error = str(e)
+        else:
+            with self._lock:
+                self.text = text
+                self.seconds = time.perf_counter() - start
+                self._save()
+        if self.on_ready:
+            self.on_ready(self)
+
+    def attach(self, folder):
+        """Save the answer into the session folder, now or once it arrives."""
+        with self._lock:
+            self.folder = folder
+            self._save()
+
+    def _save(self):
+        if not self.folder or self.text is None or self.path:
+            return
+        store = SessionStore(self.folder.parent)
+        self.path = store.write_text(self.folder, preview_path(self.folder).name, self.text)
+        if not self._finished:
+            store.write_json(self.folder, "metadata.json", {
+                "timestamp": datetime.now().isoformat(),
+                "query": self.query,
+                "model": self.research_model,
+                "status": "in_progress",
+                "provisional": True,
+                "preview": self.summary(),
+            })
+
+    def finish(self):
+        """Stop writing provisional metadata; returns the summary for the final metadata."""
+        with self._lock:
+            self._finished = True
+            return self.summary()
+
+    def summary(self):
+        summary = {"model": PREVIEW_MODEL}
+        if self.path:
+            summary["file"] = self.path.name
+        if self.seconds is not None:
+            summary["seconds"] = round(self.seconds, 1)
+        if self.error:
+            summary["error"] = self.error
+        elif self.text is None:
+            summary["error"] = "not ready before the research finished"
+        return summary
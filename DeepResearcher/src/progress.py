@@ -0,0 +1,152 @@
+"""Progress reporters for research runs: rich live panel or headless lines."""
+
+import json
+import sys
+import threading
+import time
+
+from src.utils import format_duration
+
+
+PROGRESS_MODES = ["rich", "plain", "json", "none"]
+
+
+def default_progress_mode():
+    """Rich live display on a terminal, plain lines otherwise (CI, cron, nohup)."""
+    return "rich" if sys.stdout.isatty() else "plain"
+
+
+class LiveProgress:
+    """Rich live panel that re-renders only when something visible changes.
+
+    The stream thread only calls ``notify()``; rendering happens on a
+    background thread, at most ``max_fps`` times a second, and only when the
+    tracker's state or the elapsed-seconds clock has changed.
+    """
+
+    def __init__(self, tracker, console, max_fps=4):
+        self.tracker = tracker
+        self.console = console
+        self.min_interval = 1.0 / max_fps
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._seen_version = None
+        self._live = None
+        self._thread = None
+        self.render_seconds = 0.0
+
+    def __enter__(self):
+        from rich.live import Live
+        self._live = Live(self.tracker.create_display(), console=self.console, auto_refresh=False)
+        self._live.start(refresh=True)
+        self._thread = threading.Thread(target=self._render_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def _render_loop(self):
+        rendered = None
+        while not self._stop.is_set():
+            # Wake on a change, or once a second for the elapsed-time clock
+            self._wake.wait(timeout=1.0)
+            self._wake.clear()
+            key = (self.tracker.version, self.tracker.get_elapsed_seconds())
+            if key != rendered:
+                render_start = time.perf_counter()
+                self._live.update(self.tracker.create_display(), refresh=True)
+                self.render_seconds += time.perf_counter() - render_start
+                rendered = key
+            time.sleep(self.min_interval)
+
+    def notify(self):
+        """Tell the renderer the tracker may have changed."""
+        version = self.tracker.version
+        if version != self._seen_version:
+            self._seen_version = version
+            self._wake.set()
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._live.update(self.tracker.create_display(), refresh=True)
+        self._live.stop()
+
+
+class LineProgress:
+    """Headless reporter that writes one compact line per tracker state change."""
+
+    def __init__(self, tracker, stream=None, label=None):
+        self.tracker = tracker
+        self.stream = stream or sys.stderr
+        self.label = label
+        self._seen_version = None
+
+    def __enter__(self):
+        self.notify()
+        return self
+
+    def notify(self):
+        """Emit a line if the tracker changed since the last one."""
+        version = self.tracker.version
+        if version == self._seen_version:
+            return
+        self._seen_version = version
+        self.stream.write(self.format(self.tracker.snapshot()) + "\n")
+        self.stream.flush()
+
+    def format(self, snapshot):
+        elapsed = snapshot["elapsed_seconds"]
+        parts = [
+            f"[{elapsed // 3600}:{elapsed // 60 % 60:02d}:{elapsed % 60:02d}]",
+            f"{snapshot['tool_calls']}/{snapshot['max_tool_calls']} calls",
+            f"web={snapshot['web_searches']}",
+        ]
+        if snapshot["code_calls"]:
+            parts.append(f"code={snapshot['code_calls']}")
+        parts.append(snapshot["status"])
+        if snapshot["eta_seconds"] is not None and snapshot["status"] == "running":
+            parts.append(f"eta={format_duration(snapshot['eta_seconds'])}")
+        if snapshot["last_action"]:
+            parts.append(f"| {snapshot['last_action']}")
+        if self.label:
+            parts.insert(0, f"{self.label}:")
+        return " ".join(parts)
+
+    def __exit__(self, *exc):
+        self.notify()
+
+
+class JsonProgress(LineProgress):
+    """Headless reporter that writes one JSON object per tracker state change."""
+
+    def format(self, snapshot):
+        if self.label:
+            snapshot = dict(snapshot, label=self.label)
+        return json.dumps(snapshot)
+
+
+class NoProgress:
+    """Reporter that shows nothing."""
+
+    def __init__(self, tracker=None):
+        self.tracker = tracker
+
+    def __enter__(self):
+        return self
+
+    def notify(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+def make_progress(mode, tracker, console, label=None):
+    """Create the reporter for a ``--progress`` mode."""
+    if mode == "rich":
+        return LiveProgress(tracker, console)
+    if mode == "plain":
+        return LineProgress(tracker, label=label)
+    if mode == "json":
+        return JsonProgress(tracker, label=label)
+    return NoProgress(tracker)
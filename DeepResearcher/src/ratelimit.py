@@ -0,0 +1,308 @@
+"""Request rate and concurrency limits shared by every research process on this machine."""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: the limits only coordinate threads of one process
+    fcntl = None
+
+
+STATE_DIR = Path.home() / ".cache" / "deep_research"
+
+# Requests per minute per model, and research streams open at once across all
+# processes; override with DEEP_RESEARCH_RPM and DEEP_RESEARCH_MAX_STREAMS
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_MAX_STREAMS = 8
+
+# Requests a model's bucket can send back to back after a quiet spell
+BURST = 5
+
+# Seconds between checks for a free stream slot
+SLOT_POLL_INTERVAL = 5.0
+
+# 429s and overloaded servers are retried with full-jitter exponential
+# backoff (never shorter than Retry-After) for up to MAX_RETRY_SECONDS
+RETRY_STATUS_CODES = (429, 502, 503)
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+MAX_RETRY_SECONDS = 900.0
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    if fcntl is None:
+        # Not shared between processes here, and os.kill(pid, 0) would terminate it
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def retry_after(error):
+    """Seconds to wait before retrying a failed request, 0 for no hint, or None if it should not be retried."""
+    if getattr(error, "status_code", None) not in RETRY_STATUS_CODES:
+        return None
+    # An exhausted quota is also a 429, but waiting will not fix it
+    if getattr(error, "code", None) == "insufficient_quota":
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        pass
+    return 0.0
+
+
+class RateLimiter:
+    """A token bucket per model and a stream semaphore, kept in a locked JSON file.
+
+    Every process using the same API key shares the file, so runs started
+    from cron, other terminals or scripts take turns instead of tripping the
+    API's limits. Stream slots are tagged with the owning pid and reclaimed
+    once that process is gone. A 429 blocks the model for every process
+    until its Retry-After has passed.
+    """
+
+    def __init__(self, path, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, max_streams=DEFAULT_MAX_STREAMS):
+        self.path = Path(path)
+        self.requests_per_minute = requests_per_minute
+        self.max_streams = max_streams
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _state(self):
+        """Lock the state file and yield its contents; changes are written back on success."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path, "a+") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                state = json.loads(f.read() or "{}")
+            except ValueError:
+                state = {}
+            yield state
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state))
+            f.flush()
+
+    def try_acquire(self, model, stream=False):
+        """Take a request token (and a stream slot) if available.
+
+        Returns ``(0, slot_id)`` on success, or the seconds to wait before
+        trying again and None.
+        """
+        now = time.time()
+        rate = self.requests_per_minute / 60
+        with self._state() as state:
+            blocked_until = state.get("blocked_until", {}).get(model, 0)
+            if blocked_until > now:
+                return blocked_until - now, None
+
+            slots = state.setdefault("streams", {})
+            if stream:
+                for slot_id, pid in list(slots.items()):
+                    if not _pid_alive(pid):
+                        del slots[slot_id]
+                if len(slots) >= self.max_streams:
+                    return SLOT_POLL_INTERVAL, None
+
+            bucket = state.setdefault("buckets", {}).setdefault(model, {"tokens": BURST, "updated": now})
+            tokens = min(BURST, bucket["tokens"] + (now - bucket["updated"]) * rate)
+            bucket["updated"] = now
+            if tokens < 1:
+                bucket["tokens"] = tokens
+                return (1 - tokens) / rate, None
+            bucket["tokens"] = tokens - 1
+
+            slot_id = None
+            if stream:
+                slot_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+                slots[slot_id] = os.getpid()
+            return 0, slot_id
+
+    def release(self, slot_id):
+        """Give back a stream slot."""
+        if slot_id:
+            with self._state() as state:
+                state.get("streams", {}).pop(slot_id, None)
+
+    def block(self, model, seconds):
+        """Hold back every process's requests to ``model`` for ``seconds``."""
+        with self._state() as state:
+            blocked_until = state.setdefault("blocked_until", {})
+            blocked_until[model] = max(blocked_until.get(model, 0), time.time() + seconds)
+
+
+_limiters = {}
+
+
+def shared_limiter(api_key):
+    """The limiter for an API key, configured from the environment."""
+    key = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    if key not in _limiters:
+        _limiters[key] = RateLimiter(
+            STATE_DIR / f"ratelimit-{key}.json",
+            float(os.environ.get("DEEP_RESEARCH_RPM", DEFAULT_REQUESTS_PER_MINUTE)),
+            int(os.environ.get("DEEP_RESEARCH_MAX_STREAMS", DEFAULT_MAX_STREAMS)),
+        )
+    return _limiters[key]
+
+
+def _backoff(attempt, hint):
+    return max(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)), hint)
+
+
+class _HeldStream:
+    """A response stream that gives back its stream slot once it ends or is closed."""
+
+    def __init__(self, stream, limiter, slot_id):
+        self._stream = stream
+        self._limiter = limiter
+        self._slot_id = slot_id
+
+    def _release(self):
+        slot_id, self._slot_id = self._slot_id, None
+        self._limiter.release(slot_id)
+
+    def __iter__(self):
+        try:
+            yield from self._stream
+        finally:
+            self._release()
+
+    async def __aiter__(self):
+        try:
+            async for event in self._stream:
+                yield event
+        finally:
+            self._release()
+
+    def close(self):
+        self._release()
+        return self._stream.close()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class _LimitedResponses:
+    def __init__(self, responses, limiter, notify):
+        self._responses = responses
+        self._limiter = limiter
+        self._notify = notify
+
+    def __getattr__(self, name):
+        return getattr(self._responses, name)
+
+    def _waiting(self, model, seconds, stream):
+        if self._notify and seconds >= 1:
+            what = "a free research stream slot or the " if stream else "the "
+            self._notify(f"Waiting for {what}{model} request rate limit shared with other runs...")
+
+    def create(self, **kwargs):
+        model = kwargs.get("model", "")
+        stream = bool(kwargs.get("stream"))
+        waited = 0.0
+        attempt = 0
+        notified = False
+        while True:
+            while True:
+                wait, slot_id = self._limiter.try_acquire(model, stream)
+                if not wait:
+                    break
+                if not notified:
+                    self._waiting(model, wait, stream)
+                    notified = True
+                time.sleep(wait + random.uniform(0, 0.25))
+            try:
+                result = self._responses.create(**kwargs)
+            except Exception as e:
+                self._limiter.release(slot_id)
+                hint = retry_after(e)
+                if hint is None or waited >= MAX_RETRY_SECONDS:
+                    raise
+                delay = _backoff(attempt, hint)
+                self._limiter.block(model, delay)
+                if self._notify:
+                    self._notify(f"{model} is rate limited or overloaded; retrying in {delay:.0f}s")
+                waited += delay
+                attempt += 1
+                continue
+            return _HeldStream(result, self._limiter, slot_id) if slot_id else result
+
+
+class _AsyncLimitedResponses(_LimitedResponses):
+    async def create(self, **kwargs):
+        model = kwargs.get("model", "")
+        stream = bool(kwargs.get("stream"))
+        waited = 0.0
+        attempt = 0
+        while True:
+            while True:
+                wait, slot_id = self._limiter.try_acquire(model, stream)
+                if not wait:
+                    break
+                await asyncio.sleep(wait + random.uniform(0, 0.25))
+            try:
+                result = await self._responses.create(**kwargs)
+            except Exception as e:
+                self._limiter.release(slot_id)
+                hint = retry_after(e)
+                if hint is None or waited >= MAX_RETRY_SECONDS:
+                    raise
+                delay = _backoff(attempt, hint)
+                self._limiter.block(model, delay)
+                waited += delay
+                attempt += 1
+                continue
+            return _HeldStream(result, self._limiter, slot_id) if slot_id else result
+
+
+class LimitedClient:
+    """An OpenAI or AsyncOpenAI client whose ``responses.create`` waits for the shared limits.
+
+    Creating a streamed response holds a stream slot until the stream ends;
+    other calls only take a request token. Rate limit and overload errors
+    are retried. ``notify(message)`` is told about waits and retries (the
+    async client stays quiet, as the batch dashboard owns the terminal).
+    """
+
+    def __init__(self, client, limiter, notify=None):
+        from openai import AsyncOpenAI
+
+        self._client = client
+        responses_class = _AsyncLimitedResponses if isinstance(client, AsyncOpenAI) else _LimitedResponses
+        self.responses = responses_class(client.responses, limiter, notify)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def limit_client(client, api_key, notify=None):
+    """Wrap a client in the shared limits for its API key."""
+    return LimitedClient(client, shared_limiter(api_key), notify)
@@ -0,0 +1,156 @@
+"""Persisted session state for resuming research after a disconnect or crash."""
+
+import json
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from src.events import EventDispatcher
+from src.journal import JOURNAL_FILENAME, iter_journal
+from src.utils import write_json_atomic
+
+
+STATE_FILENAME = "session.json"
+
+# Minimum seconds between state-file rewrites for sequence number updates;
+# the journal is the per-event record, the state file is the fast index
+SAVE_INTERVAL = 2.0
+
+PENDING_STATUSES = ("queued", "in_progress")
+
+
+class SessionState:
+    """The response_id and stream position of a research session.
+
+    ``session.json`` is written as soon as the response_id is known so that a
+    killed process can reattach with ``--resume <folder>``. Like the event
+    journal, state can be created before the folder exists and attached later.
+    """
+
+    def __init__(self, data, path=None):
+        self.data = data
+        self.path = None
+        self._last_save = 0.0
+        if path:
+            self.attach(path)
+
+    @classmethod
+    def create(cls, request_params, query_source, path=None, query=None):
+        """Create state for a new research request.
+
+        ``query`` is the query as the user gave it, before known sources were
+        added to the request input; resume saves the session under it.
+        """
+        data = {
+            "status": "started",
+            "response_id": None,
+            "last_sequence_number": None,
+            "query": query,
+            "query_source": query_source,
+            "started_at": time.time(),
+            "request": request_params,
+        }
+        return cls(data, path)
+
+    @classmethod
+    def load(cls, folder):
+        """Load the state saved in a session folder."""
+        path = Path(folder) / STATE_FILENAME
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(data, path)
+
+    @property
+    def response_id(self):
+        return self.data.get("response_id")
+
+    @property
+    def last_sequence_number(self):
+        return self.data.get("last_sequence_number")
+
+    @property
+    def request(self):
+        return self.data["request"]
+
+    def attach(self, path):
+        """Start persisting to ``path``."""
+        self.path = Path(path)
+        self.save()
+
+    def save(self):
+        """Write the state file now."""
+        if self.path:
+            write_json_atomic(self.path, self.data)
+            self._last_save = time.time()
+
+    def record_response_id(self, response_id):
+        """Persist the response_id immediately."""
+        self.data["response_id"] = response_id
+        self.data["status"] = "streaming"
+        self.save()
+
+    def record_event(self, event):
+        """Track the last processed sequence number, saving at most every few seconds."""
+        sequence_number = getattr(event, "sequence_number", None)
+        if sequence_number is None:
+            return
+        self.data["last_sequence_number"] = sequence_number
+        if time.time() - self._last_save >= SAVE_INTERVAL:
+            self.save()
+
+    def mark(self, status):
+        """Record a terminal status (completed, cancelled, failed) and save."""
+        self.data["status"] = status
+        self.save()
+
+
+def record_to_event(record):
+    """Turn a journal record back into an attribute-access event object."""
+    if isinstance(record, dict):
+        return SimpleNamespace(**{k: record_to_event(v) for k, v in record.items()})
+    if isinstance(record, list):
+        return [record_to_event(v) for v in record]
+    return record
+
+
+def replay_journal(folder):
+    """Yield events from a session's journal as attribute-access objects."""
+    path = Path(folder) / JOURNAL_FILENAME
+    if not path.exists():
+        return
+    for record in iter_journal(path):
+        yield record_to_event(record)
+
+
+def restore_tracker(tracker, folder, state, output=None):
+    """Rebuild tracker counters from the journal and return the resume position.
+
+    The returned sequence number is the later of the state file's and the
+    journal's, since the state file is only saved every few seconds. Report
+    text from the journal is replayed into ``output``, which recovers any
+    text that was still buffered when the previous run died.
+    """
+    tracker.start_time = state.data.get("started_at", tracker.start_time)
+    last_sequence_number = state.last_sequence_number
+    dispatcher = EventDispatcher()
+    tracker.subscribe(dispatcher)
+    if output:
+        output.subscribe(dispatcher)
+    for event in replay_journal(folder):
+        dispatcher.dispatch(event)
+        sequence_number = getattr(event, "sequence_number", None)
+        if sequence_number is not None and (last_sequence_number is None or sequence_number > last_sequence_number):
+            last_sequence_number = sequence_number
+    tracker.status = "running"
+    return last_sequence_number
+
+
+def poll_response(client, response_id, console, interval=10.0, max_interval=60.0):
+    """Poll a background response until it leaves the queued/in_progress states."""
+    with console.status(f"[cyan]Waiting for research to finish (ID: {response_id})...[/cyan]"):
+        while True:
+            response = client.responses.retrieve(response_id)
+            if response.status not in PENDING_STATUSES:
+                return response
+            time.sleep(interval)
+            interval = min(interval * 1.5, max_interval)
@@ -0,0 +1,150 @@
+"""Index of the sources cited by past sessions, for seeding new research with them."""
+
+import re
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.utils import query_terms
+
+
+# Known sources added to a seeded query by default
+DEFAULT_SEED_SOURCES = 12
+
+# Longest finding kept per cited source
+MAX_FINDING_CHARS = 300
+
+# Inline citations as deep research writes them: ([label](url))
+CITATION_PATTERN = re.compile(r"\(\[([^\]]*)\]\((https?://[^)\s]+)\)\)")
+
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+SEED_HEADER = (
+    "Sources already found by earlier research (check them as needed instead of searching for them again, "
+    "and spend searches on what they do not cover):"
+)
+
+
+def normalize_url(url):
+    """Canonical form of a URL for deduplication: no fragment or tracking parameters."""
+    parts = urlsplit(url.strip())
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ])
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def _finding(text, position):
+    """The sentence of ``text`` ending at ``position``, where a citation is attached."""
+    start = max(text.rfind(". ", 0, position), text.rfind("\n", 0, position))
+    sentence = CITATION_PATTERN.sub("", text[start + 1:position]).strip(" -*#>\n")
+    sentence = " ".join(sentence.split())
+    if len(sentence) > MAX_FINDING_CHARS:
+        sentence = "…" + sentence[-MAX_FINDING_CHARS:].split(" ", 1)[-1]
+    return sentence
+
+
+def _add(sources, url, title, finding):
+    key = normalize_url(url)
+    source = sources.setdefault(key, {"url": key, "title": None, "finding": None})
+    if title and not source["title"]:
+        source["title"] = title
+    if finding and not source["finding"]:
+        source["finding"] = finding
+
+
+def extract_sources(output_text, output=None):
+    """Cited sources of a report, deduplicated by URL.
+
+    Uses the ``url_citation`` annotations of the response ``output`` items
+    (for page titles) and the inline ``([label](url))`` citations of the
+    text, so reports saved before annotations were kept still yield
+    sources. Returns ``[{"url", "title", "finding"}]`` in citation order.
+    """
+    sources = {}
+    for item in output or []:
+        if getattr(item, "type", None) != "message":
+            continue
+        for part in getattr(item, "content", None) or []:
+            text = getattr(part, "text", None) or ""
+            for annotation in getattr(part, "annotations", None) or []:
+                if getattr(annotation, "type", None) != "url_citation":
+                    continue
+                _add(sources, annotation.url, getattr(annotation, "title", None),
+                     _finding(text, getattr(annotation, "start_index", 0) or 0))
+    for match in CITATION_PATTERN.finditer(output_text or ""):
+        _add(sources, match.group(2), None, _finding(output_text, match.start()))
+    return list(sources.values())
+
+
+def index_sources(conn, folder, sources):
+    """Replace a session's rows in the source index (call inside a transaction)."""
+    conn.execute("DELETE FROM sources_fts WHERE folder = ?", (folder,))
+    conn.executemany(
+        "INSERT INTO sources_fts (url, folder, title, finding) VALUES (?, ?, ?, ?)",
+        [(source["url"], folder, source.get("title"), source.get("finding")) for source in sources],
+    )
+
+
+def find_known_sources(conn, query, limit=DEFAULT_SEED_SOURCES):
+    """Past sources most relevant to ``query``, one per URL, best first.
+
+    Matches any of the query's words against source titles, findings and
+    URLs (BM25, in that order of weight); a URL cited by several sessions
+    ranks higher.
+    """
+    terms = sorted(set(query_terms(query)))
+    if not terms:
+        return []
+    rows = conn.execute(
+        """SELECT url, title, finding, folder, bm25(sources_fts, 0.5, 0.0, 2.0, 1.0) AS rank
+        FROM sources_fts WHERE sources_fts MATCH ?
+        ORDER BY rank LIMIT ?""",
+        (" OR ".join(f'"{term}"' for term in terms), limit * 20),
+    ).fetchall()
+    known = {}
+    for row in rows:
+        source = known.setdefault(row["url"], {
+            "url": row["url"], "title": row["title"], "finding": row["finding"],
+            "rank": row["rank"], "folders": set(),
+        })
+        source["folders"].add(row["folder"])
+        source["title"] = source["title"] or row["title"]
+        source["finding"] = source["finding"] or row["finding"]
+    # bm25 is negative, lower is better; each further citing session counts as a better match
+    ranked = sorted(known.values(), key=lambda s: s["rank"] * len(s["folders"]))
+    return [
+        {"url": s["url"], "title": s["title"], "finding": s["finding"], "sessions": len(s["folders"])}
+        for s in ranked[:limit]
+    ]
+
+
+def seed_prompt(query, sources):
+    """The query followed by a list of known sources and what they were cited for."""
+    if not sources:
+        return query
+    lines = []
+    for source in sources:
+        line = f"- {source['title'] or urlsplit(source['url']).netloc}: {source['url']}"
+        if source["finding"]:
+            line += f" - {source['finding']}"
+        lines.append(line)
+    return f"{query}\n\n{SEED_HEADER}\n" + "\n".join(lines)
+
+
+def seed_query(base_dir, query, limit=DEFAULT_SEED_SOURCES):
+    """``(input, sources)``: the query seeded from the catalog in ``base_dir``, if it has one."""
+    # The catalog indexes sources with this module, so import it here
+    from src.catalog import backfill_catalog, open_catalog
+
+    if not Path(base_dir).is_dir():
+        return query, []
+    conn, needs_backfill = open_catalog(base_dir)
+    try:
+        if needs_backfill:
+            backfill_catalog(conn, base_dir)
+        sources = find_known_sources(conn, query, limit)
+    finally:
+        conn.close()
+    return seed_prompt(query, sources), sources
@@ -0,0 +1,115 @@
+"""Allocation of session folders and atomic writes of their files."""
+
+import json
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.archive import archived_sessions
+from src.utils import write_json_atomic, write_text_atomic
+
+try:
+    import fcntl
+except ImportError:  # Windows: exclusive mkdir alone keeps allocation safe
+    fcntl = None
+
+
+ALLOCATIONS_FILENAME = ".allocations.json"
+ALLOCATIONS_LOCK_FILENAME = ".allocations.lock"
+ARCHIVED_FILENAME = ".archived_sessions.json"
+
+_lock = threading.Lock()
+
+
+class SessionStore:
+    """Session folders under one sessions directory.
+
+    ``allocate()`` claims a folder with an exclusive ``mkdir``, so two runs
+    can never end up in the same folder, and ``.allocations.json`` remembers
+    the next free ``_NNN`` suffix for each name, so allocation does not probe
+    every earlier folder. The index only saves work: if it is lost or stale,
+    allocation falls back to trying suffixes until one is free. Names of
+    sessions packed into archives are kept in ``.archived_sessions.json``
+    (written by ``pack`` through ``record_archived()``) and are never handed
+    out again. Files are written through a temp file and rename.
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = Path(base_dir)
+
+    @contextmanager
+    def _allocations(self):
+        """Lock the allocation index across threads and processes and yield it; changes are saved."""
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        with _lock, open(self.base_dir / ALLOCATIONS_LOCK_FILENAME, "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            path = self.base_dir / ALLOCATIONS_FILENAME
+            try:
+                with open(path, "r") as f:
+                    allocations = json.load(f)
+            except (OSError, ValueError):
+                allocations = {}
+            yield allocations
+            try:
+                write_json_atomic(path, allocations)
+            except OSError:
+                pass
+
+    def _archived(self):
+        """Archived session names (call with the allocation lock held).
+
+        Sessions directories packed before the list was kept get it built
+        once from their archives.
+        """
+        path = self.base_dir / ARCHIVED_FILENAME
+        try:
+            with open(path, "r") as f:
+                return set(json.load(f))
+        except (OSError, ValueError):
+            archived = archived_sessions(self.base_dir)
+            try:
+                write_json_atomic(path, sorted(archived))
+            except OSError:
+                pass
+            return archived
+
+    def record_archived(self, names):
+        """Mark session names as packed into an archive in the base directory."""
+        with self._allocations():
+            archived = self._archived() | set(names)
+            write_json_atomic(self.base_dir / ARCHIVED_FILENAME, sorted(archived))
+
+    def allocate(self, folder_name):
+        """Create and return a new folder named ``folder_name``, or ``folder_name_NNN`` if taken.
+
+        Names of archived sessions count as taken, so a new session never
+        shadows an archived one.
+        """
+        with self._allocations() as allocations:
+            counter = allocations.get(folder_name, 0)
+            archived = self._archived()
+            while True:
+                path = self.base_dir / (f"{folder_name}_{counter:03d}" if counter else folder_name)
+                if path.name in archived:
+                    counter += 1
+                    continue
+                try:
+                    path.mkdir()
+                except FileExistsError:
+                    counter += 1
+                    continue
+                allocations[folder_name] = counter + 1
+                return path
+
+    def write_text(self, folder, name, text, fsync=False):
+        """Atomically write a text file in a session folder; returns its path."""
+        path = Path(folder) / name
+        write_text_atomic(path, text, fsync)
+        return path
+
+    def write_json(self, folder, name, data):
+        """Atomically write a JSON file in a session folder; returns its path."""
+        path = Path(folder) / name
+        write_json_atomic(path, data)
+        return path
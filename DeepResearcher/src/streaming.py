@@ -1,22 +1,39 @@
 """Streaming research with rich UI and progress tracking."""
 
+import asyncio
+import math
+import threading
 import time
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from rich.console import Console, Group
-from rich.live import Live
 from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
 from rich.table import Table
 from rich.text import Text
 
+from src.events import (
+    CREATED_EVENT_TYPE, FINAL_EVENT_TYPES, ITEM_ADDED_EVENT_TYPE, TOOL_CALL_TYPES, EventDispatcher, summarize_tool_usage
+)
+from src.journal import EventJournal
+from src.progress import LiveProgress
+
 
 class ResearchTracker:
-    """Track research progress and display updates."""
+    """Track research progress and display updates.
+
+    Updates come from the stream thread while displays render from another
+    thread, so all state is read and written under a lock. ``version`` is
+    bumped on every change so renderers can skip unchanged state.
 
-    def __init__(self, max_tool_calls, model):
-        self.console = Console()
+    With a ``predictor`` (see ``src.eta``) the remaining time and final
+    tool-call count come from comparable past runs; without one the
+    tool-call rate is extrapolated to ``max_tool_calls``.
+    """
+
+    def __init__(self, max_tool_calls, model, predictor=None):
         self.max_tool_calls = max_tool_calls
         self.model = model
+        self.predictor = predictor
         self.start_time = time.time()
         self.tool_calls = 0
         self.web_searches = 0
@@ -25,33 +42,87 @@ class ResearchTracker:
         self.file_searches = 0
         self.recent_actions = []
         self.max_recent = 5
+        self.status = "queued"
+        self.end_time = None
+        self.final_received = False
+        self.version = 0
+        self._lock = threading.RLock()
+
+    def start(self):
+        """Mark the research as started and reset the clock."""
+        with self._lock:
+            self.start_time = time.time()
+            self.status = "running"
+            self.version += 1
+
+    def set_status(self, status):
+        """Change the run status without stopping the clock."""
+        with self._lock:
+            self.status = status
+            self.version += 1
+
+    def finish(self, status):
+        """Mark the research as finished and stop the clock."""
+        with self._lock:
+            self.end_time = time.time()
+            self.status = status
+            self.version += 1
+
+    def get_elapsed_seconds(self):
+        """Get elapsed time in whole seconds."""
+        return int((self.end_time or time.time()) - self.start_time)
 
     def get_elapsed_time(self):
         """Get elapsed time as formatted string."""
-        elapsed = time.time() - self.start_time
-        return str(timedelta(seconds=int(elapsed)))
+        return str(timedelta(seconds=self.get_elapsed_seconds()))
+
+    def get_prediction(self):
+        """The predictor's estimate while running, or None."""
+        if not self.predictor or self.status != "running":
+            return None
+        return self.predictor.predict(time.time() - self.start_time, self.tool_calls)
+
+    def get_expected_tool_calls(self):
+        """Predicted final tool-call count, or ``max_tool_calls`` without a prediction."""
+        prediction = self.get_prediction()
+        return prediction["tool_calls"][1] if prediction else self.max_tool_calls
 
     def get_progress_percent(self):
         """Get completion percentage."""
+        prediction = self.get_prediction()
+        if prediction:
+            elapsed = time.time() - self.start_time
+            return min(100.0, elapsed / (elapsed + prediction["remaining"][1]) * 100) if elapsed else 0.0
         if self.max_tool_calls == 0:
             return 0.0
         # Cap at 100% even if tool calls exceed max
         percent = (self.tool_calls / self.max_tool_calls) * 100
         return min(100.0, percent)
 
-    def get_eta(self):
-        """Calculate ETA for completion."""
+    def get_remaining_seconds(self):
+        """Expected time left: predicted, or extrapolated from the tool-call rate (None until the first call)."""
+        prediction = self.get_prediction()
+        if prediction:
+            return prediction["remaining"][1]
         if self.tool_calls == 0:
-            return "Calculating...", "Calculating..."
+            return None
 
         elapsed = time.time() - self.start_time
         rate = self.tool_calls / elapsed  # tool calls per second
         remaining_calls = self.max_tool_calls - self.tool_calls
 
         if remaining_calls <= 0 or rate == 0:
+            return 0.0
+        return remaining_calls / rate
+
+    def get_eta(self):
+        """Calculate ETA for completion."""
+        remaining_seconds = self.get_remaining_seconds()
+        if remaining_seconds is None:
+            return "Calculating...", "Calculating..."
+        if remaining_seconds == 0:
             return "0 min", datetime.now().strftime("%H:%M:%S")
 
-        remaining_seconds = remaining_calls / rate
         eta_time = datetime.now() + timedelta(seconds=remaining_seconds)
 
         # Format remaining time
@@ -61,32 +132,105 @@ class ResearchTracker:
         else:
             remaining_str = f"{remaining_minutes} min"
 
+        prediction = self.get_prediction()
+        if prediction:
+            low, _, high = prediction["remaining"]
+            remaining_str += f" ({int(low / 60)}-{math.ceil(high / 60)} min)"
+
         return remaining_str, eta_time.strftime("%I:%M:%S %p")
 
     def add_action(self, action_type, description):
         """Add a recent action to the tracker."""
-        self.recent_actions.append({
-            "type": action_type,
-            "desc": description,
-            "time": datetime.now().strftime("%I:%M:%S %p")
-        })
-        if len(self.recent_actions) > self.max_recent:
-            self.recent_actions.pop(0)
+        with self._lock:
+            self.recent_actions.append({
+                "type": action_type,
+                "desc": description,
+                "time": datetime.now().strftime("%I:%M:%S %p")
+            })
+            if len(self.recent_actions) > self.max_recent:
+                self.recent_actions.pop(0)
+            self.version += 1
 
     def increment_tool_call(self, call_type):
         """Increment tool call counters."""
-        self.tool_calls += 1
-        if call_type == "web_search_call":
-            self.web_searches += 1
-        elif call_type == "code_interpreter_call":
-            self.code_calls += 1
-        elif call_type == "mcp_tool_call":
-            self.mcp_calls += 1
-        elif call_type == "file_search_call":
-            self.file_searches += 1
+        with self._lock:
+            self.tool_calls += 1
+            if self.predictor:
+                self.predictor.observe_call(time.time() - self.start_time)
+            if call_type == "web_search_call":
+                self.web_searches += 1
+            elif call_type == "code_interpreter_call":
+                self.code_calls += 1
+            elif call_type == "mcp_tool_call":
+                self.mcp_calls += 1
+            elif call_type == "file_search_call":
+                self.file_searches += 1
+            self.version += 1
+
+    def subscribe(self, dispatcher):
+        """Update the counters from the stream events routed by ``dispatcher``."""
+        dispatcher.on(CREATED_EVENT_TYPE, self._on_created)
+        dispatcher.on(ITEM_ADDED_EVENT_TYPE, self._on_item_added)
+        dispatcher.on(FINAL_EVENT_TYPES, self._on_final)
+
+    def _on_created(self, event):
+        self.add_action("system", "Research started")
+
+    def _on_item_added(self, event):
+        item_type = getattr(event.item, "type", None)
+        if item_type in TOOL_CALL_TYPES:
+            self.increment_tool_call(item_type)
+
+    def _on_final(self, event):
+        # The caller sets the terminal status once it has dealt with the response
+        with self._lock:
+            self.final_received = True
+        self.add_action("system", "Research complete!")
+
+    def tool_usage(self):
+        """The ``tool_usage`` metadata entry counted from the stream.
+
+        None unless the stream delivered the final response: a run that was
+        cancelled, cut off or finished by polling may not have streamed all
+        of its tool calls, so its response output has to be counted instead.
+        """
+        with self._lock:
+            if not self.final_received:
+                return None
+            return summarize_tool_usage({
+                "web_search_call": self.web_searches,
+                "code_interpreter_call": self.code_calls,
+                "mcp_tool_call": self.mcp_calls,
+                "file_search_call": self.file_searches,
+            })
+
+    def snapshot(self):
+        """Get a consistent copy of the progress state for headless reporters."""
+        with self._lock:
+            remaining = self.get_remaining_seconds()
+            prediction = self.get_prediction()
+            expected = prediction["tool_calls"][1] if prediction else None
+            return {
+                "model": self.model,
+                "status": self.status,
+                "elapsed_seconds": self.get_elapsed_seconds(),
+                "tool_calls": self.tool_calls,
+                "max_tool_calls": self.max_tool_calls,
+                "eta_seconds": None if remaining is None else round(remaining),
+                "expected_tool_calls": expected,
+                "web_searches": self.web_searches,
+                "code_calls": self.code_calls,
+                "mcp_calls": self.mcp_calls,
+                "file_searches": self.file_searches,
+                "last_action": self.recent_actions[-1]["desc"] if self.recent_actions else None,
+            }
 
     def create_display(self):
         """Create the rich display panel."""
+        with self._lock:
+            return self._create_display()
+
+    def _create_display(self):
         # Progress bar
         progress_percent = self.get_progress_percent()
         remaining_time, eta_time = self.get_eta()
@@ -100,6 +244,13 @@ class ResearchTracker:
         stats.add_row("Elapsed:", self.get_elapsed_time())
         stats.add_row("Progress:", f"{progress_percent:.1f}% ({self.tool_calls}/{self.max_tool_calls} calls)")
         stats.add_row("ETC:", f"{remaining_time} (finishes ~{eta_time})")
+        prediction = self.get_prediction()
+        if prediction:
+            low, expected, high = prediction["tool_calls"]
+            stats.add_row(
+                "Expected calls:",
+                f"~{expected} ({low}-{high}, from {prediction['samples']} past runs)"
+            )
         stats.add_row("", "")
         stats.add_row("Web Searches:", str(self.web_searches))
         if self.code_calls > 0:
@@ -137,103 +288,251 @@ class ResearchTracker:
         )
 
 
-def stream_research(client, request_params, tracker):
-    """Stream research with live progress updates."""
-    console = Console()
-
+def get_response_id(event):
+    """Extract the response_id from a response.created event, if present."""
+    if getattr(event, 'type', None) != 'response.created':
+        return None
+    resp = getattr(event, 'response', None)
+    response_id = getattr(resp, 'id', None) if resp else None
+    if not response_id:
+        response_id = getattr(event, 'id', None)
+        if not (response_id and response_id.startswith('resp_')):
+            response_id = None
+    return response_id
+
+
+class StreamRun:
+    """One response stream's consumers, subscribed to a shared dispatcher.
+
+    Every event goes to ``metrics``, the journal and ``state``; typed events
+    to the tracker, ``output`` and ``budget``. The run keeps the response_id
+    (reported to ``on_response_id`` once captured) and the final response
+    for the stream loop.
+    """
+
+    def __init__(self, tracker, journal, state=None, output=None, budget=None, metrics=None, response_id=None,
+                 on_response_id=None):
+        self.state = state
+        self.response_id = response_id
+        self.final_response = None
+        self.on_response_id = on_response_id
+
+        self.dispatcher = dispatcher = EventDispatcher()
+        if metrics:
+            metrics.subscribe(dispatcher)
+        dispatcher.on_any(journal.append)
+        if state:
+            dispatcher.on_any(state.record_event)
+        if not response_id:
+            dispatcher.on(CREATED_EVENT_TYPE, self._capture_response_id)
+        tracker.subscribe(dispatcher)
+        if output:
+            output.subscribe(dispatcher)
+        if budget:
+            budget.subscribe(dispatcher)
+        dispatcher.on(FINAL_EVENT_TYPES, self._capture_final_response)
+        self.dispatch = dispatcher.dispatch
+
+    def _capture_response_id(self, event):
+        if self.response_id:
+            return
+        self.response_id = get_response_id(event)
+        if self.response_id:
+            if self.state:
+                self.state.record_response_id(self.response_id)
+            if self.on_response_id:
+                self.on_response_id(self.response_id)
+
+    def _capture_final_response(self, event):
+        self.final_response = getattr(event, "response", None)
+
+
+async def stream_research_async(client, request_params, tracker, journal=None, state=None, progress=None, output=None,
+                                metrics=None):
+    """Stream research on an AsyncOpenAI client, updating the tracker without a UI.
+
+    Used by the batch runner, which renders all trackers in one dashboard.
+    """
+    if journal is None:
+        journal = EventJournal(hold=False)
+    tracker.start()
+    if metrics:
+        metrics.start()
+    stream = await client.responses.create(**request_params, stream=True)
+
+    run = StreamRun(tracker, journal, state, output, metrics=metrics)
+    try:
+        async for event in stream:
+            run.dispatch(event)
+            if progress:
+                progress.notify()
+    except asyncio.CancelledError:
+        if run.response_id:
+            try:
+                await client.responses.cancel(run.response_id)
+            except Exception:
+                pass
+        raise
+    finally:
+        if metrics:
+            metrics.finish()
+        journal.close()
+        if output:
+            output.close()
+        if state:
+            state.save()
+
+    final_response = run.final_response
+    if not final_response and run.response_id:
+        with metrics.phase("final_retrieve") if metrics else nullcontext():
+            final_response = await client.responses.retrieve(run.response_id)
+    elif not run.response_id:
+        raise RuntimeError("No response ID captured from stream")
+    if metrics:
+        metrics.record_usage(final_response)
+
+    return final_response
+
+
+def stream_research(client, request_params, tracker, journal=None, state=None, on_start=None, progress=None, output=None,
+                    budget=None, metrics=None):
+    """Stream research with live progress updates.
+
+    Events are recorded to ``journal`` as they arrive (an in-memory ring
+    buffer only if no journal is given) and the response_id and stream
+    position to ``state`` so the session can be resumed; report text deltas
+    are appended to ``output`` as they arrive. A ``budget`` controller cancels
+    the response once its deadline or cost limit is reached, and ``metrics``
+    records timings and event histograms. ``on_start`` is
+    called once when the first event arrives. ``progress`` is the reporter
+    to notify of tracker changes (a rich live panel by default). Returns the final
+    response and the journal, which can be iterated lazily to re-read every
+    event.
+    """
     # When using background=True with stream=True, we need to get the response object first
     # then iterate over the stream. The response object contains the response_id.
+    tracker.start()
+    if metrics:
+        metrics.start()
     stream = client.responses.create(**request_params, stream=True)
-
-    # For background streams, the stream itself has metadata we can access
-    response_id = None
-    events = []
-    final_response = None
+    return _consume_stream(
+        client, stream, tracker, journal, state, on_start=on_start, progress=progress, output=output, budget=budget,
+        metrics=metrics
+    )
+
+
+def resume_research(client, tracker, journal, state, starting_after=None, progress=None, output=None, budget=None,
+                    metrics=None):
+    """Reattach to a background response's stream after the given sequence number."""
+    if metrics:
+        metrics.resumed = True
+        metrics.start()
+    stream = client.responses.retrieve(
+        state.response_id, stream=True,
+        **({"starting_after": starting_after} if starting_after is not None else {})
+    )
+    return _consume_stream(
+        client, stream, tracker, journal, state, response_id=state.response_id, progress=progress, output=output,
+        budget=budget, metrics=metrics
+    )
+
+
+def _consume_stream(client, stream, tracker, journal, state, response_id=None, on_start=None, progress=None, output=None,
+                    budget=None, metrics=None):
+    """Drive the progress display from a response event stream."""
+    console = Console()
+    if journal is None:
+        journal = EventJournal(hold=False)
+    if progress is None:
+        progress = LiveProgress(tracker, console)
+
+    def stop_for_budget(reason):
+        # May run on the budget's timer thread while the stream is blocked on a read
+        console.print(f"\n[yellow]Budget limit: {reason}. Cancelling research...[/yellow]")
+        try:
+            client.responses.cancel(run.response_id)
+        except Exception as e:
+            console.print(f"[red]Error cancelling research: {e}[/red]")
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+
+    def response_id_captured(response_id):
+        console.print(f"[dim]✓ Captured response_id: {response_id}[/dim]")
+        if budget:
+            budget.watch(stop_for_budget)
+
+    run = StreamRun(
+        tracker, journal, state, output, budget, metrics, response_id=response_id, on_response_id=response_id_captured
+    )
+    if response_id and budget:
+        budget.watch(stop_for_budget)
 
     try:
-        import threading
-        stop_updating = threading.Event()
-
-        def periodic_update():
-            """Update display periodically even when no events arrive."""
-            while not stop_updating.is_set():
-                time.sleep(1.0)  # Update once per second
-                try:
-                    live.update(tracker.create_display())
-                except:
-                    break
-
-        with Live(tracker.create_display(), console=console, refresh_per_second=2) as live:
-            # Start background thread for periodic updates
-            update_thread = threading.Thread(target=periodic_update, daemon=True)
-            update_thread.start()
-
+        with progress:
             for event in stream:
-                events.append(event)
-
-                # Capture response_id from response.created event
-                if not response_id:
-                    event_type = getattr(event, 'type', None)
-                    if event_type == 'response.created':
-                        # The response.created event contains the response object with the ID
-                        resp = getattr(event, 'response', None)
-                        if resp:
-                            response_id = getattr(resp, 'id', None)
-                            if response_id:
-                                console.print(f"[dim]✓ Captured response_id: {response_id}[/dim]")
-
-                        # Also try getting it directly from the event
-                        if not response_id:
-                            response_id = getattr(event, 'id', None)
-                            if response_id and response_id.startswith('resp_'):
-                                console.print(f"[dim]✓ Captured response_id from event: {response_id}[/dim]")
-
-                # Handle different event types
-                event_type = getattr(event, 'type', None)
-
-                if event_type == 'response.created':
-                    tracker.add_action("system", "Research started")
-
-                elif event_type == 'response.output_item.added':
-                    item = getattr(event, 'item', None)
-                    if item:
-                        item_type = getattr(item, 'type', None)
-                        if item_type in ['web_search_call', 'code_interpreter_call', 'mcp_tool_call', 'file_search_call']:
-                            tracker.increment_tool_call(item_type)
-
-                elif event_type == 'response.done':
-                    final_response = getattr(event, 'response', None)
-                    tracker.add_action("system", "Research complete!")
-                    if final_response:
-                        console.print(f"\n[dim]✓ Got final response from stream (status: {getattr(final_response, 'status', 'unknown')})[/dim]")
-
-            # Stop the update thread
-            stop_updating.set()
+                if on_start:
+                    on_start()
+                    on_start = None
+                event_type = run.dispatch(event)
+                if metrics:
+                    notify_start = time.perf_counter()
+                    progress.notify()
+                    metrics.ui_seconds += time.perf_counter() - notify_start
+                else:
+                    progress.notify()
+                if event_type in FINAL_EVENT_TYPES:
+                    # Nothing is left to do for this display but show the outcome
+                    tracker.finish(getattr(run.final_response, "status", None) or "completed")
+                    console.print(f"\n[dim]✓ Got final response from stream (status: {getattr(run.final_response, 'status', 'unknown')})[/dim]")
+                elif budget and run.response_id and not budget.exceeded and budget.check():
+                    stop_for_budget(budget.exceeded)
+                    break
 
             # Stream ended
-            console.print(f"\n[dim]Stream ended. Total events: {len(events)}, Final response: {final_response is not None}[/dim]")
+            console.print(f"\n[dim]Stream ended. Total events: {len(journal)}, Final response: {run.final_response is not None}[/dim]")
 
     except KeyboardInterrupt:
         # User pressed Ctrl+C - cancel the background response
         console.print("\n[yellow]Cancelling research...[/yellow]")
-        if response_id:
+        if run.response_id:
             try:
-                cancelled_response = client.responses.cancel(response_id)
+                cancelled_response = client.responses.cancel(run.response_id)
                 console.print(f"[green]Research cancelled successfully (status: {cancelled_response.status})[/green]")
-                return cancelled_response, events
+                return cancelled_response, journal
             except Exception as e:
                 console.print(f"[red]Error cancelling research: {e}[/red]")
         raise
+    except Exception:
+        # Stopping for the budget closes the stream, which can interrupt a blocked read
+        if not (budget and budget.exceeded):
+            raise
+    finally:
+        if budget:
+            budget.stop()
+        if metrics:
+            metrics.finish()
+            metrics.ui_seconds += getattr(progress, "render_seconds", 0.0)
+        journal.close()
+        if output:
+            output.close()
+        if state:
+            state.save()
 
     # If we didn't get the final response from the stream, fetch it
+    final_response = run.final_response
+    response_id = run.response_id
     if not final_response and response_id:
         console.print(f"\n[yellow]Retrieving final response (ID: {response_id})...[/yellow]")
         try:
-            final_response = client.responses.retrieve(response_id)
+            with metrics.phase("final_retrieve") if metrics else nullcontext():
+                final_response = client.responses.retrieve(response_id)
             console.print(f"[green]✓ Retrieved response (status: {final_response.status})[/green]")
         except Exception as e:
             console.print(f"[red]Error retrieving final response: {e}[/red]")
     elif not response_id:
         console.print(f"\n[red]Error: No response ID captured from stream[/red]")
+    if metrics and final_response:
+        metrics.record_usage(final_response)
 
-    return final_response, events
+    return final_response, journal
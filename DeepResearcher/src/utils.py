@@ -1,9 +1,140 @@
 """Utility functions for deep research tool."""
 
+import hashlib
+import json
+import os
 import re
+import threading
 from pathlib import Path
 
 
+SLUG_CACHE_FILENAME = ".slug_cache.json"
+
+# Words that carry no topic information in a folder name
+SLUG_STOPWORDS = {
+    "a", "about", "all", "also", "am", "an", "and", "any", "are", "as", "at",
+    "be", "been", "best", "but", "by", "can", "compare", "comparing", "could",
+    "current", "do", "does", "each", "eg", "etc", "evaluate", "for", "from",
+    "give", "goal", "had", "has", "have", "help", "how", "i", "ie", "if", "in",
+    "include", "including", "into", "is", "it", "its", "just", "latest", "like",
+    "me", "more", "most", "my", "need", "of", "on", "one", "or", "our",
+    "please", "prompt", "query", "research", "should", "so", "some", "such",
+    "tell", "than", "that", "the", "their", "them", "then", "there", "these",
+    "they", "this", "those", "to", "us", "want", "was", "we", "were", "what",
+    "when", "where", "which", "while", "who", "why", "will", "with", "would",
+    "you", "your",
+}
+
+_slug_cache_lock = threading.Lock()
+
+
+def query_terms(text, min_len=3):
+    """Lowercased words of ``text`` at least ``min_len`` long, minus stopwords, in order with repeats."""
+    return [
+        word for word in re.findall(r"[a-z0-9]+", text.lower())
+        if len(word) >= min_len and word not in SLUG_STOPWORDS
+    ]
+
+
+def write_text_atomic(path, text, fsync=False):
+    """Write text to ``path`` via a temp file and rename, so readers never see a partial file."""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(path, data):
+    """Write JSON to ``path`` via a temp file and rename."""
+    write_text_atomic(path, json.dumps(data, indent=2))
+
+
+def format_duration(seconds):
+    """Format a duration compactly: ``45s``, ``12m`` or ``3h05m``."""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m"
+    return f"{seconds // 3600}h{seconds // 60 % 60:02d}m"
+
+
+def query_hash(query):
+    """Stable short hash of a query's text."""
+    return hashlib.sha256(query.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def slugify_query(query, max_words=4, max_length=40):
+    """Build a short snake_case folder name from the query's leading keywords.
+
+    Deterministic and local: markdown markup and stopwords are dropped and
+    keywords are taken from the first line that has at least two of them
+    (usually the title or opening sentence), so the same query always gets
+    the same name without a model call.
+    """
+    words = []
+    full = False
+    for line in query.lower().splitlines():
+        for word in re.findall(r"[a-z0-9]+(?:-[a-z0-9]+)*", line):
+            word = word.replace("-", "_")
+            if word in SLUG_STOPWORDS or len(word) < 2 or word in words:
+                continue
+            if len("_".join(words + [word])) > max_length:
+                if not words:
+                    words.append(word[:max_length])
+                full = True
+                break
+            words.append(word)
+            if len(words) == max_words:
+                full = True
+                break
+        if full or len(words) >= 2:
+            break
+
+    return "_".join(words) or "research"
+
+
+def _load_slug_cache(cache_path):
+    try:
+        with open(cache_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def resolve_folder_name(client, query, base_dir, use_llm=False):
+    """Get a folder name for the query, consulting the slug cache first.
+
+    Names are cached in ``<base_dir>/.slug_cache.json`` keyed by query hash,
+    so re-running a query never pays for another naming call. The local
+    slugger is the default; ``use_llm`` asks GPT for a name instead.
+    """
+    cache_path = Path(base_dir) / SLUG_CACHE_FILENAME
+    key = f"{'llm' if use_llm else 'local'}:{query_hash(query)}"
+
+    with _slug_cache_lock:
+        cached = _load_slug_cache(cache_path).get(key)
+    if cached:
+        return cached
+
+    folder_name = generate_folder_name(client, query) if use_llm else slugify_query(query)
+
+    with _slug_cache_lock:
+        # Re-read so concurrent runs don't drop each other's entries
+        cache = _load_slug_cache(cache_path)
+        cache[key] = folder_name
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(cache_path, cache)
+        except OSError:
+            pass
+    return folder_name
+
+
 def generate_folder_name(client, query):
     """Generate a concise folder name based on the query using GPT."""
     try:
@@ -16,28 +147,7 @@ def generate_folder_name(client, query):
         # Clean up the folder name
         folder_name = re.sub(r'[^\w\s-]', '', folder_name)
         folder_name = re.sub(r'[-\s]+', '_', folder_name)
-        return folder_name
+        return folder_name or slugify_query(query)
     except Exception as e:
-        # Fallback to a simple truncated version
-        fallback = re.sub(r'[^\w\s-]', '', query.lower())[:40]
-        fallback = re.sub(r'[-\s]+', '_', fallback)
-        return fallback
-
-
-def create_research_folder(base_dir, folder_name):
-    """Create a unique research folder with disambiguation code if needed."""
-    base_path = Path(base_dir) / folder_name
-
-    # If folder doesn't exist, create it
-    if not base_path.exists():
-        base_path.mkdir(parents=True, exist_ok=True)
-        return base_path
-
-    # If it exists, add disambiguation code
-    counter = 1
-    while True:
-        disambiguated_path = Path(base_dir) / f"{folder_name}_{counter:03d}"
-        if not disambiguated_path.exists():
-            disambiguated_path.mkdir(parents=True, exist_ok=True)
-            return disambiguated_path
-        counter += 1
+        # Fallback to the local keyword slug
+        return slugify_query(query)
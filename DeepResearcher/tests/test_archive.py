@@ -0,0 +1,142 @@
+import json
+import os
+import zlib
+
+import pytest
+
+from src.archive import (
+    MAGIC,
+    TRAILER,
+    TRAILER_MAGIC,
+    SessionArchive,
+    pack_sessions,
+    unpack_sessions,
+)
+from src.store import SessionStore
+
+
+def make_session(base_dir, name, response_id, report="# Report\n\nFindings."):
+    folder = base_dir / name
+    (folder / "notes").mkdir(parents=True)
+    (folder / f"{name}_input.md").write_text("What changed?")
+    (folder / f"{name}_output.md").write_text(report)
+    (folder / "metadata.json").write_text(json.dumps({"response_id": response_id}))
+    (folder / "notes" / "extra.txt").write_text("nested file")
+    return folder
+
+
+def write_archive(path, members):
+    """An archive holding ``{session: {name: data}}`` exactly as given, names unchecked."""
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        index = {}
+        for session, files in members.items():
+            entries = index.setdefault(session, {"mtime": 0, "files": {}})["files"]
+            for name, data in files.items():
+                compressed = zlib.compress(data)
+                entries[name] = [f.tell(), len(compressed), len(data), zlib.crc32(data), 0]
+                f.write(compressed)
+        index_offset = f.tell()
+        index_data = zlib.compress(json.dumps(index).encode("utf-8"))
+        f.write(index_data)
+        f.write(TRAILER.pack(index_offset, len(index_data), TRAILER_MAGIC))
+
+
+def test_round_trip_keeps_files_and_times(tmp_path):
+    sessions = tmp_path / "sessions"
+    folders = [make_session(sessions, "alpha", "resp_a"), make_session(sessions, "beta", "resp_b")]
+    output = folders[0] / "alpha_output.md"
+    mtime = output.stat().st_mtime - 3600
+    os.utime(output, (mtime, mtime))
+    archive_path = tmp_path / "sessions.drpack"
+
+    assert pack_sessions(archive_path, folders) == 2
+    with SessionArchive(archive_path) as archive:
+        assert archive.sessions() == ["alpha", "beta"]
+        assert archive.read_text("alpha", "notes/extra.txt") == "nested file"
+
+    dest = tmp_path / "restored"
+    assert sorted(unpack_sessions(archive_path, dest)) == ["alpha", "beta"]
+    for folder in folders:
+        for file in folder.rglob("*"):
+            if file.is_file():
+                restored = dest / folder.name / file.relative_to(folder)
+                assert restored.read_bytes() == file.read_bytes()
+    assert abs((dest / "alpha" / "alpha_output.md").stat().st_mtime - mtime) < 1
+
+
+def test_repacking_the_same_session_replaces_it(tmp_path):
+    folder = make_session(tmp_path / "sessions", "alpha", "resp_a")
+    other = make_session(tmp_path / "sessions", "beta", "resp_b")
+    archive_path = tmp_path / "sessions.drpack"
+    pack_sessions(archive_path, [folder, other])
+
+    (folder / "alpha_output.md").write_text("# Report\n\nUpdated findings.")
+    assert pack_sessions(archive_path, [folder]) == 1
+    with SessionArchive(archive_path) as archive:
+        assert archive.sessions() == ["alpha", "beta"]
+        assert archive.read_text("alpha", "alpha_output.md").endswith("Updated findings.")
+        assert archive.read_text("beta", "beta_output.md") == "# Report\n\nFindings."
+
+
+def test_different_session_with_the_same_name_is_refused(tmp_path):
+    archive_path = tmp_path / "sessions.drpack"
+    pack_sessions(archive_path, [make_session(tmp_path / "first", "alpha", "resp_a")])
+    newer = make_session(tmp_path / "second", "alpha", "resp_z", report="Another run.")
+
+    with pytest.raises(ValueError, match="alpha"):
+        pack_sessions(archive_path, [newer])
+    with SessionArchive(archive_path) as archive:
+        assert archive.read_text("alpha", "alpha_output.md") == "# Report\n\nFindings."
+
+    pack_sessions(archive_path, [newer], replace=True)
+    with SessionArchive(archive_path) as archive:
+        assert archive.read_text("alpha", "alpha_output.md") == "Another run."
+
+
+def test_allocate_skips_archived_names(tmp_path):
+    sessions = tmp_path / "sessions"
+    folder = make_session(sessions, "alpha", "resp_a")
+    pack_sessions(sessions / "sessions.drpack", [folder])
+    for file in sorted(folder.rglob("*"), reverse=True):
+        file.unlink() if file.is_file() else file.rmdir()
+    folder.rmdir()
+
+    assert SessionStore(sessions).allocate("alpha").name == "alpha_001"
+
+
+def test_corrupt_member_is_detected(tmp_path):
+    archive_path = tmp_path / "sessions.drpack"
+    pack_sessions(archive_path, [make_session(tmp_path / "sessions", "alpha", "resp_a")])
+    with SessionArchive(archive_path) as archive:
+        offset, size, raw_size, crc, mtime = archive.index["alpha"]["files"]["alpha_output.md"]
+    # Swap the member for different data of the same length under the old checksum
+    data = bytearray(archive_path.read_bytes())
+    replacement = zlib.compress(b"X" * raw_size)
+    assert len(replacement) <= size
+    data[offset:offset + size] = replacement.ljust(size, b"\0")
+    archive_path.write_bytes(bytes(data))
+
+    with SessionArchive(archive_path) as archive:
+        with pytest.raises(ValueError, match="corrupt"):
+            archive.read("alpha", "alpha_output.md")
+    with pytest.raises(ValueError, match="corrupt"):
+        unpack_sessions(archive_path, tmp_path / "restored")
+
+
+@pytest.mark.parametrize("session, name", [
+    ("alpha", "../escaped.txt"),
+    ("alpha", "notes/../../escaped.txt"),
+    ("alpha", "/tmp/escaped.txt"),
+    ("..", "escaped.txt"),
+    ("../outside", "escaped.txt"),
+    ("/abs", "escaped.txt"),
+])
+def test_unpack_rejects_paths_outside_the_session(tmp_path, session, name):
+    archive_path = tmp_path / "evil.drpack"
+    write_archive(archive_path, {session: {name: b"payload"}})
+    dest = tmp_path / "dest" / "sessions"
+
+    with pytest.raises(ValueError, match="Unsafe"):
+        unpack_sessions(archive_path, dest)
+    assert not any(tmp_path.rglob("escaped.txt"))
@@ -0,0 +1,111 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.budget import BudgetController, parse_duration, usage_cost
+from src.events import EventDispatcher
+
+
+class Tracker:
+    """Stand-in for ResearchTracker with a fixed projection."""
+
+    def __init__(self, model="o3-deep-research", elapsed=0.0, tool_calls=0, remaining=None, expected=None):
+        self.model = model
+        self.start_time = time.time() - elapsed
+        self.tool_calls = tool_calls
+        self.remaining = remaining
+        self.expected = expected
+        self.actions = []
+
+    def get_remaining_seconds(self):
+        return self.remaining
+
+    def get_expected_tool_calls(self):
+        return self.expected
+
+    def add_action(self, action_type, description):
+        self.actions.append((action_type, description))
+
+
+@pytest.mark.parametrize("value, seconds", [("90s", 90), ("30m", 1800), ("1.5h", 5400), ("20", 1200)])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+def test_parse_duration_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_duration("soon")
+
+
+def test_no_limits_never_stop():
+    budget = BudgetController(Tracker(elapsed=10_000, tool_calls=500, remaining=60, expected=600))
+
+    assert budget.check() is None
+    assert budget.exceeded is None
+
+
+def test_deadline_reached_stops_once():
+    tracker = Tracker(elapsed=120)
+    budget = BudgetController(tracker, deadline=60)
+
+    reason = budget.check()
+
+    assert reason == budget.exceeded and "deadline" in reason
+    assert budget.check() == reason
+    assert [kind for kind, _ in tracker.actions] == ["budget"]
+
+
+def test_cost_limit_counts_tool_calls_and_output():
+    tracker = Tracker(tool_calls=2)
+    budget = BudgetController(tracker, max_cost=0.30)
+    dispatcher = EventDispatcher()
+    budget.subscribe(dispatcher)
+    dispatcher.dispatch(SimpleNamespace(type="response.output_item.added", item=SimpleNamespace(type="web_search_call")))
+    dispatcher.dispatch(SimpleNamespace(type="response.output_text.delta", delta="x" * 400))
+
+    # 2 calls x 5000 input tokens at $10/M, 100 output tokens at $40/M, one $0.01 search
+    assert budget.estimated_cost() == pytest.approx(0.1 + 0.004 + 0.01)
+    assert budget.check() is None
+
+    tracker.tool_calls = 6
+    assert "cost" in budget.check()
+
+
+def test_projected_overruns_warn_once_without_stopping():
+    tracker = Tracker(elapsed=50, tool_calls=10, remaining=100, expected=40)
+    budget = BudgetController(tracker, deadline=120, max_cost=1.0)
+
+    assert budget.check() is None
+    assert budget.check() is None
+
+    warnings = [description for _, description in tracker.actions]
+    assert len(warnings) == 2
+    assert "deadline" in warnings[0] and "cost" in warnings[1]
+    assert budget.exceeded is None
+
+
+def test_actual_cost_from_the_final_response_wins_when_higher():
+    tracker = Tracker()
+    budget = BudgetController(tracker, max_cost=5.0)
+    dispatcher = EventDispatcher()
+    budget.subscribe(dispatcher)
+    usage = SimpleNamespace(input_tokens=200_000, output_tokens=50_000)
+    dispatcher.dispatch(SimpleNamespace(type="response.completed", response=SimpleNamespace(usage=usage)))
+
+    assert budget.actual_cost == pytest.approx(usage_cost("o3-deep-research", usage)) == pytest.approx(4.0)
+    assert budget.estimated_cost() == pytest.approx(4.0)
+    assert budget.summary()["actual_cost_usd"] == 4.0
+
+
+def test_watch_fires_when_the_deadline_passes():
+    budget = BudgetController(Tracker(elapsed=0), deadline=0.05)
+    fired = []
+
+    budget.watch(fired.append)
+    deadline = time.time() + 2
+    while not fired and time.time() < deadline:
+        time.sleep(0.01)
+    budget.stop()
+
+    assert fired and "deadline" in fired[0]
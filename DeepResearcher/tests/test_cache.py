@@ -0,0 +1,81 @@
+import json
+from datetime import datetime, timedelta
+
+from src.cache import find_cached_session, find_similar_sessions
+from src.catalog import backfill_catalog, open_catalog
+
+MODEL = "o3-deep-research"
+TOOLS = ["web_search_preview"]
+
+
+def make_session(base_dir, name, query, status="completed", days_old=0, model=MODEL, with_metadata=True):
+    folder = base_dir / name
+    folder.mkdir(parents=True)
+    (folder / f"{name}_input.md").write_text(query)
+    (folder / f"{name}_output.md").write_text(f"Report on {query}")
+    if with_metadata:
+        (folder / "metadata.json").write_text(json.dumps({
+            "timestamp": (datetime.now() - timedelta(days=days_old)).isoformat(),
+            "query": query,
+            "model": model,
+            "status": status,
+            "web_search_enabled": True,
+            "code_interpreter_enabled": False,
+        }))
+    else:
+        (folder / "session.json").write_text(json.dumps({"status": status}))
+
+
+def catalog(base_dir):
+    conn, _ = open_catalog(base_dir)
+    backfill_catalog(conn, base_dir)
+    return conn
+
+
+def test_exact_match_ignores_case_and_whitespace(tmp_path):
+    make_session(tmp_path, "gpu", "GPU memory bandwidth  limits")
+    conn = catalog(tmp_path)
+
+    hit = find_cached_session(conn, "gpu memory bandwidth limits", MODEL, TOOLS)
+
+    assert hit["name"] == "gpu"
+    assert hit["output_text"] == "Report on GPU memory bandwidth  limits"
+
+
+def test_exact_match_requires_the_same_model_and_tools(tmp_path):
+    make_session(tmp_path, "gpu", "gpu memory bandwidth limits")
+    conn = catalog(tmp_path)
+
+    assert find_cached_session(conn, "gpu memory bandwidth limits", "o4-mini-deep-research", TOOLS) is None
+    assert find_cached_session(conn, "gpu memory bandwidth limits", MODEL, []) is None
+
+
+def test_unfinished_and_stale_sessions_are_not_reused(tmp_path):
+    make_session(tmp_path, "failed", "gpu memory bandwidth limits", status="failed")
+    make_session(tmp_path, "partial", "gpu memory bandwidth limits", status="streaming", with_metadata=False)
+    make_session(tmp_path, "old", "cpu cache hierarchy design", days_old=30)
+    conn = catalog(tmp_path)
+
+    assert find_cached_session(conn, "gpu memory bandwidth limits", MODEL, TOOLS) is None
+    assert find_cached_session(conn, "cpu cache hierarchy design", MODEL, TOOLS, ttl_days=7) is None
+    assert find_cached_session(conn, "cpu cache hierarchy design", MODEL, TOOLS, ttl_days=60)["name"] == "old"
+    assert find_similar_sessions(conn, "gpu memory bandwidth limits today") == []
+
+
+def test_near_duplicates_rank_by_similarity(tmp_path):
+    make_session(tmp_path, "gpu", "gpu memory bandwidth limits for training")
+    make_session(tmp_path, "gpu_power", "gpu power limits in data centers")
+    make_session(tmp_path, "cooking", "slow cooking recipes with onions")
+    conn = catalog(tmp_path)
+
+    matches = find_similar_sessions(conn, "memory bandwidth limits of gpu training", threshold=0.1)
+
+    assert [row["name"] for row, _ in matches][:2] == ["gpu", "gpu_power"]
+    assert matches[0][1] > matches[1][1]
+    assert "cooking" not in [row["name"] for row, _ in matches]
+
+
+def test_stopword_only_query_matches_nothing(tmp_path):
+    make_session(tmp_path, "gpu", "gpu memory bandwidth limits")
+
+    assert find_similar_sessions(catalog(tmp_path), "what is the") == []
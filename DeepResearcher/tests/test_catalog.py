@@ -0,0 +1,52 @@
+import json
+import os
+
+from src.catalog import backfill_catalog, list_sessions, open_catalog
+
+
+def make_folder(base_dir, name, output="# Report\n\nPartial text", metadata=None, state=None):
+    folder = base_dir / name
+    folder.mkdir(parents=True)
+    (folder / f"{name}_input.md").write_text("How fast is it?")
+    (folder / f"{name}_output.md").write_text(output)
+    if metadata is not None:
+        (folder / "metadata.json").write_text(json.dumps(metadata))
+    if state is not None:
+        (folder / "session.json").write_text(json.dumps(state))
+    return folder
+
+
+def statuses(base_dir):
+    conn, _ = open_catalog(base_dir)
+    try:
+        backfill_catalog(conn, base_dir)
+        return {row["name"]: row["status"] for row in list_sessions(conn)}
+    finally:
+        conn.close()
+
+
+def test_status_comes_from_metadata(tmp_path):
+    make_folder(tmp_path, "done", metadata={"status": "completed", "model": "o3-deep-research"},
+                state={"status": "streaming"})
+    make_folder(tmp_path, "failed", metadata={"status": "failed"})
+
+    assert statuses(tmp_path) == {"done": "completed", "failed": "failed"}
+
+
+def test_report_without_metadata_is_not_completed(tmp_path):
+    make_folder(tmp_path, "streaming", state={"status": "streaming"})
+    make_folder(tmp_path, "cancelled", state={"status": "cancelled"})
+    make_folder(tmp_path, "legacy")
+
+    assert statuses(tmp_path) == {"streaming": "streaming", "cancelled": "cancelled", "legacy": None}
+
+
+def test_state_change_reindexes_the_session(tmp_path):
+    folder = make_folder(tmp_path, "run", state={"status": "streaming"})
+    assert statuses(tmp_path) == {"run": "streaming"}
+
+    state_file = folder / "session.json"
+    state_file.write_text(json.dumps({"status": "completed"}))
+    later = state_file.stat().st_mtime + 10
+    os.utime(state_file, (later, later))
+    assert statuses(tmp_path) == {"run": "completed"}
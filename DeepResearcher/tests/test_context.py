@@ -0,0 +1,76 @@
+import pytest
+
+from src.context import GAP_MARKER, Document, count_tokens, pack_query
+
+
+def make_document(passages, source="notes.md"):
+    doc = Document(source, "\n\n".join(passages))
+    doc.passages = [(passage, count_tokens(passage)) for passage in passages]
+    return doc
+
+
+def test_document_within_allowance_is_kept_whole():
+    doc = make_document(["# Title", "First paragraph here.", "Second paragraph here."])
+
+    doc.trim(doc.available, {"paragraph"})
+
+    assert doc.kept == [0, 1, 2]
+    assert GAP_MARKER not in doc.render()
+    assert doc.summary()["dropped_passages"] == 0
+
+
+def test_trim_keeps_passages_sharing_query_words():
+    passages = [
+        "Overview of the notes.",
+        "Cooking onions slowly brings out their sweetness in most stews.",
+        "GPU kernels are limited by memory bandwidth on most accelerators.",
+        "Gardening tips for planting tomatoes early in the spring season.",
+    ]
+    doc = make_document(passages)
+    allowance = doc.passages[0][1] + doc.passages[2][1]
+
+    doc.trim(allowance, {"gpu", "kernels", "bandwidth"})
+
+    assert doc.kept == [0, 2]
+    assert doc.render().count(GAP_MARKER) == 2
+    assert doc.summary()["dropped_passages"] == 2
+    assert doc.kept_tokens <= allowance
+
+
+def test_cut_opening_passage_is_marked_and_counted():
+    opening = " ".join(f"word{i}" for i in range(400))
+    doc = make_document([opening])
+
+    doc.trim(50, set())
+
+    assert 0 < doc.kept_tokens <= 50
+    assert doc.render().splitlines()[-2] == GAP_MARKER
+    summary = doc.summary()
+    assert summary["truncated_passages"] == 1
+    assert summary["tokens"] > summary["kept_tokens"]
+
+
+def test_zero_allowance_keeps_nothing():
+    doc = make_document(["Some text that is too long to fit anywhere at all."])
+
+    doc.trim(0, set())
+
+    assert doc.kept == []
+    assert doc.summary()["truncated_passages"] == 0
+
+
+def test_pack_query_drops_passages_already_in_the_query(tmp_path):
+    repeated = "This passage appears both in the query itself and in the included notes file."
+    (tmp_path / "notes.md").write_text(f"{repeated}\n\nA new passage only found in the included notes file here.")
+
+    packed = pack_query(f"{repeated}\n\n{{{{include notes.md}}}}", tmp_path, budget=0)
+
+    assert packed.text.count(repeated) == 1
+    assert packed.summary()["documents"][0]["duplicate_passages"] == 1
+
+
+def test_pack_query_rejects_unknown_options(tmp_path):
+    (tmp_path / "notes.md").write_text("text")
+
+    with pytest.raises(ValueError, match="max_tokens"):
+        pack_query("{{include notes.md size=3}}", tmp_path)
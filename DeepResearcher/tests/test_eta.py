@@ -0,0 +1,69 @@
+import pytest
+
+from src.eta import EtaPredictor, PastRun, decode_timeline, encode_timeline, request_tools_key, tools_key
+
+
+def test_timeline_round_trip_in_tenths():
+    offsets = [1.0, 2.5, 2.5, 10.04, 61.26]
+
+    encoded = encode_timeline(offsets)
+
+    assert encoded == "10,15,0,75,513"
+    assert decode_timeline(encoded) == [1.0, 2.5, 2.5, 10.0, 61.3]
+    assert decode_timeline("") == []
+
+
+def test_tools_key_from_request():
+    assert tools_key(True, False) == "web"
+    assert tools_key(False, False) == "none"
+    request = {"tools": [{"type": "code_interpreter"}, {"type": "web_search_preview"}]}
+    assert request_tools_key(request) == "web+code"
+
+
+def test_capped_run_keeps_its_writing_tail():
+    run = PastRun([10.0, 20.0, 30.0, 40.0], duration=100.0)
+
+    capped = run.capped(2)
+
+    assert capped.offsets == [10.0, 20.0]
+    assert capped.duration == 80.0
+    assert run.capped(10) is run
+
+
+def test_too_little_history_predicts_nothing():
+    predictor = EtaPredictor([PastRun([10.0], 60.0), PastRun([10.0], 60.0)], max_tool_calls=50)
+
+    assert predictor.predict(5.0, 0) is None
+
+
+def test_identical_past_runs_predict_their_remaining_time():
+    history = [PastRun([10.0, 20.0, 30.0], 100.0) for _ in range(3)]
+    predictor = EtaPredictor(history, max_tool_calls=50)
+    predictor.observe_call(10.0)
+
+    prediction = predictor.predict(10.0, 1)
+
+    assert prediction["remaining"] == (90.0, 90.0, 90.0)
+    assert prediction["tool_calls"] == (3, 3, 3)
+    assert prediction["samples"] == 3
+
+
+def test_slower_run_stretches_the_projection():
+    history = [PastRun([10.0, 20.0, 30.0], 100.0) for _ in range(3)]
+    predictor = EtaPredictor(history, max_tool_calls=50)
+    predictor.observe_call(20.0)
+
+    # Twice as slow as the past runs at its first call: 90s left becomes 180s
+    assert predictor.predict(20.0, 1)["remaining"][1] == pytest.approx(180.0)
+
+
+def test_runs_that_made_fewer_calls_are_left_out():
+    history = [PastRun([10.0], 50.0)] * 3 + [PastRun([10.0, 20.0, 30.0], 200.0, weight=1.0)] * 3
+    predictor = EtaPredictor(history, max_tool_calls=50)
+    for offset in (10.0, 20.0):
+        predictor.observe_call(offset)
+
+    prediction = predictor.predict(20.0, 2)
+
+    assert prediction["samples"] == 3
+    assert prediction["remaining"][1] == pytest.approx(180.0)
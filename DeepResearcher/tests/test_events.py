@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+from src.events import (
+    EventDispatcher,
+    count_tool_calls,
+    response_tool_usage,
+    summarize_tool_usage,
+)
+from src.streaming import ResearchTracker
+
+
+def event(event_type, **fields):
+    return SimpleNamespace(type=event_type, **fields)
+
+
+def test_handlers_run_for_their_types_in_registration_order():
+    calls = []
+    dispatcher = EventDispatcher()
+    dispatcher.on("a", lambda e: calls.append(("first", e.type)))
+    dispatcher.on(("a", "b"), lambda e: calls.append(("second", e.type)))
+
+    assert dispatcher.dispatch(event("a")) == "a"
+    assert dispatcher.dispatch(event("b")) == "b"
+    assert dispatcher.dispatch(event("c")) == "c"
+    assert calls == [("first", "a"), ("second", "a"), ("second", "b")]
+
+
+def test_catch_all_handlers_run_before_typed_ones():
+    calls = []
+    dispatcher = EventDispatcher()
+    dispatcher.on("a", lambda e: calls.append("typed"))
+    dispatcher.on_any(lambda e: calls.append("any"))
+
+    dispatcher.dispatch(event("a"))
+    dispatcher.dispatch(event("z"))
+
+    assert calls == ["any", "typed", "any"]
+
+
+def test_handlers_added_after_dispatch_are_routed():
+    calls = []
+    dispatcher = EventDispatcher()
+    dispatcher.dispatch(event("a"))
+    dispatcher.on("a", calls.append)
+    first = event("a")
+
+    dispatcher.dispatch(first)
+
+    assert calls == [first]
+
+
+def test_events_without_a_type_reach_catch_all_handlers():
+    calls = []
+    dispatcher = EventDispatcher()
+    dispatcher.on_any(calls.append)
+    untyped = object()
+
+    assert dispatcher.dispatch(untyped) is None
+    assert calls == [untyped]
+
+
+def test_tool_usage_counts_only_tool_calls():
+    output = [
+        SimpleNamespace(type="web_search_call"),
+        SimpleNamespace(type="web_search_call"),
+        SimpleNamespace(type="message"),
+        SimpleNamespace(type="mcp_tool_call"),
+    ]
+
+    counts = count_tool_calls(output)
+
+    assert counts["web_search_call"] == 2 and counts["mcp_tool_call"] == 1
+    assert summarize_tool_usage(counts) == {"web_searches": 2, "code_interpreter_calls": 0, "mcp_calls": 1}
+    assert response_tool_usage(SimpleNamespace(output=None)) == {"web_searches": 0, "code_interpreter_calls": 0}
+
+
+def test_final_event_leaves_the_terminal_status_to_the_caller():
+    tracker = ResearchTracker(max_tool_calls=10, model="o3-deep-research")
+    dispatcher = EventDispatcher()
+    tracker.subscribe(dispatcher)
+    tracker.start()
+    assert tracker.tool_usage() is None
+
+    dispatcher.dispatch(event("response.output_item.added", item=SimpleNamespace(type="web_search_call")))
+    dispatcher.dispatch(event("response.completed", response=SimpleNamespace(status="completed")))
+
+    assert tracker.status == "running"
+    assert tracker.end_time is None
+    assert tracker.tool_calls == 1
+    assert tracker.tool_usage() == {"web_searches": 1, "code_interpreter_calls": 0}
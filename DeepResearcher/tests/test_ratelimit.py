@@ -0,0 +1,74 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from src.ratelimit import BURST, SLOT_POLL_INTERVAL, RateLimiter, retry_after
+
+
+def limiter(tmp_path, **kwargs):
+    return RateLimiter(tmp_path / "ratelimit.json", **kwargs)
+
+
+def test_bucket_allows_a_burst_then_waits(tmp_path):
+    limits = limiter(tmp_path, requests_per_minute=60)
+
+    results = [limits.try_acquire("o3-deep-research") for _ in range(BURST)]
+    wait, slot = limits.try_acquire("o3-deep-research")
+
+    assert results == [(0, None)] * BURST
+    assert slot is None and 0 < wait <= 1.0
+    # Buckets are per model
+    assert limits.try_acquire("o4-mini-deep-research") == (0, None)
+
+
+def test_stream_slots_are_limited_and_released(tmp_path):
+    limits = limiter(tmp_path, requests_per_minute=6000, max_streams=2)
+
+    _, first = limits.try_acquire("m", stream=True)
+    _, second = limits.try_acquire("m", stream=True)
+    assert first and second and first != second
+    assert limits.try_acquire("m", stream=True) == (SLOT_POLL_INTERVAL, None)
+
+    limits.release(first)
+    assert limits.try_acquire("m", stream=True)[0] == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs a finished child process")
+def test_slots_of_dead_processes_are_reclaimed(tmp_path):
+    limits = limiter(tmp_path, requests_per_minute=6000, max_streams=1)
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0)
+    os.waitpid(pid, 0)
+    (tmp_path / "ratelimit.json").write_text(json.dumps({"streams": {"gone": pid}}))
+
+    wait, slot = limits.try_acquire("m", stream=True)
+
+    assert wait == 0 and slot
+
+
+def test_block_holds_back_the_model(tmp_path):
+    limits = limiter(tmp_path)
+
+    limits.block("m", 30)
+    wait, slot = limits.try_acquire("m")
+
+    assert slot is None and 29 < wait <= 30
+    assert limits.try_acquire("other") == (0, None)
+
+
+def error(status_code, code=None, **headers):
+    return SimpleNamespace(status_code=status_code, code=code, response=SimpleNamespace(headers=headers))
+
+
+@pytest.mark.parametrize("failure, seconds", [
+    (error(429, **{"retry-after": "7"}), 7.0),
+    (error(429, **{"retry-after-ms": "1500"}), 1.5),
+    (error(503), 0.0),
+    (error(429, code="insufficient_quota"), None),
+    (error(400), None),
+])
+def test_retry_after(failure, seconds):
+    assert retry_after(failure) == seconds
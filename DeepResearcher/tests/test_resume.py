@@ -0,0 +1,70 @@
+import json
+
+from src.journal import EventJournal, JOURNAL_FILENAME
+from src.output import OutputWriter
+from src.resume import STATE_FILENAME, SessionState, restore_tracker
+from src.streaming import ResearchTracker
+
+
+def journal_events(folder, events):
+    journal = EventJournal(folder / JOURNAL_FILENAME)
+    for event in events:
+        journal.append(event)
+    journal.close()
+
+
+def test_state_is_saved_once_attached(tmp_path):
+    state = SessionState.create({"model": "o3-deep-research", "input": "seeded"}, "cli", query="plain")
+    assert not (tmp_path / STATE_FILENAME).exists()
+
+    state.attach(tmp_path / STATE_FILENAME)
+    state.record_response_id("resp_1")
+    state.mark("cancelled")
+
+    loaded = SessionState.load(tmp_path)
+    assert loaded.response_id == "resp_1"
+    assert loaded.data["status"] == "cancelled"
+    assert loaded.data["query"] == "plain"
+    assert loaded.request["input"] == "seeded"
+
+
+def test_sequence_numbers_are_saved_at_most_every_interval(tmp_path):
+    state = SessionState.create({}, "cli", tmp_path / STATE_FILENAME)
+    state.record_response_id("resp_1")
+
+    state.record_event(type("Event", (), {"sequence_number": 7})())
+    assert state.last_sequence_number == 7
+    assert json.loads((tmp_path / STATE_FILENAME).read_text())["last_sequence_number"] is None
+
+    state.save()
+    assert json.loads((tmp_path / STATE_FILENAME).read_text())["last_sequence_number"] == 7
+
+
+def test_restore_tracker_replays_tool_calls_and_report_text(tmp_path):
+    journal_events(tmp_path, [
+        {"type": "response.created", "sequence_number": 0, "response": {"id": "resp_1"}},
+        {"type": "response.output_item.added", "sequence_number": 1, "item": {"type": "web_search_call"}},
+        {"type": "response.output_item.added", "sequence_number": 2, "item": {"type": "code_interpreter_call"}},
+        {"type": "response.output_text.delta", "sequence_number": 3, "delta": "Partial "},
+        {"type": "response.output_text.delta", "sequence_number": 4, "delta": "report"},
+    ])
+    state = SessionState({"started_at": 1000.0, "last_sequence_number": 2, "request": {}})
+    tracker = ResearchTracker(max_tool_calls=10, model="o3-deep-research")
+    output = OutputWriter(tmp_path / "report.md")
+
+    # The state file lags behind the journal; resume from the journal's position
+    assert restore_tracker(tracker, tmp_path, state, output) == 4
+    output.close()
+
+    assert (tracker.tool_calls, tracker.web_searches, tracker.code_calls) == (2, 1, 1)
+    assert tracker.start_time == 1000.0
+    assert tracker.status == "running"
+    assert (tmp_path / "report.md").read_text() == "Partial report"
+
+
+def test_restore_without_a_journal_keeps_the_state_position(tmp_path):
+    state = SessionState({"last_sequence_number": 12, "request": {}})
+    tracker = ResearchTracker(max_tool_calls=10, model="o3-deep-research")
+
+    assert restore_tracker(tracker, tmp_path, state) == 12
+    assert tracker.tool_calls == 0
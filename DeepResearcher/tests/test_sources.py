@@ -0,0 +1,65 @@
+import json
+from types import SimpleNamespace
+
+from src.catalog import backfill_catalog, open_catalog
+from src.sources import SEED_HEADER, extract_sources, find_known_sources, normalize_url, seed_prompt
+
+
+def test_normalize_url_drops_fragments_and_tracking():
+    url = "HTTPS://Example.com/papers/?id=3&utm_source=x&fbclid=y#section"
+
+    assert normalize_url(url) == "https://example.com/papers?id=3"
+    assert normalize_url("https://example.com") == "https://example.com/"
+
+
+def test_extract_sources_merges_annotations_and_inline_citations():
+    text = (
+        "HBM3 doubles the bandwidth of HBM2 ([spec](https://example.com/hbm3)). "
+        "Kernels stall on memory ([blog](https://blog.example.org/stalls?utm_medium=rss))."
+    )
+    annotation = SimpleNamespace(type="url_citation", url="https://example.com/hbm3#top", title="HBM3 spec",
+                                 start_index=text.index("(["))
+    output = [SimpleNamespace(type="message", content=[SimpleNamespace(text=text, annotations=[annotation])])]
+
+    sources = extract_sources(text, output)
+
+    assert [source["url"] for source in sources] == ["https://example.com/hbm3", "https://blog.example.org/stalls"]
+    assert sources[0]["title"] == "HBM3 spec"
+    assert sources[0]["finding"] == "HBM3 doubles the bandwidth of HBM2"
+    assert sources[1]["title"] is None
+
+
+def make_session(base_dir, name, sources):
+    folder = base_dir / name
+    folder.mkdir(parents=True)
+    (folder / f"{name}_input.md").write_text(name)
+    (folder / f"{name}_output.md").write_text("report")
+    (folder / "metadata.json").write_text(json.dumps({"status": "completed", "sources": sources}))
+
+
+def source(url, title, finding):
+    return {"url": url, "title": title, "finding": finding}
+
+
+def test_known_sources_rank_relevant_and_widely_cited_first(tmp_path):
+    shared = source("https://example.com/hbm", "HBM bandwidth survey", "HBM bandwidth per stack")
+    make_session(tmp_path, "one", [shared, source("https://example.com/soup", "Soup recipes", "Onion soup")])
+    make_session(tmp_path, "two", [shared, source("https://example.com/gddr", "GDDR7 overview", "GDDR bandwidth per chip")])
+    conn, _ = open_catalog(tmp_path)
+    backfill_catalog(conn, tmp_path)
+
+    known = find_known_sources(conn, "What limits memory bandwidth?", limit=5)
+
+    assert [s["url"] for s in known] == ["https://example.com/hbm", "https://example.com/gddr"]
+    assert known[0]["sessions"] == 2
+    assert find_known_sources(conn, "what is the") == []
+
+
+def test_seed_prompt_lists_sources_after_the_query():
+    prompt = seed_prompt("How fast is HBM?", [
+        {"url": "https://example.com/hbm", "title": None, "finding": "HBM bandwidth per stack"},
+    ])
+
+    assert prompt.startswith("How fast is HBM?\n\n" + SEED_HEADER)
+    assert prompt.endswith("- example.com: https://example.com/hbm - HBM bandwidth per stack")
+    assert seed_prompt("How fast is HBM?", []) == "How fast is HBM?"
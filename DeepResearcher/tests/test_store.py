@@ -0,0 +1,64 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import src.store
+from src.archive import pack_sessions
+from src.store import ALLOCATIONS_FILENAME, ARCHIVED_FILENAME, SessionStore
+
+
+def test_allocate_numbers_repeated_names(tmp_path):
+    store = SessionStore(tmp_path)
+
+    names = [store.allocate("topic").name for _ in range(3)]
+
+    assert names == ["topic", "topic_001", "topic_002"]
+    assert json.loads((tmp_path / ALLOCATIONS_FILENAME).read_text()) == {"topic": 3}
+
+
+def test_allocate_skips_existing_folders_when_the_index_is_lost(tmp_path):
+    (tmp_path / "topic").mkdir()
+    (tmp_path / "topic_001").mkdir()
+
+    assert SessionStore(tmp_path).allocate("topic").name == "topic_002"
+
+
+def test_concurrent_allocations_get_distinct_folders(tmp_path):
+    store = SessionStore(tmp_path)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        folders = list(pool.map(lambda _: store.allocate("topic"), range(32)))
+
+    assert len({folder.name for folder in folders}) == 32
+    assert all(folder.is_dir() for folder in folders)
+
+
+def test_recorded_archived_names_are_skipped_without_reading_archives(tmp_path, monkeypatch):
+    store = SessionStore(tmp_path)
+    store.record_archived(["topic", "topic_001"])
+
+    def fail(directory):
+        raise AssertionError("allocate must not open archives")
+
+    monkeypatch.setattr(src.store, "archived_sessions", fail)
+    assert store.allocate("topic").name == "topic_002"
+    assert store.allocate("other").name == "other"
+
+
+def test_archived_names_are_listed_once_for_older_sessions_dirs(tmp_path):
+    folder = tmp_path / "packed" / "topic"
+    folder.mkdir(parents=True)
+    (folder / "topic_input.md").write_text("q")
+    pack_sessions(tmp_path / "sessions.drpack", [folder])
+
+    assert SessionStore(tmp_path).allocate("topic").name == "topic_001"
+    assert json.loads((tmp_path / ARCHIVED_FILENAME).read_text()) == ["topic"]
+
+
+@pytest.mark.parametrize("contents", ["", "not json"])
+def test_unreadable_archived_list_is_rebuilt(tmp_path, contents):
+    (tmp_path / ARCHIVED_FILENAME).write_text(contents)
+
+    assert SessionStore(tmp_path).allocate("topic").name == "topic"
+    assert json.loads((tmp_path / ARCHIVED_FILENAME).read_text()) == []